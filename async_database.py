@@ -0,0 +1,110 @@
+"""Awaitable facade over ``database`` so SQLite work never runs on the event loop."""
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+logger = logging.getLogger("thronos_bot.async_database")
+READER_THREADS = max(1, int(os.getenv("DATABASE_READER_THREADS", "2")))
+QUEUE_SIZE = max(1, int(os.getenv("DATABASE_QUEUE_SIZE", "256")))
+
+# Helpers exposed as ``await adb.<name>(...)``; everything else goes through
+# ``run_read``/``run_write`` explicitly.
+READ_FUNCTIONS = frozenset({
+    "get_proposal", "get_all_proposals", "has_voted",
+    "get_leaderboard", "get_user_rank", "get_wallet", "get_bot_message",
+    "get_evm_cursor", "load_metric_samples",
+})
+WRITE_FUNCTIONS = frozenset({
+    "create_proposal", "update_proposal_votes", "add_vote", "cast_vote",
+    "update_user_stats", "bind_wallet", "set_bot_message", "delete_bot_message",
+    "save_evm_cursor", "save_metric_samples",
+})
+
+
+class AsyncDatabase:
+    """Run blocking database calls on a single writer thread and a few readers.
+
+    SQLite allows one writer at a time, so funnelling writes through one thread
+    turns lock contention into an ordered queue instead of busy-timeout waits.
+    At most ``queue_size`` calls are outstanding; further callers wait their
+    turn without blocking the event loop.
+    """
+
+    def __init__(self, readers=READER_THREADS, queue_size=QUEUE_SIZE):
+        self.readers = readers
+        self.queue_size = queue_size
+        self._writer = None
+        self._reader = None
+        self._loop = None
+        self._slots = None
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_waits = 0
+
+    def start(self):
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+            self._reader = ThreadPoolExecutor(self.readers, thread_name_prefix="db-reader")
+
+    async def close(self):
+        writer, reader = self._writer, self._reader
+        self._writer = self._reader = None
+        loop = asyncio.get_running_loop()
+        for executor in (writer, reader):
+            if executor is not None:
+                await loop.run_in_executor(None, executor.shutdown)
+
+    async def _submit(self, write, fn, args, kwargs):
+        self.start()
+        executor = self._writer if write else self._reader
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._slots = loop, asyncio.Semaphore(self.queue_size)
+        if self._slots.locked():
+            self.queue_waits += 1
+        async with self._slots:
+            self.pending += 1
+            try:
+                result = await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.pending -= 1
+            self.completed += 1
+            return result
+
+    async def run_read(self, fn, *args, **kwargs):
+        return await self._submit(False, fn, args, kwargs)
+
+    async def run_write(self, fn, *args, **kwargs):
+        return await self._submit(True, fn, args, kwargs)
+
+    def __getattr__(self, name):
+        if name in WRITE_FUNCTIONS:
+            return functools.partial(self._call, True, name)
+        if name in READ_FUNCTIONS:
+            return functools.partial(self._call, False, name)
+        raise AttributeError(name)
+
+    async def _call(self, write, name, *args, **kwargs):
+        # Resolve at call time so tests can monkeypatch ``database`` helpers.
+        return await self._submit(write, getattr(database, name), args, kwargs)
+
+    def stats(self):
+        return {
+            "readers": self.readers,
+            "queue_size": self.queue_size,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_waits": self.queue_waits,
+        }
+
+
+adb = AsyncDatabase()
@@ -5,38 +5,47 @@ import logging
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
 
-# Configure logging
-os.makedirs("logs", exist_ok=True)
-
-# Create formatters
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(formatter)
-
-# File handler with rotation (10MB per file, keep 5 backups)
-file_handler = RotatingFileHandler(
-    'logs/thronos_bot.log',
-    maxBytes=10*1024*1024,  # 10MB
-    backupCount=5,
-    encoding='utf-8'
-)
-file_handler.setLevel(logging.DEBUG)
-file_handler.setFormatter(formatter)
-
-# Configure root logger
-logging.basicConfig(
-    level=logging.INFO,
-    handlers=[console_handler, file_handler]
-)
+import database
+from async_database import adb
+from chain_events import ChainEventStream
+from thronos_api import ThronosAPIClient
+from timeseries import TimeSeriesStore
+from utils.guild_index import GuildIndex
 
 logger = logging.getLogger('thronos_bot')
 
+
+def configure_logging():
+    """Attach console and rotating file handlers; called only when running the bot."""
+    os.makedirs("logs", exist_ok=True)
+
+    # Create formatters
+    formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(formatter)
+
+    # File handler with rotation (10MB per file, keep 5 backups)
+    file_handler = RotatingFileHandler(
+        'logs/thronos_bot.log',
+        maxBytes=10*1024*1024,  # 10MB
+        backupCount=5,
+        encoding='utf-8'
+    )
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(formatter)
+
+    # Configure root logger
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[console_handler, file_handler]
+    )
+
 # Load environment variables
 load_dotenv()
 TOKEN = (os.getenv('DISCORD_TOKEN') or '').strip()
@@ -68,8 +77,25 @@ class ThronosBot(commands.Bot):
         intents.message_content = True
         intents.members = True # Required for role management
         super().__init__(command_prefix='!', intents=intents)
+        # One keep-alive HTTP client for every cog's Thronos API calls
+        self.api = ThronosAPIClient()
+        # Pushed chain events; cogs subscribe on load and poll while it is down
+        self.chain_events = ChainEventStream(self.api)
+        # Price/network history behind /price and /stats deltas
+        self.timeseries = TimeSeriesStore()
+        # Channel/role lookups by name, kept current from gateway events
+        self.guild_index = GuildIndex()
+        self.guild_index.attach(self)
 
     async def setup_hook(self):
+        # Database work runs on dedicated threads from here on; migrate before
+        # any cog touches a table.
+        adb.start()
+        # .env is loaded after database is imported, so read the path again here
+        await adb.run_write(database.configure, os.getenv("THRONOS_DB_PATH") or None)
+        await self.api.start()
+        await self.timeseries.start()
+
         # Load extensions
         logger.info("Loading extensions...")
         extensions = [
@@ -90,6 +116,8 @@ class ThronosBot(commands.Bot):
                     ext,
                     type(error).__name__,
                 )
+        # Started once every cog has subscribed, so no early event is dropped
+        self.chain_events.start()
 
         # Sync commands with Discord
         try:
@@ -103,6 +131,14 @@ class ThronosBot(commands.Bot):
         except discord.HTTPException as error:
             logger.error("Failed to sync commands [%s]", discord_error_code(error))
 
+    async def close(self):
+        await super().close()
+        await self.chain_events.close()
+        await self.api.close()
+        await self.timeseries.close()
+        await adb.close()
+        database.close_pool()
+
     async def on_ready(self):
         logger.info(f'Logged in as {self.user} (ID: {self.user.id})')
         logger.info('Bot is ready!')
@@ -160,4 +196,5 @@ def run_bot():
         return 1
 
 if __name__ == '__main__':
+    configure_logging()
     raise SystemExit(run_bot())
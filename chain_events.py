@@ -0,0 +1,222 @@
+"""Push-based chain events from the Thronos API's server-sent event stream.
+
+``ChainEventStream`` holds one long-lived ``text/event-stream`` request open,
+reconnects with jittered backoff, resumes from the last event ID it saw and
+treats a stream that stays silent past the heartbeat timeout as dead. Each
+event is published on an in-process ``EventBus``; cogs subscribe to the types
+they care about and keep their polling loops for whenever ``live`` is false.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger("thronos_bot.chain_events")
+
+CONTRACT_DEPLOYED = "contract_deployed"
+NETWORK_STATS = "network_stats"
+PRICE = "price"
+EVENT_TYPES = frozenset({CONTRACT_DEPLOYED, NETWORK_STATS, PRICE})
+# Snapshot events carry the same body as the endpoint they replace
+EVENT_ENDPOINTS = {NETWORK_STATS: "/network_stats", PRICE: "/token/prices"}
+
+
+@dataclass(frozen=True)
+class ChainEvent:
+    type: str
+    data: dict
+    id: str = None
+
+
+@dataclass(frozen=True)
+class StreamConfig:
+    enabled: bool = True
+    path: str = "/events/stream"
+    heartbeat_seconds: float = 45.0
+    min_backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 300.0
+    # Pushed snapshots re-render embeds/presence at most this often
+    min_refresh_seconds: float = 15.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.getenv("CHAIN_EVENTS_ENABLED", "true").strip().lower() not in ("0", "false", "no"),
+            path=os.getenv("CHAIN_EVENTS_PATH", cls.path).strip() or cls.path,
+            heartbeat_seconds=max(1.0, float(os.getenv("CHAIN_EVENTS_HEARTBEAT_SECONDS", "45"))),
+            min_refresh_seconds=max(1.0, float(os.getenv("CHAIN_EVENTS_MIN_REFRESH_SECONDS", "15"))),
+        )
+
+
+class EventBus:
+    """Fan ``ChainEvent``s out to async handlers subscribed by event type.
+
+    Handlers run as tasks so a slow Discord delivery never stalls the stream
+    reader; a failing handler is logged and does not affect the others.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._tasks = set()
+        self.published = 0
+        self.failures = 0
+
+    def subscribe(self, event_type, handler):
+        self._handlers.setdefault(event_type, []).append(handler)
+        return handler
+
+    def unsubscribe(self, event_type, handler):
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def publish(self, event):
+        self.published += 1
+        for handler in list(self._handlers.get(event.type, ())):
+            task = asyncio.create_task(self._call(handler, event))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _call(self, handler, event):
+        try:
+            await handler(event)
+        except Exception as error:
+            self.failures += 1
+            logger.error("Chain event handler for %s failed [%s]", event.type, type(error).__name__)
+
+    async def drain(self):
+        """Wait for the handlers already started (used by shutdown and tests)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "failures": self.failures,
+            "running": len(self._tasks),
+            "subscribers": {key: len(handlers) for key, handlers in sorted(self._handlers.items())},
+        }
+
+
+class ChainEventStream:
+    """Keep one SSE subscription open and publish what it delivers."""
+
+    def __init__(self, api, bus=None, config=None):
+        self.api = api
+        self.bus = bus or EventBus()
+        self.config = config or StreamConfig.from_env()
+        self.live = False
+        self.last_event_id = None
+        self._task = None
+        self.connects = 0
+        self.disconnects = 0
+        self.events = 0
+        self.heartbeat_timeouts = 0
+        self.last_event_at = None
+
+    def start(self):
+        if self.config.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.live = False
+        await self.bus.drain()
+
+    async def _run(self):
+        delay = self.config.min_backoff_seconds
+        while True:
+            received = 0
+            try:
+                received = await self._subscribe()
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self.heartbeat_timeouts += 1
+                logger.warning("Chain event stream missed its heartbeat; reconnecting")
+            except Exception as error:
+                logger.warning("Chain event stream failed [%s]", type(error).__name__)
+            finally:
+                if self.live:
+                    self.disconnects += 1
+                self.live = False
+            # A session that delivered something starts the backoff over
+            if received:
+                delay = self.config.min_backoff_seconds
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(self.config.max_backoff_seconds, delay * 2)
+
+    async def _subscribe(self):
+        """Consume one connection; return how many lines it delivered."""
+        headers = {"Accept": "text/event-stream"}
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        async with self.api.open_stream(self.config.path, headers) as response:
+            if response.status != 200:
+                logger.warning("Chain event stream returned status %d", response.status)
+                return 0
+            self.connects += 1
+            self.live = True
+            received = 0
+            fields = {}
+            while True:
+                # Any line, including ": keep-alive" comments, proves the stream is alive
+                line = await asyncio.wait_for(response.content.readline(),
+                                              self.config.heartbeat_seconds)
+                if not line:
+                    return received
+                received += 1
+                line = line.decode("utf-8", "replace").rstrip("\r\n")
+                if line:
+                    self._parse_field(fields, line)
+                elif fields:
+                    self._dispatch(fields)
+                    fields = {}
+
+    @staticmethod
+    def _parse_field(fields, line):
+        if line.startswith(":"):
+            return
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "data":
+            fields["data"] = f"{fields['data']}\n{value}" if "data" in fields else value
+        elif name in ("event", "id"):
+            fields[name] = value
+
+    def _dispatch(self, fields):
+        if "id" in fields:
+            self.last_event_id = fields["id"] or None
+        event_type = fields.get("event", "message")
+        if event_type not in EVENT_TYPES:
+            return
+        try:
+            data = json.loads(fields.get("data", ""))
+        except ValueError:
+            logger.warning("Chain event %s carried undecodable JSON", event_type)
+            return
+        if not isinstance(data, dict):
+            return
+        self.events += 1
+        self.last_event_at = time.time()
+        self.bus.publish(ChainEvent(event_type, data, fields.get("id")))
+
+    def stats(self):
+        return {
+            "enabled": self.config.enabled,
+            "live": self.live,
+            "last_event_id": self.last_event_id,
+            "seconds_since_event": (round(time.time() - self.last_event_at, 3)
+                                    if self.last_event_at else None),
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "events": self.events,
+            "heartbeat_timeouts": self.heartbeat_timeouts,
+            "bus": self.bus.stats(),
+        }
@@ -0,0 +1,202 @@
+"""Line charts for ``/price`` and ``/stats``, rendered off the event loop.
+
+``render_line_chart`` is a pure function that writes a PNG with ``zlib`` and
+``struct`` only, so it pickles into a ``ProcessPoolExecutor`` worker and
+needs no plotting dependency. ``ChartCache`` keys finished images by
+``(metric, window, bucket_end)``: every request in the same bucket awaits one
+render, and only the first one uploads the file; the rest reuse its URL.
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger("thronos_bot.charts")
+
+# Window name -> (seconds shown, bucket seconds a rendered image stays valid)
+CHART_WINDOWS = {
+    "1h": (3600, 60),
+    "24h": (86400, 300),
+    "7d": (7 * 86400, 3600),
+    "30d": (30 * 86400, 6 * 3600),
+}
+RISING = (46, 204, 113)
+FALLING = (231, 76, 60)
+BACKGROUND = (43, 45, 49)
+GRID = (64, 68, 75)
+# The bot process is multithreaded, so workers never start by plain fork
+START_METHOD = "forkserver"
+
+
+def bucket_end(window, now=None):
+    """End of the cache bucket ``now`` falls in for ``window``."""
+    step = CHART_WINDOWS[window][1]
+    now = time.time() if now is None else now
+    return int(math.ceil(now / step) * step)
+
+
+def thin(points, limit):
+    """At most ``limit`` evenly spaced points, always keeping the last one."""
+    if len(points) <= limit:
+        return list(points)
+    stride = len(points) / limit
+    picked = [points[int(k * stride)] for k in range(limit - 1)]
+    picked.append(points[-1])
+    return picked
+
+
+def _png(width, height, pixels):
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    stride = width * 3
+    raw = b"".join(b"\x00" + bytes(pixels[row * stride:(row + 1) * stride]) for row in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+def render_line_chart(points, width=480, height=160, color=RISING, background=BACKGROUND,
+                      grid=GRID, padding=8, thickness=2):
+    """Return PNG bytes plotting ``points`` (``(x, y)`` pairs) scaled to fit.
+
+    The area under the line is shaded and three horizontal guides mark the
+    quartiles of the value range; labels are left to the embed around it.
+    """
+    pixels = bytearray(bytes(background) * (width * height))
+    xs, ys = [p[0] for p in points], [p[1] for p in points]
+    x_low, x_high = min(xs), max(xs)
+    y_low, y_high = min(ys), max(ys)
+    if x_high == x_low:
+        x_high = x_low + 1
+    if y_high == y_low:
+        y_low, y_high = y_low - 1, y_high + 1
+    inner_w, inner_h = width - 2 * padding - 1, height - 2 * padding - 1
+
+    def to_px(x, y):
+        return (padding + (x - x_low) / (x_high - x_low) * inner_w,
+                padding + (y_high - y) / (y_high - y_low) * inner_h)
+
+    def put(px, py, rgb):
+        if 0 <= px < width and 0 <= py < height:
+            offset = (py * width + px) * 3
+            pixels[offset:offset + 3] = bytes(rgb)
+
+    for quarter in (1, 2, 3):
+        py = padding + round(inner_h * quarter / 4)
+        for px in range(padding, width - padding):
+            if px % 4 < 2:
+                put(px, py, grid)
+
+    coords = [to_px(x, y) for x, y in points]
+    shade = tuple((c + 3 * b) // 4 for c, b in zip(color, background))
+    for (ax, ay), (bx, by) in zip(coords, coords[1:]):
+        for px in range(round(ax), round(bx) + 1):
+            t = (px - ax) / (bx - ax) if bx != ax else 0
+            top = round(ay + (by - ay) * min(max(t, 0), 1))
+            for py in range(top + 1, height - padding):
+                put(px, py, shade)
+    for (ax, ay), (bx, by) in zip(coords, coords[1:]):
+        steps = max(1, round(max(abs(bx - ax), abs(by - ay))))
+        for k in range(steps + 1):
+            px = round(ax + (bx - ax) * k / steps)
+            py = round(ay + (by - ay) * k / steps)
+            for dx in range(thickness):
+                for dy in range(thickness):
+                    put(px + dx, py + dy, color)
+    return _png(width, height, pixels)
+
+
+class ChartEntry:
+    __slots__ = ("png", "url", "claimed")
+
+    def __init__(self, png):
+        self.png = png
+        # Resolved with the attachment URL by whoever uploads first (None on failure)
+        self.url = asyncio.get_running_loop().create_future()
+        self.claimed = False
+
+
+class ChartCache:
+    """Render charts in worker processes and share each image per bucket."""
+
+    def __init__(self, max_entries=64, workers=None):
+        self.max_entries = max_entries
+        self.workers = workers or max(1, int(os.getenv("CHART_WORKERS", "1")))
+        self._executor = None
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.renders = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.render_seconds = 0.0
+
+    async def get(self, key, points, **options):
+        """Return ``(entry, uploader)``; ``uploader`` is true for exactly one caller per key."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            task = self._inflight.get(key)
+            if task is None:
+                task = self._inflight[key] = asyncio.create_task(self._render(key, points, options))
+            else:
+                self.coalesced += 1
+            entry = await asyncio.shield(task)
+        uploader = not entry.claimed
+        entry.claimed = True
+        return entry, uploader
+
+    async def _render(self, key, points, options):
+        try:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(START_METHOD))
+            started = time.perf_counter()
+            png = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _render_call, points, options)
+            self.render_seconds += time.perf_counter() - started
+            self.renders += 1
+            entry = self._entries[key] = ChartEntry(png)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def uploaded(entry, url):
+        """Record the first upload's URL (``None`` if it failed) for the waiters."""
+        if not entry.url.done():
+            entry.url.set_result(url)
+
+    async def close(self):
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "renders": self.renders,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "render_seconds": round(self.render_seconds, 4),
+        }
+
+
+def _render_call(points, options):
+    return render_line_chart(points, **options)
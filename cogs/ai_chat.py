@@ -1,9 +1,7 @@
 import discord
 from discord.ext import commands
-import aiohttp
 import logging
-import os
-import database as db
+from async_database import adb
 
 logger = logging.getLogger('thronos_bot.ai_chat')
 
@@ -12,8 +10,6 @@ class AIChat(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        raw_url = os.getenv("THRONOS_API_URL", "https://api.thronoschain.org/api").rstrip("/")
-        self.base_url = raw_url if raw_url.endswith("/api") else f"{raw_url}/api"
     
     @commands.hybrid_command(name="bind", description="Bind your Thronos wallet to your Discord account")
     async def bind_wallet(self, ctx: commands.Context, wallet_address: str):
@@ -22,7 +18,7 @@ class AIChat(commands.Cog):
             await ctx.reply("❌ Invalid wallet address. Must start with `THR` or `0x`.", ephemeral=True)
             return
 
-        db.bind_wallet(ctx.author.id, ctx.author.display_name, wallet_address)
+        await adb.bind_wallet(ctx.author.id, ctx.author.display_name, wallet_address)
         await ctx.reply(f"✅ Successfully bound wallet `{wallet_address}` to your account! You can now use your on-chain AI credits.", ephemeral=True)
         logger.info(f"{ctx.author} bound wallet {wallet_address}")
     
@@ -39,7 +35,7 @@ class AIChat(commands.Cog):
             session_id = f"discord_{ctx.author.id}"
             
             # Fetch bound wallet
-            wallet = db.get_wallet(ctx.author.id)
+            wallet = await adb.get_wallet(ctx.author.id)
             
             payload = {
                 "message": message,
@@ -48,24 +44,21 @@ class AIChat(commands.Cog):
             if wallet:
                 payload["wallet"] = wallet
             
-            async with aiohttp.ClientSession() as session:
-                endpoint = f"{self.base_url}/ai/chat"
-                async with session.post(endpoint, json=payload, timeout=60) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        reply = data.get("assistant_message") or data.get("response") or "No response from AI."
-                        model_id = data.get("model_id", "unknown")
-                        
-                        embed = discord.Embed(
-                            title="🤖 AI Response",
-                            description=reply,
-                            color=0x4a90e2
-                        )
-                        embed.set_footer(text=f"Model: {model_id} | Session: {session_id}")
-                        await ctx.reply(embed=embed)
-                    else:
-                        logger.warning(f"AI API returned status {response.status}")
-                        await ctx.reply(f"❌ Failed to reach AI provider (Status {response.status}). Keep in mind some features may require a synced wallet.")
+            status, data = await self.bot.api.post_json("/ai/chat", payload, timeout=60)
+            if status == 200 and isinstance(data, dict):
+                reply = data.get("assistant_message") or data.get("response") or "No response from AI."
+                model_id = data.get("model_id", "unknown")
+                
+                embed = discord.Embed(
+                    title="🤖 AI Response",
+                    description=reply,
+                    color=0x4a90e2
+                )
+                embed.set_footer(text=f"Model: {model_id} | Session: {session_id}")
+                await ctx.reply(embed=embed)
+            else:
+                logger.warning(f"AI API returned status {status}")
+                await ctx.reply(f"❌ Failed to reach AI provider (Status {status}). Keep in mind some features may require a synced wallet.")
                         
         except Exception as e:
             logger.error(f"Error in ask_ai: {e}", exc_info=True)
@@ -16,7 +16,7 @@ class Announcements(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def announce_command(self, ctx: commands.Context, *, message: str):
         """Post an announcement to the announcements channel."""
-        announcements_channel = discord.utils.get(ctx.guild.text_channels, name="announcements")
+        announcements_channel = self.bot.guild_index.text_channel(ctx.guild, "announcements")
         
         if not announcements_channel:
             await ctx.reply("❌ Announcements channel not found.", ephemeral=True)
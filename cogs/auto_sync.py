@@ -1,7 +1,8 @@
-import discord
 from discord.ext import commands, tasks
 from cogs.server_setup import ServerSetup
 import logging
+from utils.broadcast import fan_out
+from utils.message_registry import upsert_message
 
 logger = logging.getLogger('thronos_bot.auto_sync')
 
@@ -10,6 +11,7 @@ class AutoSync(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        self.last_sync = {}
         self.sync_content.start()
     
     def cog_unload(self):
@@ -28,44 +30,35 @@ class AutoSync(commands.Cog):
                 logger.error("ServerSetup cog not found, cannot sync content")
                 return
             
-            for guild in self.bot.guilds:
-                logger.info(f"Syncing content for guild: {guild.name}")
-                
-                # 1. Update Roadmap
-                roadmap_channel = discord.utils.get(guild.text_channels, name="roadmap")
-                if roadmap_channel:
-                    try:
-                        roadmap_embed = await server_setup_cog.get_roadmap_embed()
-                        
-                        # Find and update bot's message
-                        async for message in roadmap_channel.history(limit=10):
-                            if message.author == self.bot.user and message.embeds:
-                                await message.edit(embed=roadmap_embed)
-                                logger.info(f"Updated roadmap in {guild.name}")
-                                break
-                    except Exception as e:
-                        logger.error(f"Error syncing roadmap: {e}")
-                
-                # 2. Update Whitepaper
-                whitepaper_channel = discord.utils.get(guild.text_channels, name="whitepaper")
-                if whitepaper_channel:
-                    try:
-                        whitepaper_embed = await server_setup_cog.get_whitepaper_embed()
-                        
-                        # Find and update bot's message
-                        async for message in whitepaper_channel.history(limit=10):
-                            if message.author == self.bot.user and message.embeds:
-                                await message.edit(embed=whitepaper_embed)
-                                logger.info(f"Updated whitepaper in {guild.name}")
-                                break
-                    except Exception as e:
-                        logger.error(f"Error syncing whitepaper: {e}")
+            # Scrape and render once, then refresh every guild's copy concurrently
+            embeds = {
+                "roadmap": await server_setup_cog.get_roadmap_embed(),
+                "whitepaper": await server_setup_cog.get_whitepaper_embed(),
+            }
+            result = await fan_out(self.bot.guilds, lambda guild: self.sync_guild(guild, embeds))
+            self.last_sync = result.summary()
             
-            logger.info("Automated content sync completed")
+            logger.info(f"Automated content sync completed: {self.last_sync}")
         
         except Exception as e:
             logger.error(f"Error in sync_content task: {e}")
     
+    async def sync_guild(self, guild, embeds):
+        """Edit the bot's roadmap/whitepaper messages in one guild."""
+        updated = False
+        for name, embed in embeds.items():
+            channel = self.bot.guild_index.text_channel(guild, name)
+            if not channel:
+                continue
+            try:
+                # Edit the bot's message; never post one that setup has not created
+                if await upsert_message(self.bot, channel, create=False, embed=embed):
+                    logger.info(f"Updated {name} in {guild.name}")
+                    updated = True
+            except Exception as e:
+                logger.error(f"Error syncing {name}: {e}")
+        return updated
+    
     @sync_content.before_loop
     async def before_sync_content(self):
         await self.bot.wait_until_ready()
@@ -4,6 +4,7 @@ import logging
 
 from discord.ext import commands
 
+from async_database import adb
 from promotion import PromotionConfig, PromotionService
 
 logger = logging.getLogger("thronos_bot.promotion_worker")
@@ -38,7 +39,7 @@ class CommunityPromotion(commands.Cog):
     @commands.hybrid_command(name="promotion_status", description="Safe promotion worker diagnostics")
     @commands.has_permissions(administrator=True)
     async def status(self, ctx):
-        data = self.service.diagnostics() if self.service else {"enabled": False, "last_safe_error_code": "INVALID_CONFIG"}
+        data = await adb.run_read(self.service.diagnostics) if self.service else {"enabled": False, "last_safe_error_code": "INVALID_CONFIG"}
         await ctx.reply(f"```json\n{json.dumps(data, indent=2)}\n```", ephemeral=True)
 
 
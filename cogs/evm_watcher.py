@@ -1,72 +1,177 @@
 import discord
 from discord.ext import commands, tasks
-import aiohttp
+import asyncio
 import logging
 import os
+from collections import deque
+from async_database import adb
+from chain_events import CONTRACT_DEPLOYED
+from utils.broadcast import fan_out
 
 logger = logging.getLogger('thronos_bot.evm')
 
+# Addresses remembered beyond the watermark, to de-duplicate contracts that
+# share its block/timestamp; this bounds memory and the seen-contracts table.
+RECENT_WINDOW = 512
+# Most contracts announced in one tick, e.g. after downtime; the rest are skipped
+MAX_ANNOUNCEMENTS = max(1, int(os.getenv("EVM_MAX_ANNOUNCEMENTS", "10")))
+# The poll interval adapts between these: shorter while deployments arrive
+POLL_MIN_SECONDS = max(5.0, float(os.getenv("EVM_POLL_MIN_SECONDS", "60")))
+POLL_MAX_SECONDS = max(POLL_MIN_SECONDS, float(os.getenv("EVM_POLL_MAX_SECONDS", "900")))
+
+
+def contract_position(contract):
+    """Sort key for a contract: its block, then its creation timestamp (both optional)."""
+    block = contract.get("block_number", contract.get("block"))
+    try:
+        block = int(block) if block is not None else None
+    except (TypeError, ValueError):
+        block = None
+    return (-1 if block is None else block, contract.get("created_at") or "")
+
+
 class EVMWatcher(commands.Cog):
     """Monitors Thronos EVM subnet for new contract deployments."""
-    
+
     def __init__(self, bot):
         self.bot = bot
-        raw_url = os.getenv("THRONOS_API_URL", "https://api.thronoschain.org/api").rstrip("/")
-        self.base_url = raw_url if raw_url.endswith("/api") else f"{raw_url}/api"
-        self.seen_contracts = set()
-        self.first_run = True
+        # Loaded from SQLite on the first tick; None until a cursor exists
+        self.watermark = None
+        self.recent = deque(maxlen=RECENT_WINDOW)
+        self._recent_set = set()
+        self.cursor_loaded = False
+        # Serialises pushed and polled batches against the shared watermark
+        self.lock = asyncio.Lock()
+        self.events = bot.chain_events
+        self.events.bus.subscribe(CONTRACT_DEPLOYED, self.on_contract_deployed)
+        self.poller = bot.api.poller("/evm/latest_contracts", min_interval=POLL_MIN_SECONDS,
+                                     max_interval=POLL_MAX_SECONDS)
         self.watch_evm.start()
-    
+
     def cog_unload(self):
         self.watch_evm.cancel()
-        
-    @tasks.loop(minutes=15)
+        self.events.bus.unsubscribe(CONTRACT_DEPLOYED, self.on_contract_deployed)
+
+    def _remember(self, address):
+        if address in self._recent_set:
+            return
+        if len(self.recent) == self.recent.maxlen:
+            self._recent_set.discard(self.recent[0])
+        self.recent.append(address)
+        self._recent_set.add(address)
+
+    async def load_cursor(self):
+        cursor = await adb.get_evm_cursor(RECENT_WINDOW)
+        if cursor is not None:
+            last_block, last_created_at, addresses = cursor
+            self.watermark = (-1 if last_block is None else last_block, last_created_at or "")
+            for address in addresses:
+                self._remember(address)
+        self.cursor_loaded = True
+
+    def select_new(self, contracts):
+        """Return ``(unseen, announce)`` for one poll, oldest first.
+
+        A contract is unseen when its address is not in the recent window and
+        it does not sort before the watermark. Only the newest
+        ``MAX_ANNOUNCEMENTS`` of those are announced.
+        """
+        floor = self.watermark or (-1, "")
+        unseen = sorted(
+            (c for c in contracts
+             if c.get("address") and c["address"] not in self._recent_set
+             and contract_position(c) >= floor),
+            key=contract_position)
+        return unseen, unseen[-MAX_ANNOUNCEMENTS:]
+
+    async def advance(self, contracts):
+        positions = [contract_position(c) for c in contracts if c.get("address")]
+        if positions:
+            self.watermark = max([*positions, self.watermark or (-1, "")])
+        addresses = [c["address"] for c in sorted(contracts, key=contract_position) if c.get("address")]
+        for address in addresses:
+            self._remember(address)
+        block, created_at = self.watermark or (-1, "")
+        await adb.save_evm_cursor(None if block < 0 else block, created_at or None,
+                                  addresses, RECENT_WINDOW)
+
+    async def on_contract_deployed(self, event):
+        """Announce a contract pushed by the chain event stream straight away."""
+        try:
+            await self.process([event.data], pushed=True)
+        except Exception as e:
+            logger.error(f"EVM Watcher event error: {e}")
+
+    async def seed(self, exclude):
+        """Record the current contract list, minus ``exclude``, as already known."""
+        _, data = await self.poller.poll()
+        if isinstance(data, dict):
+            await self.advance([c for c in data.get("contracts", []) if c.get("address") not in exclude])
+
+    @tasks.loop(seconds=POLL_MIN_SECONDS)
     async def watch_evm(self):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/evm/latest_contracts", timeout=10) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        contracts = data.get("contracts", [])
-                        
-                        if self.first_run:
-                            # On first run, populate the seen set without announcing
-                            for contract in contracts:
-                                addr = contract.get("address", "")
-                                if addr:
-                                    self.seen_contracts.add(addr)
-                            self.first_run = False
-                            logger.info(f"EVM Watcher initialized with {len(self.seen_contracts)} known contracts")
-                            return
-                        
-                        # Only announce genuinely new contracts
-                        new_contracts = []
-                        for contract in contracts:
-                            addr = contract.get("address", "")
-                            if addr and addr not in self.seen_contracts:
-                                self.seen_contracts.add(addr)
-                                new_contracts.append(contract)
-                        
-                        if new_contracts:
-                            for guild in self.bot.guilds:
-                                channel = discord.utils.get(guild.text_channels, name="smart-contracts")
-                                if channel:
-                                    for contract in new_contracts:
-                                        embed = discord.Embed(
-                                            title="📜 New EVM Contract Deployed!",
-                                            description=f"Address: `{contract.get('address', 'Unknown')}`",
-                                            color=0xe67e22
-                                        )
-                                        embed.add_field(name="Deployer", value=f"`{contract.get('deployer', 'Unknown')}`")
-                                        if contract.get("created_at"):
-                                            embed.add_field(name="Deployed", value=contract["created_at"], inline=True)
-                                        if contract.get("balance") is not None:
-                                            embed.add_field(name="Balance", value=f"`{contract['balance']}` THR", inline=True)
-                                        await channel.send(embed=embed)
-                            logger.info(f"Announced {len(new_contracts)} new contract(s)")
+            changed, data = await self.poller.poll()
+            # While the stream is live it delivers deployments; polling stays
+            # on at the slowest interval in case it connects but goes quiet.
+            self.watch_evm.change_interval(
+                seconds=self.poller.max_interval if self.events.live else self.poller.interval)
+            # A 304 or byte-identical list cannot hold a new contract
+            if not changed or not isinstance(data, dict):
+                return
+            await self.process(data.get("contracts", []))
         except Exception as e:
             logger.error(f"EVM Watcher error: {e}")
-            
+
+    async def process(self, contracts, pushed=False):
+        """Announce what is new in a polled or pushed batch and advance the cursor."""
+        async with self.lock:
+            if not self.cursor_loaded:
+                await self.load_cursor()
+
+            if self.watermark is None and pushed:
+                # Seed from a snapshot so a pushed deployment is announced, not absorbed
+                await self.seed({c.get("address") for c in contracts})
+
+            if self.watermark is None and not pushed:
+                # A fresh install records what exists without announcing it
+                await self.advance(contracts)
+                logger.info(f"EVM Watcher initialized with {len(self.recent)} known contracts")
+                return
+
+            unseen, announce = self.select_new(contracts)
+            if not unseen:
+                return
+            if len(unseen) > len(announce):
+                logger.info(f"Skipping {len(unseen) - len(announce)} older missed contract(s) over the announcement cap")
+            embeds = [self.contract_embed(contract) for contract in announce]
+            result = await fan_out(self.bot.guilds, lambda guild: self.announce(guild, embeds))
+            # Saved after announcing: a crash in between repeats rather than loses them
+            await self.advance(unseen)
+            logger.info(f"Announced {len(announce)} new contract(s): {result.summary()}")
+
+    @staticmethod
+    def contract_embed(contract):
+        embed = discord.Embed(
+            title="📜 New EVM Contract Deployed!",
+            description=f"Address: `{contract.get('address', 'Unknown')}`",
+            color=0xe67e22
+        )
+        embed.add_field(name="Deployer", value=f"`{contract.get('deployer', 'Unknown')}`")
+        if contract.get("created_at"):
+            embed.add_field(name="Deployed", value=contract["created_at"], inline=True)
+        if contract.get("balance") is not None:
+            embed.add_field(name="Balance", value=f"`{contract['balance']}` THR", inline=True)
+        return embed
+
+    async def announce(self, guild, embeds):
+        channel = self.bot.guild_index.text_channel(guild, "smart-contracts")
+        if not channel:
+            return False
+        for embed in embeds:
+            await channel.send(embed=embed)
+        return True
+
     @watch_evm.before_loop
     async def before_watch(self):
         await self.bot.wait_until_ready()
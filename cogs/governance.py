@@ -1,9 +1,14 @@
 import discord
 from discord.ext import commands
 import logging
-import database as db
+import os
+from collections import OrderedDict
+from async_database import adb
+from refresh_scheduler import RefreshScheduler
 
 logger = logging.getLogger('thronos_bot.governance')
+REFRESH_INTERVAL_SECONDS = float(os.getenv("GOVERNANCE_REFRESH_SECONDS", "2"))
+MESSAGE_CACHE_SIZE = 256
 
 class Governance(commands.Cog):
     """Interactive DAO voting with persistent storage."""
@@ -11,12 +16,38 @@ class Governance(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.bot.add_view(PersistentVotingView(self))
+        # Vote bursts collapse into one embed edit per proposal per interval
+        self.refresher = RefreshScheduler(self.update_proposal_embed, REFRESH_INTERVAL_SECONDS)
+        self._messages = OrderedDict()
+        # Newest tally per proposal awaiting a refresh; dropped once rendered
+        self._tallies = {}
+    
+    async def cog_unload(self):
+        await self.refresher.close()
+    
+    def remember_message(self, proposal_id, message):
+        """Cache the proposal message so refreshes skip ``fetch_message``."""
+        if message is None:
+            return
+        self._messages[proposal_id] = message
+        self._messages.move_to_end(proposal_id)
+        while len(self._messages) > MESSAGE_CACHE_SIZE:
+            self._messages.popitem(last=False)
+    
+    def schedule_refresh(self, proposal):
+        """Queue an embed refresh; the tally with the most votes is the newest."""
+        proposal_id = proposal["id"]
+        current = self._tallies.get(proposal_id)
+        if current is None or (proposal["votes_yes"] + proposal["votes_no"]
+                               >= current["votes_yes"] + current["votes_no"]):
+            self._tallies[proposal_id] = proposal
+        self.refresher.request(proposal_id)
     
     @commands.hybrid_command(name="propose", description="Create a new governance proposal (Admin only)")
     @commands.has_permissions(administrator=True)
     async def propose_command(self, ctx: commands.Context, title: str, *, description: str):
         """Create a new proposal for voting."""
-        governance_channel = discord.utils.get(ctx.guild.text_channels, name="governance")
+        governance_channel = self.bot.guild_index.text_channel(ctx.guild, "governance")
         
         if not governance_channel:
             await ctx.reply("❌ Governance channel not found.", ephemeral=True)
@@ -37,7 +68,7 @@ class Governance(commands.Cog):
         message = await governance_channel.send(embed=embed, view=view)
         
         # Store in database
-        proposal_id = db.create_proposal(
+        proposal_id = await adb.create_proposal(
             title=title,
             description=description,
             author_id=ctx.author.id,
@@ -49,7 +80,8 @@ class Governance(commands.Cog):
         # Update embed with real ID
         embed.title = f"🏛️ Proposal #{proposal_id}: {title}"
         view = PersistentVotingView(self, proposal_id=proposal_id)
-        await message.edit(embed=embed, view=view)
+        message = await message.edit(embed=embed, view=view)
+        self.remember_message(proposal_id, message)
         
         await ctx.reply(f"✅ Proposal #{proposal_id} created!", ephemeral=True)
         logger.info(f"{ctx.author} created proposal #{proposal_id}: {title}")
@@ -57,7 +89,7 @@ class Governance(commands.Cog):
     @commands.hybrid_command(name="proposals", description="List all proposals")
     async def proposals_command(self, ctx: commands.Context):
         """List all governance proposals."""
-        proposals = db.get_all_proposals()
+        proposals = await adb.get_all_proposals()
         
         if not proposals:
             await ctx.reply("No proposals found.", ephemeral=True)
@@ -80,21 +112,29 @@ class Governance(commands.Cog):
     
     async def update_proposal_embed(self, proposal_id):
         """Update the proposal embed with current vote counts."""
-        proposal = db.get_proposal(proposal_id)
+        proposal = self._tallies.get(proposal_id) or await adb.get_proposal(proposal_id)
         if not proposal:
             return
         
         try:
-            channel = self.bot.get_channel(proposal["channel_id"])
-            message = await channel.fetch_message(proposal["message_id"])
+            message = self._messages.get(proposal_id)
+            if message is None:
+                channel = self.bot.get_channel(proposal["channel_id"])
+                message = await channel.fetch_message(proposal["message_id"])
             
             embed = message.embeds[0]
             embed.set_field_at(0, name="✅ For", value=f"{proposal['votes_yes']} votes", inline=True)
             embed.set_field_at(1, name="❌ Against", value=f"{proposal['votes_no']} votes", inline=True)
             
-            await message.edit(embed=embed)
+            self.remember_message(proposal_id, await message.edit(embed=embed))
         except Exception as e:
+            # A stale cached message (deleted, moved) is re-fetched next time
+            self._messages.pop(proposal_id, None)
             logger.error(f"Error updating proposal embed: {e}")
+        finally:
+            # Keep a tally that arrived during the edit for the trailing refresh
+            if self._tallies.get(proposal_id) is proposal:
+                del self._tallies[proposal_id]
 
 
 class PersistentVotingView(discord.ui.View):
@@ -113,39 +153,36 @@ class PersistentVotingView(discord.ui.View):
     async def vote_no(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.register_vote(interaction, "no")
     
+    @staticmethod
+    def proposal_id_for(message):
+        """Read the proposal id from the embed title ("🏛️ Proposal #12: ..."), or ``None``."""
+        try:
+            title = message.embeds[0].title
+            return int(title.split("#")[1].split(":")[0])
+        except (AttributeError, IndexError, TypeError, ValueError):
+            return None
+    
     async def register_vote(self, interaction: discord.Interaction, vote_type: str):
         """Register a user's vote in the database."""
-        # Get proposal_id from message embed title
-        if self.proposal_id == 0:
-            try:
-                title = interaction.message.embeds[0].title
-                self.proposal_id = int(title.split("#")[1].split(":")[0])
-            except:
-                await interaction.response.send_message("❌ Could not identify proposal.", ephemeral=True)
-                return
+        # The persistent view is shared by every proposal message, so the id
+        # comes from the clicked message rather than from view state.
+        proposal_id = self.proposal_id_for(interaction.message) or self.proposal_id
+        if not proposal_id:
+            await interaction.response.send_message("❌ Could not identify proposal.", ephemeral=True)
+            return
         
-        proposal = db.get_proposal(self.proposal_id)
-        if not proposal:
+        status, proposal = await adb.cast_vote(proposal_id, interaction.user.id, vote_type)
+        if status == "missing":
             await interaction.response.send_message("❌ Proposal not found.", ephemeral=True)
             return
-        
-        user_id = interaction.user.id
-        
-        if db.has_voted(self.proposal_id, user_id):
+        if status == "duplicate":
             await interaction.response.send_message("❌ You have already voted.", ephemeral=True)
             return
         
-        # Register vote
-        if db.add_vote(self.proposal_id, user_id, vote_type):
-            votes_yes = proposal['votes_yes'] + (1 if vote_type == "yes" else 0)
-            votes_no = proposal['votes_no'] + (1 if vote_type == "no" else 0)
-            db.update_proposal_votes(self.proposal_id, votes_yes, votes_no)
-            
-            await self.cog.update_proposal_embed(self.proposal_id)
-            await interaction.response.send_message("✅ Vote recorded!", ephemeral=True)
-            logger.info(f"{interaction.user} voted {vote_type} on proposal #{self.proposal_id}")
-        else:
-            await interaction.response.send_message("❌ Vote failed.", ephemeral=True)
+        self.cog.remember_message(proposal_id, interaction.message)
+        self.cog.schedule_refresh(proposal)
+        await interaction.response.send_message("✅ Vote recorded!", ephemeral=True)
+        logger.info(f"{interaction.user} voted {vote_type} on proposal #{proposal_id}")
 
 
 async def setup(bot):
@@ -30,7 +30,7 @@ class LanguageView(discord.ui.View):
 
         # Add new language role
         role_name = LANGUAGE_ROLES[lang_code]
-        role = discord.utils.get(guild.roles, name=role_name)
+        role = interaction.client.guild_index.role(guild, role_name)
         
         if not role:
              # Auto-create the role if it doesn't exist
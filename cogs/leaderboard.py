@@ -1,7 +1,12 @@
 import discord
 from discord.ext import commands, tasks
+import asyncio
 import logging
-import database as db
+from typing import Literal
+import database
+from async_database import adb
+from leaderboard_rank import RankIndex
+from xp_buffer import XPBuffer
 
 logger = logging.getLogger('thronos_bot.leaderboard')
 
@@ -10,6 +15,50 @@ class Leaderboard(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        self.buffer = XPBuffer()
+        self.ranking = RankIndex()
+        self._flush_task = None
+        self.flush_buffer.change_interval(seconds=self.buffer.config.flush_interval_seconds)
+        self.flush_buffer.start()
+        self.compact_rollups.start()
+    
+    async def cog_load(self):
+        """Rebuild the in-memory ranking from SQLite before serving commands."""
+        try:
+            self.ranking.reconcile(await adb.run_read(database.get_all_user_stats))
+        except Exception as e:
+            logger.error(f"Error loading leaderboard ranking: {e}")
+    
+    async def cog_unload(self):
+        self.flush_buffer.cancel()
+        self.compact_rollups.cancel()
+        await self.flush()
+    
+    async def flush(self):
+        """Commit buffered XP, then apply the same rows to the ranking."""
+        self.ranking.apply(await self.buffer.flush())
+    
+    @tasks.loop(seconds=10)
+    async def flush_buffer(self):
+        """Write buffered XP; the interval bounds what a crash can lose."""
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing leaderboard buffer: {e}")
+    
+    @tasks.loop(hours=6)
+    async def compact_rollups(self):
+        """Fold aged hour/day activity buckets into coarser ones."""
+        try:
+            hours, days = await adb.run_write(database.compact_activity_rollups)
+            logger.info(f"Compacted {hours} hourly and {days} daily activity buckets")
+        except Exception as e:
+            logger.error(f"Error compacting activity rollups: {e}")
+    
+    def _track(self, user, guild, **counts):
+        due = self.buffer.add(user.id, str(user), guild_id=guild.id if guild else None, **counts)
+        if due and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush_buffer())
     
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -17,11 +66,7 @@ class Leaderboard(commands.Cog):
         if message.author.bot:
             return
         
-        db.update_user_stats(
-            user_id=message.author.id,
-            username=str(message.author),
-            messages=1
-        )
+        self._track(message.author, message.guild, messages=1)
     
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction, user):
@@ -29,23 +74,46 @@ class Leaderboard(commands.Cog):
         if user.bot:
             return
         
-        db.update_user_stats(
-            user_id=user.id,
-            username=str(user),
-            reactions=1
-        )
+        self._track(user, reaction.message.guild, reactions=1)
     
     @commands.hybrid_command(name="leaderboard", description="Show top community members")
-    async def leaderboard_command(self, ctx: commands.Context):
-        """Display the server leaderboard."""
-        top_users = db.get_leaderboard(10)
+    async def leaderboard_command(
+        self,
+        ctx: commands.Context,
+        scope: Literal["global", "guild"] = "global",
+        period: Literal["all", "day", "week", "month"] = "all",
+    ):
+        """Display the leaderboard, optionally for this server or a recent period."""
+        if scope == "guild" and ctx.guild is None:
+            await ctx.reply("Server leaderboards are only available inside a server.", ephemeral=True)
+            return
+        
+        # A failed flush stays queued; answer from what is already committed
+        await self.flush_buffer()
+        if scope == "global" and period == "all":
+            if self.ranking.loaded:
+                top_users = self.ranking.top(10)
+            else:
+                top_users = await adb.get_leaderboard(10)
+        else:
+            # Windowed and per-server boards are served from the activity rollups.
+            since = database.activity_period_start(period) if period != "all" else ""
+            top_users = await adb.run_read(
+                database.get_activity_leaderboard, since,
+                ctx.guild.id if scope == "guild" else None, 10
+            )
         
         if not top_users:
             await ctx.reply("No leaderboard data yet. Start chatting to earn XP!", ephemeral=True)
             return
         
+        title = "🏆 Community Leaderboard"
+        if scope == "guild":
+            title = f"🏆 {ctx.guild.name} Leaderboard"
+        if period != "all":
+            title += f" — this {period}"
         embed = discord.Embed(
-            title="🏆 Community Leaderboard",
+            title=title,
             description="Top contributors based on engagement",
             color=0xf1c40f
         )
@@ -65,7 +133,11 @@ class Leaderboard(commands.Cog):
     @commands.hybrid_command(name="rank", description="Show your rank and stats")
     async def rank_command(self, ctx: commands.Context):
         """Display user's current rank and stats."""
-        rank, user_stats = db.get_user_rank(ctx.author.id)
+        await self.flush_buffer()
+        rank, user_stats = self.ranking.rank(ctx.author.id)
+        if not user_stats:
+            # Rows created outside the XP path (e.g. wallet binding) are not indexed yet.
+            rank, user_stats = await adb.get_user_rank(ctx.author.id)
         
         if not user_stats:
             await ctx.reply("You haven't earned any XP yet. Start chatting!", ephemeral=True)
@@ -1,77 +1,167 @@
 import discord
 from discord.ext import commands, tasks
-import aiohttp
+import asyncio
+import io
 import logging
 import os
+import time
+from typing import Literal
+from chain_events import EVENT_ENDPOINTS, NETWORK_STATS, PRICE
+from charts import CHART_WINDOWS, FALLING, RISING, ChartCache, bucket_end, thin
+from refresh_scheduler import RefreshScheduler
+from thronos_api import CACHE_TTLS
+from utils.broadcast import fan_out
+from utils.message_registry import upsert_message
 
 logger = logging.getLogger('thronos_bot.network_stats')
 
+# Endpoints behind the stats embed and the section each one feeds
+STATS_SECTIONS = {
+    "/network_stats": "network",
+    "/token/prices": "price",
+    "/health": "health",
+    "/dashboard": "dashboard",
+    "/tokens/stats": "holders",
+}
+STATS_DEADLINE_SECONDS = float(os.getenv("NETWORK_STATS_DEADLINE_SECONDS", "4"))
+DAY_SECONDS = 86400
+# Points handed to the renderer; more would not show at the chart's width
+CHART_POINTS = 240
+# How long a request waits for another request's upload of the same chart
+CHART_UPLOAD_WAIT_SECONDS = 10
+ChartWindow = Literal["none", "1h", "24h", "7d", "30d"]
+
+
+def trend_label(summary, label, window):
+    """``label`` when the history covers the window, otherwise how much it does cover."""
+    if summary["span_seconds"] >= window * 0.9:
+        return label
+    return f"{summary['span_seconds'] / 3600:.1f}h"
+
+
+def format_change(summary):
+    """Percent change with a direction arrow, or ``None`` without enough history."""
+    if summary is None or summary["percent"] is None:
+        return None
+    arrow = "▲" if summary["change"] > 0 else "▼" if summary["change"] < 0 else "▬"
+    return f"{arrow} {summary['percent']:+.2f}%"
+
+
 class NetworkStats(commands.Cog):
     """Fetches and displays real-time network statistics from the Thronos API."""
     
     def __init__(self, bot):
         self.bot = bot
-        raw_url = os.getenv("THRONOS_API_URL", "https://api.thronoschain.org/api").rstrip("/")
-        self.base_url = raw_url if raw_url.endswith("/api") else f"{raw_url}/api"
+        self.last_tick = {}
+        self.events = bot.chain_events
+        # Pushed snapshots refresh the embed between the 5-minute polls
+        self.refresher = RefreshScheduler(self.refresh_stats, self.events.config.min_refresh_seconds)
+        self.charts = ChartCache()
+        self.events.bus.subscribe(NETWORK_STATS, self.on_chain_event)
+        self.events.bus.subscribe(PRICE, self.on_chain_event)
         self.update_stats.start()
     
-    def cog_unload(self):
+    async def cog_unload(self):
         self.update_stats.cancel()
+        self.events.bus.unsubscribe(NETWORK_STATS, self.on_chain_event)
+        self.events.bus.unsubscribe(PRICE, self.on_chain_event)
+        await self.refresher.close()
+        await self.charts.close()
+    
+    async def on_chain_event(self, event):
+        """Seed the response cache with the pushed body and schedule a refresh."""
+        self.bot.api.cache.put(EVENT_ENDPOINTS[event.type], event.data)
+        self.refresher.request("stats")
     
     async def fetch_api(self, endpoint):
-        """Helper to fetch data from API endpoints."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}{endpoint}", timeout=10) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.warning(f"API {endpoint} returned status {response.status}")
-                        return None
-        except Exception as e:
-            logger.error(f"Error fetching {endpoint}: {e}")
-            return None
+        """Helper to fetch data from API endpoints via the shared response cache."""
+        return await self.bot.api.get_cached(endpoint)
     
     @tasks.loop(minutes=5)
     async def update_stats(self):
         """Background task to update network stats every 5 minutes."""
+        await self.refresh_stats()
+    
+    async def refresh_stats(self, key=None):
+        """Render the stats embed once and deliver it to every guild."""
         try:
-            for guild in self.bot.guilds:
-                channel = discord.utils.get(guild.text_channels, name="network-stats")
-                if channel:
-                    embed = await self.generate_stats_embed()
-                    if embed:
-                        # Update existing message or create new one
-                        last_msg = None
-                        async for message in channel.history(limit=5):
-                            if message.author == self.bot.user and message.embeds:
-                                last_msg = message
-                                break
-                        
-                        if last_msg:
-                            await last_msg.edit(embed=embed)
-                        else:
-                            await channel.send(embed=embed)
-                        
-                        logger.info(f"Updated network stats in {guild.name}")
+            # Fetch and render once per tick, then deliver the same embed everywhere
+            started = time.perf_counter()
+            data, stale = await self.fetch_stats_data()
+            fetched = time.perf_counter()
+            embed = self.build_stats_embed(data, stale)
+            rendered = time.perf_counter()
+            tick = {"fetch_seconds": round(fetched - started, 4),
+                    "render_seconds": round(rendered - fetched, 4)}
+            if embed:
+                result = await fan_out(self.bot.guilds, lambda guild: self.deliver_stats(guild, embed))
+                tick.update(result.summary())
+            self.last_tick = tick
+            logger.info(f"Network stats tick: {tick}")
         except Exception as e:
             logger.error(f"Error in update_stats task: {e}")
     
+    async def deliver_stats(self, guild, embed):
+        """Edit the bot's stats message in #network-stats or post a new one."""
+        channel = self.bot.guild_index.text_channel(guild, "network-stats")
+        if not channel:
+            return False
+        
+        await upsert_message(self.bot, channel, scan_limit=5, embed=embed)
+        return True
+    
     @update_stats.before_loop
     async def before_update_stats(self):
         await self.bot.wait_until_ready()
     
+    async def fetch_stats_data(self, deadline=None):
+        """Fetch every stats endpoint concurrently within one overall deadline.
+        
+        Returns ``(data, stale)``. Endpoints that miss the deadline or fail fall
+        back to the last cached body and are listed in ``stale``, as are cached
+        bodies older than their TTL; late fetches keep running to warm the cache.
+        """
+        cache = self.bot.api.cache
+        started = cache.clock()
+        fetches = {endpoint: asyncio.ensure_future(self.fetch_api(endpoint)) for endpoint in STATS_SECTIONS}
+        done, _ = await asyncio.wait(fetches.values(), timeout=deadline or STATS_DEADLINE_SECONDS)
+        data, stale = {}, []
+        for endpoint, fetch in fetches.items():
+            value = fetch.result() if fetch in done else None
+            cached, age = cache.peek(endpoint)
+            if value is None:
+                value = cached
+                if cached is not None:
+                    stale.append(endpoint)
+            elif cached is value and age is not None and age > CACHE_TTLS.get(endpoint, 0):
+                stale.append(endpoint)
+            # Only bodies fetched during this call are new samples; a fresh-TTL
+            # hit would re-record an old value under a new timestamp.
+            if cached is value and age is not None and cache.clock() - age >= started:
+                self.bot.timeseries.observe(endpoint, value)
+            data[endpoint] = value
+        return data, stale
+    
     async def generate_stats_embed(self):
         """Generate the stats embed from API data."""
-        network_data = await self.fetch_api("/network_stats")
-        prices_data = await self.fetch_api("/token/prices")
-        health_data = await self.fetch_api("/health")
-        dashboard_data = await self.fetch_api("/dashboard")
-        tokens_data = await self.fetch_api("/tokens/stats")
+        data, stale = await self.fetch_stats_data()
+        return self.build_stats_embed(data, stale)
+    
+    def build_stats_embed(self, data, stale=()):
+        """Render the stats embed from ``fetch_stats_data`` results."""
+        if all(value is None for value in data.values()):
+            logger.error("No network stats endpoint answered before the deadline")
+            return None
+        
+        network_data = data.get("/network_stats")
+        prices_data = data.get("/token/prices")
+        health_data = data.get("/health")
+        dashboard_data = data.get("/dashboard")
+        tokens_data = data.get("/tokens/stats")
         
         if not isinstance(network_data, dict):
-            logger.error(f"network_data is not a dict: {type(network_data)}")
-            return None
+            logger.warning(f"network_data is not a dict: {type(network_data)}")
+            network_data = {}
         
         embed = discord.Embed(
             title="📊 Live Network Statistics",
@@ -181,14 +271,76 @@ class NetworkStats(commands.Cog):
                 inline=True
             )
         
-        embed.set_footer(text="Updates every 5 minutes")
+        trends = self.trend_lines()
+        if trends:
+            embed.add_field(name="📈 Trends", value="\n".join(trends), inline=False)
+        
+        footer = "Updates every 5 minutes"
+        if stale:
+            footer += " • Stale: " + ", ".join(STATS_SECTIONS[endpoint] for endpoint in stale)
+        missing = [STATS_SECTIONS[endpoint] for endpoint, value in data.items() if value is None]
+        if missing:
+            footer += " • Unavailable: " + ", ".join(missing)
+        embed.set_footer(text=footer)
         embed.timestamp = discord.utils.utcnow()
         
         return embed
     
+    def trend_lines(self):
+        """24h price change and chain growth rates from locally stored samples."""
+        series = self.bot.timeseries
+        lines = []
+        price = series.summary("thr_usd", DAY_SECONDS)
+        change = format_change(price)
+        if change:
+            lines.append(f"THR ({trend_label(price, '24h', DAY_SECONDS)}): `{change}`")
+        for metric, noun in (("tx_count", "transactions"), ("block_height", "blocks")):
+            summary = series.summary(metric, DAY_SECONDS)
+            if summary and summary["per_hour"] is not None:
+                lines.append(f"{noun.capitalize()} ({trend_label(summary, '24h', DAY_SECONDS)}): "
+                             f"`{summary['change']:+,.0f}` ({summary['per_hour']:,.1f}/h)")
+        tps = series.summary("tps", DAY_SECONDS)
+        if tps:
+            lines.append(f"Peak TPS ({trend_label(tps, '24h', DAY_SECONDS)}): `{tps['high']:.4f}`")
+        return lines
+
+    async def reply_with_chart(self, ctx, embed, metric, window):
+        """Reply with ``embed``, attaching a chart of ``metric`` unless ``window`` is "none".
+        
+        The first request in a chart bucket uploads the PNG; concurrent and
+        later ones in the same bucket embed that upload's URL instead.
+        """
+        if window == "none":
+            return await ctx.reply(embed=embed)
+        now = time.time()
+        rows = self.bot.timeseries.series[metric].rows(now - CHART_WINDOWS[window][0])
+        if len(rows) < 2:
+            embed.add_field(name="📉 Chart", value=f"Not enough {window} history yet.", inline=False)
+            return await ctx.reply(embed=embed)
+        points = thin([(row[0], row[1]) for row in rows], CHART_POINTS)
+        color = RISING if points[-1][1] >= points[0][1] else FALLING
+        entry, uploader = await self.charts.get((metric, window, bucket_end(window, now)), points, color=color)
+        if not uploader:
+            try:
+                url = await asyncio.wait_for(asyncio.shield(entry.url), CHART_UPLOAD_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                url = None
+            if url:
+                embed.set_image(url=url)
+                return await ctx.reply(embed=embed)
+        embed.set_image(url="attachment://chart.png")
+        message = None
+        try:
+            message = await ctx.reply(embed=embed, file=discord.File(io.BytesIO(entry.png), filename="chart.png"))
+        finally:
+            if uploader:
+                attachments = getattr(message, "attachments", None)
+                self.charts.uploaded(entry, attachments[0].url if attachments else None)
+        return message
+
     @commands.hybrid_command(name="stats", description="Show current network statistics")
-    async def stats_command(self, ctx: commands.Context):
-        """Manual command to fetch latest stats."""
+    async def stats_command(self, ctx: commands.Context, chart: ChartWindow = "none"):
+        """Manual command to fetch latest stats, optionally with a transaction chart."""
         logger.info(f"Stats command triggered by {ctx.author}")
         
         try:
@@ -196,7 +348,7 @@ class NetworkStats(commands.Cog):
             embed = await self.generate_stats_embed()
             
             if embed:
-                await ctx.reply(embed=embed)
+                await self.reply_with_chart(ctx, embed, "tx_count", chart)
             else:
                 await ctx.reply("❌ Failed to fetch network statistics. API might be down.")
                 
@@ -272,8 +424,8 @@ class NetworkStats(commands.Cog):
                 pass
 
     @commands.hybrid_command(name="price", description="Show THR token price")
-    async def price_command(self, ctx: commands.Context):
-        """Quick THR price check."""
+    async def price_command(self, ctx: commands.Context, chart: ChartWindow = "none"):
+        """Quick THR price check, optionally with a price chart."""
         try:
             await ctx.defer()
             prices_data = await self.fetch_api("/token/prices")
@@ -298,11 +450,12 @@ class NetworkStats(commands.Cog):
                 if isinstance(thr_price, (int, float)) and thr_price > 0:
                     thr_btc = thr_price / wbtc_price
                     embed.add_field(name="THR/BTC", value=f"`{thr_btc:.10f}`", inline=True)
+            self.add_price_trends(embed)
             
             embed.set_footer(text=f"Updated: {updated}")
             embed.timestamp = discord.utils.utcnow()
             
-            await ctx.reply(embed=embed)
+            await self.reply_with_chart(ctx, embed, "thr_usd", chart)
             
         except Exception as e:
             logger.error(f"Error in price_command: {e}", exc_info=True)
@@ -311,5 +464,22 @@ class NetworkStats(commands.Cog):
             except:
                 pass
 
+    def add_price_trends(self, embed):
+        """1h/24h change and the 24h range, from samples the bot already holds."""
+        series = self.bot.timeseries
+        for metric, name in (("thr_usd", "THR"), ("wbtc_usd", "WBTC")):
+            changes = []
+            for label, window in (("1h", 3600), ("24h", DAY_SECONDS)):
+                summary = series.summary(metric, window)
+                change = format_change(summary)
+                if change:
+                    changes.append(f"{trend_label(summary, label, window)}: `{change}`")
+            if changes:
+                embed.add_field(name=f"{name} Change", value="\n".join(changes), inline=True)
+        day = series.summary("thr_usd", DAY_SECONDS)
+        if day:
+            embed.add_field(name=f"THR Range ({trend_label(day, '24h', DAY_SECONDS)})",
+                            value=f"`${day['low']:.6f}` – `${day['high']:.6f}`", inline=True)
+
 async def setup(bot):
     await bot.add_cog(NetworkStats(bot))
@@ -1,8 +1,6 @@
 import discord
 from discord.ext import commands, tasks
-import aiohttp
 import logging
-import os
 
 logger = logging.getLogger('thronos_bot.nft_gallery')
 
@@ -11,8 +9,6 @@ class NFTGallery(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        raw_url = os.getenv("THRONOS_API_URL", "https://api.thronoschain.org/api").rstrip("/")
-        self.base_url = raw_url if raw_url.endswith("/api") else f"{raw_url}/api"
     
     @commands.hybrid_command(name="tokens", description="Show all tokens on the network")
     async def tokens_command(self, ctx: commands.Context):
@@ -20,15 +16,12 @@ class NFTGallery(commands.Cog):
         await ctx.defer()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/tokens/list", timeout=10) as resp:
-                    if resp.status != 200:
-                        await ctx.reply("❌ Failed to fetch tokens.", ephemeral=True)
-                        return
-                    tokens_resp = await resp.json()
-                
-                async with session.get(f"{self.base_url}/tokens/stats", timeout=10) as resp:
-                    stats_resp = await resp.json() if resp.status == 200 else {}
+            tokens_resp = await self.bot.api.get_cached("/tokens/list")
+            if tokens_resp is None:
+                await ctx.reply("❌ Failed to fetch tokens.", ephemeral=True)
+                return
+            
+            stats_resp = await self.bot.api.get_cached("/tokens/stats") or {}
             
             # Unwrap the dict responses
             tokens = tokens_resp.get("tokens", []) if isinstance(tokens_resp, dict) else tokens_resp
@@ -85,15 +78,12 @@ class NFTGallery(commands.Cog):
         await ctx.defer()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/tokens/list", timeout=10) as resp:
-                    if resp.status != 200:
-                        await ctx.reply("❌ Failed to fetch tokens.", ephemeral=True)
-                        return
-                    tokens_resp = await resp.json()
-                
-                async with session.get(f"{self.base_url}/tokens/stats", timeout=10) as resp:
-                    stats_resp = await resp.json() if resp.status == 200 else {}
+            tokens_resp = await self.bot.api.get_cached("/tokens/list")
+            if tokens_resp is None:
+                await ctx.reply("❌ Failed to fetch tokens.", ephemeral=True)
+                return
+            
+            stats_resp = await self.bot.api.get_cached("/tokens/stats") or {}
             
             # Unwrap the dict responses
             tokens = tokens_resp.get("tokens", []) if isinstance(tokens_resp, dict) else tokens_resp
@@ -1,30 +1,18 @@
 import discord
 from discord.ext import commands
 import logging
-from aiohttp import web
-import asyncio
-import hashlib
-import hmac
 import html
-import os
 import re
-import time
 from future_btc_signal import (
-    configure_publisher,
-    handle_request as handle_future_btc_signal,
+    OUTBOX_KIND as FREE_BTC_SIGNAL_KIND,
+    deliver_queued as deliver_free_btc_signal,
 )
-from promotion import health_handler as promotion_health_handler
+import outbox
+from async_database import adb
+from webhook_server import ALERT_BATCH_KIND, ALERT_KIND, WebhookServer, server_mode
 
 logger = logging.getLogger('thronos_bot.pytheia')
 
-# Allowed values for input validation
-VALID_SIGNAL_TYPES = {"trade", "alert", "rebalance", "liquidation"}
-VALID_ACTIONS = {"buy", "sell", "swap", "stake", "unstake"}
-
-# Rate limiting: max requests per window
-RATE_LIMIT_MAX = 10
-RATE_LIMIT_WINDOW = 60  # seconds
-
 
 def sanitize_field(value, max_length=200):
     """Sanitize a string value for safe embedding in Discord messages."""
@@ -40,76 +28,34 @@ def sanitize_field(value, max_length=200):
     return value[:max_length]
 
 
-def is_valid_tx_hash(tx_hash):
-    """Validate that a tx_hash looks like a valid hex transaction hash."""
-    return bool(re.match(r'^0x[0-9a-fA-F]{64}$', tx_hash))
-
-
 class PytheiaWebhook(commands.Cog):
     """Listens for Pytheia Autonomous Agent trades and alerts Discord."""
 
     def __init__(self, bot):
         self.bot = bot
-        self.webhook_secret = os.getenv("WEBHOOK_SECRET")
-        self.signal_publisher = configure_publisher(bot)
-        if not self.webhook_secret:
-            logger.warning("WEBHOOK_SECRET not set - webhook endpoint will reject all requests")
-
-        self.app = web.Application()
-        self.app.router.add_post('/pytheia/alert', self.handle_alert)
-        self.app.router.add_post('/sigbalbot/free-btc-signal', handle_future_btc_signal)
-        self.app.router.add_get('/health/community-promotion', promotion_health_handler)
-        self.app.router.add_get('/health/sigbalbot-relay', self.handle_signal_health)
-        self.runner = None
-        self.site = None
-
-        # Rate limiting state: list of timestamps
-        self._request_timestamps = []
+        self.dispatcher = outbox.OutboxDispatcher({
+            ALERT_BATCH_KIND: self.expand_alert,
+            ALERT_KIND: self.deliver_queued_alert,
+            FREE_BTC_SIGNAL_KIND: deliver_free_btc_signal,
+        })
+        self.server = WebhookServer(bot, self.dispatcher)
+        self.signal_publisher = self.server.signal_publisher
 
         # Start the webhook server when cog loads
         self.bot.loop.create_task(self.start_server())
 
     async def start_server(self):
         await self.bot.wait_until_ready()
-        self.runner = web.AppRunner(self.app)
-        await self.runner.setup()
-
-        # Bind to PORT from environment (fallback to 5005) for external Vercel/Railway hosting
-        port = int(os.getenv("PORT", 5005))
-        self.site = web.TCPSite(self.runner, '0.0.0.0', port)
-        await self.site.start()
-        logger.info(f"Pytheia Webhook listening on 0.0.0.0:{port}/pytheia/alert")
-
-    def cog_unload(self):
-        if self.runner:
-            asyncio.create_task(self.runner.cleanup())
-
-    def _verify_signature(self, body: bytes, signature: str) -> bool:
-        """Verify HMAC-SHA256 signature of the request body."""
-        if not self.webhook_secret:
-            return False
-        expected = hmac.new(
-            self.webhook_secret.encode('utf-8'),
-            body,
-            hashlib.sha256
-        ).hexdigest()
-        return hmac.compare_digest(f"sha256={expected}", signature)
-
-    def _check_rate_limit(self) -> bool:
-        """Return True if the request is within rate limits."""
-        now = time.monotonic()
-        # Prune old timestamps outside the window
-        self._request_timestamps = [
-            ts for ts in self._request_timestamps
-            if now - ts < RATE_LIMIT_WINDOW
-        ]
-        if len(self._request_timestamps) >= RATE_LIMIT_MAX:
-            return False
-        self._request_timestamps.append(now)
-        return True
+        # Deliveries need the guild cache, so drain only once the bot is ready
+        self.dispatcher.start()
+        if server_mode() == "external":
+            logger.info("Webhook intake runs in the ingress process; draining its outbox only")
+            return
+        await self.server.start()
 
-    async def handle_signal_health(self, request):
-        return web.json_response(self.signal_publisher.diagnostics())
+    async def cog_unload(self):
+        await self.dispatcher.close()
+        await self.server.close()
 
     @commands.hybrid_command(
         name="sigbalbot_publication_status",
@@ -119,7 +65,7 @@ class PytheiaWebhook(commands.Cog):
     async def signal_status(self, ctx):
         import json
         await ctx.reply(
-            f"```json\n{json.dumps(self.signal_publisher.diagnostics(), indent=2)}\n```",
+            f"```json\n{json.dumps(await adb.run_read(self.signal_publisher.diagnostics), indent=2)}\n```",
             ephemeral=True,
         )
 
@@ -132,104 +78,71 @@ class PytheiaWebhook(commands.Cog):
         result = await self.signal_publisher.dry_run()
         await ctx.reply(f"Publication test result: `{result}`", ephemeral=True)
 
-    async def handle_alert(self, request):
+    async def expand_alert(self, alert):
+        """Outbox handler: queue one delivery per guild, so each retries and orders independently."""
+        dedupe = f"{alert['tx_hash']}:{alert['signal_type']}:{alert['action']}"
+        queued = await adb.run_write(outbox.enqueue, [
+            (ALERT_KIND, f"{ALERT_KIND}:{guild.id}", {"guild_id": guild.id, "alert": alert},
+             f"{ALERT_KIND}:{guild.id}:{dedupe}")
+            for guild in self.bot.guilds
+        ])
+        return f"{len(queued)} guilds"
+
+    @staticmethod
+    def build_alert_embed(data):
+        """Render a validated alert payload; every free-text field is sanitised."""
+        embed = discord.Embed(
+            title="\U0001f916 Pytheia Autonomous Trade executed",
+            color=0xf1c40f
+        )
+
+        embed.add_field(name="Signal", value=sanitize_field(data["signal_type"], 50), inline=True)
+        embed.add_field(name="Symbol", value=sanitize_field(data["symbol"], 20), inline=True)
+        embed.add_field(name="Action", value=sanitize_field(data["action"], 20), inline=True)
+
+        if "amount" in data and "token" in data:
+            safe_amount = sanitize_field(str(data["amount"]), 30)
+            safe_token = sanitize_field(data["token"], 20)
+            embed.add_field(name="Amount", value=f"{safe_amount} {safe_token}", inline=True)
+        if "profit_estimate" in data:
+            safe_profit = sanitize_field(str(data["profit_estimate"]), 30)
+            embed.add_field(name="Expected Profit", value=safe_profit, inline=True)
+
+        # tx_hash is already validated as hex
+        embed.description = f"[View on Explorer](https://explorer.thronoschain.org/tx/{data['tx_hash']})"
+
+        embed.set_footer(text="Pytheia AI Network Layer")
+        return embed
+
+    async def deliver_queued_alert(self, payload):
+        """Outbox handler for one guild's alert."""
+        guild = self.bot.get_guild(payload["guild_id"])
+        if guild is None:
+            return "guild_unavailable"
         try:
-            # --- HMAC signature verification ---
-            signature = request.headers.get("X-Signature")
-            if not signature:
-                logger.warning("Webhook request missing X-Signature header")
-                return web.json_response({"error": "Missing signature"}, status=401)
-
-            body = await request.read()
-            if not self._verify_signature(body, signature):
-                logger.warning("Webhook request with invalid signature")
-                return web.json_response({"error": "Invalid signature"}, status=403)
-
-            # --- Rate limiting ---
-            if not self._check_rate_limit():
-                logger.warning("Webhook rate limit exceeded")
-                return web.json_response({"error": "Rate limit exceeded"}, status=429)
-
-            # --- Parse and validate payload ---
-            import json
+            delivered = await self.deliver_alert(guild, self.build_alert_embed(payload["alert"]))
+        except (discord.Forbidden, discord.NotFound) as error:
+            raise outbox.DeliveryFailed("DISCORD_ACCESS_DENIED") from error
+        except discord.HTTPException as error:
+            if error.status == 429 or error.status >= 500:
+                raise
+            raise outbox.DeliveryFailed("DISCORD_PERMANENT_FAILURE") from error
+        return "delivered" if delivered else "skipped"
+
+    async def deliver_alert(self, guild, embed):
+        channel = self.bot.guild_index.text_channel(guild, "autonomous-trading")
+        if not channel:
+            category = self.bot.guild_index.category(guild, "\U0001f6e0\ufe0f Ecosystem")
+            if not category:
+                return False
             try:
-                data = json.loads(body)
-            except (json.JSONDecodeError, ValueError):
-                return web.json_response({"error": "Invalid JSON"}, status=400)
-
-            # Validate required fields
-            required_fields = ["signal_type", "symbol", "action", "tx_hash"]
-            missing = [f for f in required_fields if f not in data or not data[f]]
-            if missing:
-                return web.json_response(
-                    {"error": f"Missing required fields: {', '.join(missing)}"},
-                    status=400
-                )
-
-            # Validate field values
-            if data["signal_type"] not in VALID_SIGNAL_TYPES:
-                return web.json_response(
-                    {"error": f"Invalid signal_type. Must be one of: {', '.join(sorted(VALID_SIGNAL_TYPES))}"},
-                    status=400
-                )
-
-            if data["action"] not in VALID_ACTIONS:
-                return web.json_response(
-                    {"error": f"Invalid action. Must be one of: {', '.join(sorted(VALID_ACTIONS))}"},
-                    status=400
-                )
-
-            if not is_valid_tx_hash(data["tx_hash"]):
-                return web.json_response(
-                    {"error": "Invalid tx_hash format. Expected 0x-prefixed 64 hex characters."},
-                    status=400
-                )
-
-            # --- Sanitize data before embedding ---
-            safe_signal_type = sanitize_field(data["signal_type"], 50)
-            safe_symbol = sanitize_field(data["symbol"], 20)
-            safe_action = sanitize_field(data["action"], 20)
-            safe_tx_hash = data["tx_hash"]  # Already validated as hex
-
-            # Route to all guilds #autonomous-trading channel
-            for guild in self.bot.guilds:
-                channel = discord.utils.get(guild.text_channels, name="autonomous-trading")
-                if not channel:
-                    category = discord.utils.get(guild.categories, name="\U0001f6e0\ufe0f Ecosystem")
-                    if category:
-                        try:
-                            channel = await guild.create_text_channel("autonomous-trading", category=category)
-                        except discord.Forbidden:
-                            logger.warning(f"Missing permissions to create channel in guild {guild.id}")
-                            continue
-
-                if channel:
-                    embed = discord.Embed(
-                        title="\U0001f916 Pytheia Autonomous Trade executed",
-                        color=0xf1c40f
-                    )
-
-                    embed.add_field(name="Signal", value=safe_signal_type, inline=True)
-                    embed.add_field(name="Symbol", value=safe_symbol, inline=True)
-                    embed.add_field(name="Action", value=safe_action, inline=True)
-
-                    if "amount" in data and "token" in data:
-                        safe_amount = sanitize_field(str(data["amount"]), 30)
-                        safe_token = sanitize_field(data["token"], 20)
-                        embed.add_field(name="Amount", value=f"{safe_amount} {safe_token}", inline=True)
-                    if "profit_estimate" in data:
-                        safe_profit = sanitize_field(str(data["profit_estimate"]), 30)
-                        embed.add_field(name="Expected Profit", value=safe_profit, inline=True)
-
-                    embed.description = f"[View on Explorer](https://explorer.thronoschain.org/tx/{safe_tx_hash})"
-
-                    embed.set_footer(text="Pytheia AI Network Layer")
-                    await channel.send(embed=embed)
-
-            return web.json_response({"status": "delivered"})
-        except Exception as e:
-            logger.error(f"Error handling pytheia webhook: {e}")
-            return web.json_response({"error": "Internal server error"}, status=500)
+                channel = await guild.create_text_channel("autonomous-trading", category=category)
+            except discord.Forbidden:
+                logger.warning(f"Missing permissions to create channel in guild {guild.id}")
+                return False
+        await channel.send(embed=embed)
+        return True
+
 
 async def setup(bot):
     await bot.add_cog(PytheiaWebhook(bot))
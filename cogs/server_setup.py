@@ -1,19 +1,16 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiohttp
 from bs4 import BeautifulSoup
+from async_database import adb
+from utils.message_registry import CONTENT_SLOT, forget, registered_message, remember
 
 class ServerSetup(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
     async def fetch_html(self, url):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    return await response.text()
-                return None
+        return await self.bot.api.get_text(url)
 
     async def get_roadmap_embed(self):
         url = "https://thronoschain.org/roadmap"
@@ -241,6 +238,22 @@ class ServerSetup(commands.Cog):
                 # Manage messages (delete older bot msgs to keep clean)
                 # For unified content, we want ONE main message with the embed/file
                 
+                # Known message: edit (or replace, for files) it directly
+                registered = registered_message(
+                    channel, await adb.get_bot_message(guild.id, channel.id, CONTENT_SLOT))
+                if registered:
+                    try:
+                        if file:
+                            await registered.delete()
+                            sent = await channel.send(content=content, embed=embed, file=file)
+                        else:
+                            sent = await registered.edit(content=content, embed=embed)
+                        await remember(channel, CONTENT_SLOT, sent)
+                        return
+                    except discord.NotFound:
+                        # Gone; the history scan below repairs the registry
+                        await forget(channel, CONTENT_SLOT)
+                
                 # Delete old bot messages first to avoid duplicates or clutter
                 messages_to_delete = []
                 async for message in channel.history(limit=10):
@@ -252,7 +265,7 @@ class ServerSetup(commands.Cog):
                     if file or len(messages_to_delete) > 1:
                         for m in messages_to_delete:
                             await m.delete()
-                        await channel.send(content=content, embed=embed, file=file)
+                        sent = await channel.send(content=content, embed=embed, file=file)
                     else:
                         # Single message, just edit it
                         msg = messages_to_delete[0]
@@ -260,11 +273,12 @@ class ServerSetup(commands.Cog):
                         # safer to delete and resend for files
                         if file:
                              await msg.delete()
-                             await channel.send(content=content, file=file, embed=embed)
+                             sent = await channel.send(content=content, file=file, embed=embed)
                         else:
-                             await msg.edit(content=content, embed=embed)
+                             sent = await msg.edit(content=content, embed=embed)
                 else:
-                    await channel.send(content=content, embed=embed, file=file)
+                    sent = await channel.send(content=content, embed=embed, file=file)
+                await remember(channel, CONTENT_SLOT, sent)
 
             # 1. Roadmap (Unified & Synced)
             roadmap_channel = discord.utils.get(guild.text_channels, name="roadmap")
@@ -1,49 +1,85 @@
 import discord
 from discord.ext import commands, tasks
-import aiohttp
 import logging
 import os
+from chain_events import EVENT_ENDPOINTS, NETWORK_STATS, PRICE
+from refresh_scheduler import RefreshScheduler
 
 logger = logging.getLogger('thronos_bot.ticker')
 
+# The refresh interval adapts between these: shorter while the price moves
+POLL_MIN_SECONDS = max(15.0, float(os.getenv("TICKER_POLL_MIN_SECONDS", "60")))
+POLL_MAX_SECONDS = max(POLL_MIN_SECONDS, float(os.getenv("TICKER_POLL_MAX_SECONDS", "600")))
+
 class TickerStatus(commands.Cog):
     """Display THR price in bot's status."""
     
     def __init__(self, bot):
         self.bot = bot
-        raw_url = os.getenv("THRONOS_API_URL", "https://api.thronoschain.org/api").rstrip("/")
-        self.base_url = raw_url if raw_url.endswith("/api") else f"{raw_url}/api"
+        self.prices = bot.api.poller("/token/prices", min_interval=POLL_MIN_SECONDS,
+                                     max_interval=POLL_MAX_SECONDS)
+        self.stats = bot.api.poller("/network_stats", min_interval=POLL_MIN_SECONDS,
+                                    max_interval=POLL_MAX_SECONDS)
+        self.status_text = None
+        # Latest price/stats bodies, from polls or pushed chain events
+        self.latest = {PRICE: None, NETWORK_STATS: None}
+        self.events = bot.chain_events
+        self.series = bot.timeseries
+        self.refresher = RefreshScheduler(self.show_status, self.events.config.min_refresh_seconds)
+        self.events.bus.subscribe(PRICE, self.on_chain_event)
+        self.events.bus.subscribe(NETWORK_STATS, self.on_chain_event)
         self.update_status.start()
     
-    def cog_unload(self):
+    async def cog_unload(self):
         self.update_status.cancel()
+        self.events.bus.unsubscribe(PRICE, self.on_chain_event)
+        self.events.bus.unsubscribe(NETWORK_STATS, self.on_chain_event)
+        await self.refresher.close()
+    
+    async def on_chain_event(self, event):
+        self.latest[event.type] = event.data
+        self.series.observe(EVENT_ENDPOINTS[event.type], event.data)
+        self.refresher.request("presence")
     
-    @tasks.loop(minutes=2)
+    @tasks.loop(seconds=POLL_MIN_SECONDS)
     async def update_status(self):
+        """Poll price and TX count; slowly while chain events are being pushed."""
+        try:
+            prices_changed, self.latest[PRICE] = await self.prices.poll()
+            stats_changed, self.latest[NETWORK_STATS] = await self.stats.poll()
+            # A live but quiet stream must not freeze the presence, so polling
+            # continues at the slowest interval as a safety net.
+            if self.events.live:
+                interval = max(self.prices.max_interval, self.stats.max_interval)
+            else:
+                interval = min(self.prices.interval, self.stats.interval)
+            self.update_status.change_interval(seconds=interval)
+            for poller, changed, kind in ((self.prices, prices_changed, PRICE),
+                                          (self.stats, stats_changed, NETWORK_STATS)):
+                if changed:
+                    self.series.observe(poller.endpoint, self.latest[kind])
+                    # /price and /stats read the shared cache, so one fetch serves both
+                    self.bot.api.cache.put(poller.endpoint, self.latest[kind])
+            if not (prices_changed or stats_changed) and self.status_text is not None:
+                return
+            await self.show_status()
+        except Exception as e:
+            logger.error(f"Error updating ticker status: {e}")
+    
+    async def show_status(self, key=None):
         """Update bot status with THR price and TX count."""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Get price
-                async with session.get(f"{self.base_url}/token/prices", timeout=10) as resp:
-                    if resp.status == 200:
-                        prices = await resp.json()
-                        thr_price = prices.get("thr_usd_rate", 0)
-                    else:
-                        thr_price = 0
-                
-                # Get TX count
-                async with session.get(f"{self.base_url}/network_stats", timeout=10) as resp:
-                    if resp.status == 200:
-                        stats = await resp.json()
-                        tx_count = stats.get("tx_count", 0) if isinstance(stats, dict) else 0
-                    else:
-                        tx_count = 0
+            prices, stats = self.latest[PRICE], self.latest[NETWORK_STATS]
+            thr_price = prices.get("thr_usd_rate", 0) if isinstance(prices, dict) else 0
+            tx_count = stats.get("tx_count", 0) if isinstance(stats, dict) else 0
             
             # Update presence
             if isinstance(thr_price, (int, float)) and thr_price > 0:
                 status_text = f"${thr_price:.6f} THR | {tx_count:,} TXs"
             else:
                 status_text = f"{tx_count:,} transactions"
+            if status_text == self.status_text:
+                return
             
             await self.bot.change_presence(
                 activity=discord.Activity(
@@ -51,6 +87,7 @@ class TickerStatus(commands.Cog):
                     name=status_text
                 )
             )
+            self.status_text = status_text
             logger.debug(f"Updated status: {status_text}")
             
         except Exception as e:
@@ -32,7 +32,7 @@ class VerificationView(discord.ui.View):
         # Determine language for response
         lang = get_user_lang(user)
         
-        role = discord.utils.get(guild.roles, name=role_name)
+        role = interaction.client.guild_index.role(guild, role_name)
 
         if not role:
             # Auto-create the role if it doesn't exist
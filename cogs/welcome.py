@@ -37,7 +37,7 @@ class Welcome(commands.Cog):
                 logger.warning(f"Could not send DM to {member} (DMs disabled)")
             
             # Post in general channel if it exists
-            general_channel = discord.utils.get(member.guild.text_channels, name="general")
+            general_channel = self.bot.guild_index.text_channel(member.guild, "general")
             if general_channel:
                 await general_channel.send(
                     f"👋 Welcome {member.mention} to **Thronos Network**! "
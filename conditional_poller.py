@@ -0,0 +1,85 @@
+"""Conditional, adaptively paced polling of one Thronos API endpoint."""
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger("thronos_bot.conditional_poller")
+
+
+class ConditionalPoller:
+    """Poll ``endpoint`` and only decode bodies that actually changed.
+
+    Each poll sends the last ``ETag``/``Last-Modified`` back; a ``304`` skips
+    the download and the parse, and a ``200`` whose bytes hash the same as the
+    last one skips the parse. The suggested ``interval`` halves towards
+    ``min_interval`` after a change and doubles towards ``max_interval`` while
+    nothing changes, so an idle chain is polled rarely and a busy one closely.
+    """
+
+    def __init__(self, api, endpoint, min_interval=60.0, max_interval=900.0,
+                 speedup=0.5, backoff=2.0):
+        self.api = api
+        self.endpoint = endpoint
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup = speedup
+        self.backoff = backoff
+        self.interval = min_interval
+        self.data = None
+        self._etag = None
+        self._last_modified = None
+        self._digest = None
+        self._size = 0
+        self.polls = 0
+        self.changes = 0
+        self.not_modified = 0
+        self.unchanged_bodies = 0
+        self.failures = 0
+        self.bytes_received = 0
+        self.bytes_saved = 0
+
+    async def poll(self):
+        """Return ``(changed, data)``; ``data`` is the last good decoded body."""
+        self.polls += 1
+        status, body, etag, last_modified = await self.api.get_conditional(
+            self.endpoint, self._etag, self._last_modified)
+        if status == 304:
+            self.not_modified += 1
+            self.bytes_saved += self._size
+            return self._settle(False)
+        if status != 200 or body is None:
+            self.failures += 1
+            return self._settle(False)
+        self.bytes_received += len(body)
+        self._etag, self._last_modified = etag, last_modified
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if digest == self._digest:
+            self.unchanged_bodies += 1
+            return self._settle(False)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            self.failures += 1
+            logger.warning("Thronos API %s returned undecodable JSON", self.endpoint)
+            return self._settle(False)
+        self._digest, self._size, self.data = digest, len(body), data
+        self.changes += 1
+        return self._settle(True)
+
+    def _settle(self, changed):
+        factor = self.speedup if changed else self.backoff
+        self.interval = min(self.max_interval, max(self.min_interval, self.interval * factor))
+        return changed, self.data
+
+    def stats(self):
+        return {
+            "interval_seconds": round(self.interval, 3),
+            "polls": self.polls,
+            "changes": self.changes,
+            "not_modified": self.not_modified,
+            "unchanged_bodies": self.unchanged_bodies,
+            "skipped_parses": self.not_modified + self.unchanged_bodies,
+            "failures": self.failures,
+            "bytes_received": self.bytes_received,
+            "bytes_saved": self.bytes_saved,
+        }
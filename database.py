@@ -1,8 +1,12 @@
 import sqlite3
 import os
 import logging
+import queue
 import re
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger('thronos_bot.database')
 
@@ -22,246 +26,635 @@ def validate_wallet_address(wallet_address):
         )
     return wallet_address
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'thronos.db')
+DB_PATH = os.getenv("THRONOS_DB_PATH") or os.path.join(os.path.dirname(__file__), 'data', 'thronos.db')
+# An in-process database lives only as long as its single pooled connection.
+MEMORY_DB_PATH = ":memory:"
 
-def get_connection():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+# Connection pool tuning; pragmas are applied once when a pooled connection opens.
+POOL_SIZE = max(1, int(os.getenv("DATABASE_POOL_SIZE", "4")))
+POOL_TIMEOUT_SECONDS = 10.0
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KIB = 8192
+MMAP_SIZE_BYTES = 64 * 1024 * 1024
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection became free within the checkout timeout."""
+
+
+def _open_connection(path):
+    if path != MEMORY_DB_PATH:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Pooled connections move between threads, but only ever one checkout at a time.
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
     conn.row_factory = sqlite3.Row
-    # Enable WAL mode for better concurrent read performance (safe literal, not user input)
+    # Safe literals, not user input.  WAL lets readers proceed during a write.
     conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
     return conn
 
-def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Proposals table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS proposals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            author_id INTEGER NOT NULL,
-            author_name TEXT,
-            votes_yes INTEGER DEFAULT 0,
-            votes_no INTEGER DEFAULT 0,
-            message_id INTEGER,
-            channel_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Votes table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS votes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            proposal_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            vote_type TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (proposal_id) REFERENCES proposals(id),
-            UNIQUE(proposal_id, user_id)
-        )
-    ''')
-    
-    # User stats table for leaderboard
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_stats (
-            user_id INTEGER PRIMARY KEY,
-            username TEXT,
-            message_count INTEGER DEFAULT 0,
-            reaction_count INTEGER DEFAULT 0,
-            referral_count INTEGER DEFAULT 0,
-            xp INTEGER DEFAULT 0,
-            last_active TIMESTAMP,
-            wallet_address TEXT
-        )
-    ''')
-
-    # A reservation is inserted before Discord is called.  The uniqueness key is
-    # the cross-process/day idempotency boundary for locally scheduled campaigns.
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS community_promotions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            campaign TEXT NOT NULL,
-            destination TEXT NOT NULL,
-            promotion_date TEXT NOT NULL,
-            status TEXT NOT NULL CHECK(status IN
-                ('reserved', 'delivered', 'retryable', 'permanent_failure')),
-            attempt_count INTEGER NOT NULL DEFAULT 0,
-            discord_message_id TEXT,
-            delivered_at TEXT,
-            safe_error_code TEXT,
-            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(campaign, destination, promotion_date)
-        )
-    ''')
-
-    # Intake storage deliberately retains neither payload bodies nor secrets.
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS future_btc_signal_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id TEXT NOT NULL UNIQUE,
-            published_at TEXT NOT NULL,
-            valid_until TEXT NOT NULL,
-            received_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS future_btc_signal_publications (
-            event_id TEXT PRIMARY KEY,
-            state TEXT NOT NULL CHECK(state IN (
-                'received', 'publication_pending', 'published',
-                'retryable_failure', 'permanent_failure', 'weekly_limited')),
-            discord_message_id TEXT,
-            first_publication_attempt TEXT,
-            last_publication_attempt TEXT,
-            published_at TEXT,
-            attempt_count INTEGER NOT NULL DEFAULT 0 CHECK(attempt_count <= 6),
-            safe_error_code TEXT,
-            FOREIGN KEY (event_id) REFERENCES future_btc_signal_events(event_id)
-        )
-    ''')
-    
-    # Try migrating wallet_address if table already exists
+
+def get_connection():
+    """Open an unpooled connection; the caller must close it.
+
+    Kept for scripts and tests. Application code should use ``connection()``.
+    """
+    return _open_connection(DB_PATH)
+
+
+class ConnectionPool:
+    """A small pool of long-lived SQLite connections.
+
+    A connection is confined to the thread that checked it out until it is
+    returned; any transaction left open by the borrower is rolled back on
+    return so the next borrower always starts clean.
+    """
+
+    def __init__(self, path, size=POOL_SIZE, timeout=POOL_TIMEOUT_SECONDS):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._open = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def _acquire(self):
+        started = time.monotonic()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._open < self.size
+                if create:
+                    self._open += 1
+            if create:
+                try:
+                    conn = _open_connection(self.path)
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout("database connection pool exhausted") from None
+        waited = time.monotonic() - started
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            if waited > 0.001:
+                self._waits += 1
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        return conn
+
+    def _release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            # A borrower closed or broke the connection; replace it lazily.
+            healthy = False
+        with self._lock:
+            self._in_use -= 1
+            discard = self._closed or not healthy
+            if discard:
+                self._open -= 1
+        if discard:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Close idle connections; checked-out ones close when returned."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._open -= 1
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_seconds_total": round(self._wait_seconds, 6),
+                "wait_seconds_max": round(self._max_wait_seconds, 6),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the pool for the current ``DB_PATH``, replacing it if the path moved.
+
+    Nothing touches the disk until the first pooled checkout, which also
+    applies any pending migrations.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+                _pool = None
+            # Every :memory: connection is a separate database, so share exactly one.
+            pool = ConnectionPool(DB_PATH, size=1 if DB_PATH == MEMORY_DB_PATH else POOL_SIZE)
+            with pool.connection() as conn:
+                _migrate(conn)
+            _pool = pool
+        return _pool
+
+
+def connection():
+    """Context manager yielding a pooled connection; callers still commit explicitly."""
+    return get_pool().connection()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+MIGRATION_FILE_RE = re.compile(r'^(\d+)_([A-Za-z0-9_]+)\.sql$')
+
+
+def migration_files():
+    """Return ``(version, name, path)`` for every migration, in version order."""
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(found)
+
+
+def _split_statements(sql):
+    statements, current = [], ""
+    for line in sql.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if current.strip():
+                statements.append(current.strip())
+            current = ""
+    if current.strip() and not all(
+            part.strip().startswith("--") for part in current.strip().splitlines()):
+        raise ValueError("Migration ends with an incomplete SQL statement")
+    return statements
+
+
+def _execute_migration_statement(conn, statement):
     try:
-        cursor.execute('ALTER TABLE user_stats ADD COLUMN wallet_address TEXT')
-    except sqlite3.OperationalError:
-        pass # Column already exists
-    
-    conn.commit()
-    conn.close()
-    logger.info("Database initialized")
+        conn.execute(statement)
+    except sqlite3.OperationalError as exc:
+        # Pre-versioning databases may already carry a column a migration adds.
+        body = "\n".join(line for line in statement.splitlines() if not line.lstrip().startswith("--"))
+        if body.lstrip().upper().startswith("ALTER TABLE") and "duplicate column name" in str(exc):
+            return
+        raise
+
+
+def apply_migrations(conn):
+    """Apply pending ``migrations/*.sql`` files; return the names applied.
+
+    Each file runs in its own ``BEGIN IMMEDIATE`` transaction together with
+    its ``schema_migrations`` row, so a concurrent process either sees the
+    whole migration or none of it. A warm database only costs one read.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_migrations'"
+    ).fetchone()
+    if not exists:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+    done = {row[0] for row in conn.execute('SELECT version FROM schema_migrations')}
+    applied = []
+    for version, name, path in migration_files():
+        if version in done:
+            continue
+        with open(path, encoding='utf-8') as handle:
+            statements = _split_statements(handle.read())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute('SELECT 1 FROM schema_migrations WHERE version = ?', (version,)).fetchone():
+                conn.rollback()
+                continue
+            for statement in statements:
+                _execute_migration_statement(conn, statement)
+            conn.execute('INSERT INTO schema_migrations (version, name) VALUES (?, ?)', (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(f"{version:03d}_{name}")
+    return applied
+
+
+def configure(path=None):
+    """Select the database (a file path or ``MEMORY_DB_PATH``) and migrate it.
+
+    This is the startup lifecycle hook; without it the first pooled checkout
+    migrates ``DB_PATH`` lazily.
+    """
+    global DB_PATH
+    if path is not None:
+        DB_PATH = path
+    init_db()
+
+
+def _migrate(conn):
+    """Apply pending migrations and log which ran; the operator's record of them."""
+    applied = apply_migrations(conn)
+    if applied:
+        logger.info("Database migrations applied: %s", ", ".join(applied))
+    else:
+        logger.debug("Database schema up to date")
+    return applied
+
+
+def init_db():
+    """Bring the schema at ``DB_PATH`` up to date; a no-op on warm databases.
+
+    Opening the pool migrates, so this only has to check out a connection.
+    """
+    with connection():
+        pass
 
 # Proposal functions
 def create_proposal(title, description, author_id, author_name, message_id, channel_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO proposals (title, description, author_id, author_name, message_id, channel_id)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (title, description, author_id, author_name, message_id, channel_id))
-    proposal_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return proposal_id
+    with connection() as conn:
+        cursor = conn.execute('''
+            INSERT INTO proposals (title, description, author_id, author_name, message_id, channel_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (title, description, author_id, author_name, message_id, channel_id))
+        conn.commit()
+        return cursor.lastrowid
 
 def get_proposal(proposal_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM proposals WHERE id = ?', (proposal_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        row = conn.execute('SELECT * FROM proposals WHERE id = ?', (proposal_id,)).fetchone()
     return dict(row) if row else None
 
 def update_proposal_votes(proposal_id, votes_yes, votes_no):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE proposals SET votes_yes = ?, votes_no = ? WHERE id = ?
-    ''', (votes_yes, votes_no, proposal_id))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        conn.execute('''
+            UPDATE proposals SET votes_yes = ?, votes_no = ? WHERE id = ?
+        ''', (votes_yes, votes_no, proposal_id))
+        conn.commit()
 
 def get_all_proposals():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM proposals ORDER BY created_at DESC')
-    rows = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        rows = conn.execute('SELECT * FROM proposals ORDER BY created_at DESC').fetchall()
     return [dict(row) for row in rows]
 
 # Vote functions
 def add_vote(proposal_id, user_id, vote_type):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT INTO votes (proposal_id, user_id, vote_type) VALUES (?, ?, ?)
-        ''', (proposal_id, user_id, vote_type))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False
+    with connection() as conn:
+        try:
+            conn.execute('''
+                INSERT INTO votes (proposal_id, user_id, vote_type) VALUES (?, ?, ?)
+            ''', (proposal_id, user_id, vote_type))
+            conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            return False
 
 def has_voted(proposal_id, user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT 1 FROM votes WHERE proposal_id = ? AND user_id = ?', (proposal_id, user_id))
-    result = cursor.fetchone() is not None
-    conn.close()
-    return result
+    with connection() as conn:
+        row = conn.execute(
+            'SELECT 1 FROM votes WHERE proposal_id = ? AND user_id = ?', (proposal_id, user_id)
+        ).fetchone()
+    return row is not None
+
+def cast_vote(proposal_id, user_id, vote_type):
+    """Record a vote and bump the proposal tally in one transaction.
+
+    Returns ``(status, proposal)`` where status is ``"recorded"``,
+    ``"duplicate"`` or ``"missing"``; ``proposal`` is the fresh row whenever
+    the proposal exists, so callers never re-read a tally that may be stale.
+    """
+    if vote_type not in ("yes", "no"):
+        raise ValueError(f"unknown vote type: {vote_type}")
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute('''
+            UPDATE proposals SET votes_yes = votes_yes + ?, votes_no = votes_no + ?
+            WHERE id = ? RETURNING *
+        ''', (int(vote_type == "yes"), int(vote_type == "no"), proposal_id)).fetchone()
+        if row is None:
+            conn.rollback()
+            return "missing", None
+        try:
+            conn.execute('''
+                INSERT INTO votes (proposal_id, user_id, vote_type) VALUES (?, ?, ?)
+            ''', (proposal_id, user_id, vote_type))
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            row = conn.execute('SELECT * FROM proposals WHERE id = ?', (proposal_id,)).fetchone()
+            return "duplicate", dict(row)
+        conn.commit()
+    return "recorded", dict(row)
 
 # Leaderboard functions
+def calculate_xp(messages=0, reactions=0, referrals=0):
+    return (messages * 10) + (reactions * 5) + (referrals * 50)
+
 def update_user_stats(user_id, username, messages=0, reactions=0, referrals=0):
-    conn = get_connection()
-    cursor = conn.cursor()
-    xp = (messages * 10) + (reactions * 5) + (referrals * 50)
-    cursor.execute('''
-        INSERT INTO user_stats (user_id, username, message_count, reaction_count, referral_count, xp, last_active)
-        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ON CONFLICT(user_id) DO UPDATE SET
-            username = excluded.username,
-            message_count = user_stats.message_count + excluded.message_count,
-            reaction_count = user_stats.reaction_count + excluded.reaction_count,
-            referral_count = user_stats.referral_count + excluded.referral_count,
-            xp = user_stats.xp + excluded.xp,
-            last_active = CURRENT_TIMESTAMP
-    ''', (user_id, username, messages, reactions, referrals, xp))
-    conn.commit()
-    conn.close()
+    xp = calculate_xp(messages, reactions, referrals)
+    with connection() as conn:
+        conn.execute('''
+            INSERT INTO user_stats (user_id, username, message_count, reaction_count, referral_count, xp, last_active)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id) DO UPDATE SET
+                username = excluded.username,
+                message_count = user_stats.message_count + excluded.message_count,
+                reaction_count = user_stats.reaction_count + excluded.reaction_count,
+                referral_count = user_stats.referral_count + excluded.referral_count,
+                xp = user_stats.xp + excluded.xp,
+                last_active = CURRENT_TIMESTAMP
+        ''', (user_id, username, messages, reactions, referrals, xp))
+        conn.commit()
+
+def apply_user_stats_batch(deltas, activity=()):
+    """Apply coalesced leaderboard deltas in one transaction.
+
+    ``deltas`` holds ``(user_id, username, messages, reactions, referrals, xp,
+    last_active)`` tuples; counters are added and the username/last_active
+    values replace the stored ones. ``activity`` holds ``(guild_id, user_id,
+    bucket_start, username, messages, reactions, referrals, xp)`` hour rollups.
+    """
+    if not deltas and not activity:
+        return 0
+    with connection() as conn:
+        conn.executemany('''
+            INSERT INTO activity_rollups (guild_id, user_id, granularity, bucket_start, username,
+                                          message_count, reaction_count, referral_count, xp)
+            VALUES (?, ?, 'hour', ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id, granularity, bucket_start) DO UPDATE SET
+                username = excluded.username,
+                message_count = activity_rollups.message_count + excluded.message_count,
+                reaction_count = activity_rollups.reaction_count + excluded.reaction_count,
+                referral_count = activity_rollups.referral_count + excluded.referral_count,
+                xp = activity_rollups.xp + excluded.xp
+        ''', activity)
+        conn.executemany('''
+            INSERT INTO user_stats (user_id, username, message_count, reaction_count, referral_count, xp, last_active)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                username = excluded.username,
+                message_count = user_stats.message_count + excluded.message_count,
+                reaction_count = user_stats.reaction_count + excluded.reaction_count,
+                referral_count = user_stats.referral_count + excluded.referral_count,
+                xp = user_stats.xp + excluded.xp,
+                last_active = excluded.last_active
+        ''', deltas)
+        conn.commit()
+    return len(deltas)
 
 def get_leaderboard(limit=10):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT user_id, username, message_count, reaction_count, referral_count, xp
-        FROM user_stats ORDER BY xp DESC LIMIT ?
-    ''', (limit,))
-    rows = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        rows = conn.execute('''
+            SELECT user_id, username, message_count, reaction_count, referral_count, xp
+            FROM user_stats ORDER BY xp DESC LIMIT ?
+        ''', (limit,)).fetchall()
+    return [dict(row) for row in rows]
+
+# Activity rollups
+ACTIVITY_PERIODS = ("day", "week", "month")
+HOUR_BUCKET_RETENTION = timedelta(days=2)
+DAY_BUCKET_RETENTION = timedelta(days=62)
+
+def _bucket_text(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+def activity_hour_bucket(now=None):
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    return _bucket_text(now.replace(minute=0, second=0, microsecond=0))
+
+def activity_period_start(period, now=None):
+    """Return the UTC start of the current calendar day, ISO week, or month."""
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "day":
+        return _bucket_text(day)
+    if period == "week":
+        return _bucket_text(day - timedelta(days=day.weekday()))
+    if period == "month":
+        return _bucket_text(day.replace(day=1))
+    raise ValueError(f"Unknown activity period: {period}")
+
+def get_activity_leaderboard(since, guild_id=None, limit=10):
+    """Sum rollups from ``since`` onwards, for one guild or across all guilds."""
+    guild_filter = "AND r.guild_id = ?" if guild_id is not None else ""
+    params = (since, guild_id, limit) if guild_id is not None else (since, limit)
+    with connection() as conn:
+        rows = conn.execute(f'''
+            SELECT r.user_id,
+                   -- The current name, else the one on the newest bucket
+                   COALESCE(u.username, (
+                       SELECT n.username FROM activity_rollups n
+                       WHERE n.user_id = r.user_id AND n.username IS NOT NULL
+                       ORDER BY n.bucket_start DESC LIMIT 1)) AS username,
+                   SUM(r.message_count) AS message_count, SUM(r.reaction_count) AS reaction_count,
+                   SUM(r.referral_count) AS referral_count, SUM(r.xp) AS xp
+            FROM activity_rollups r LEFT JOIN user_stats u ON u.user_id = r.user_id
+            WHERE r.bucket_start >= ? {guild_filter}
+            GROUP BY r.user_id ORDER BY xp DESC, r.user_id LIMIT ?
+        ''', params).fetchall()
+    return [dict(row) for row in rows]
+
+def _compact_rollups(conn, source, target, bucket_expr, cutoff):
+    conn.execute(f'''
+        INSERT INTO activity_rollups (guild_id, user_id, granularity, bucket_start, username,
+                                      message_count, reaction_count, referral_count, xp)
+        SELECT guild_id, user_id, ?, bucket, username, messages, reactions, referrals, gained
+        FROM (
+            -- With a single MAX(), SQLite takes the bare username from the
+            -- newest bucket's row, i.e. the most recent name in the group.
+            SELECT guild_id, user_id, {bucket_expr} AS bucket, username, MAX(bucket_start),
+                   SUM(message_count) AS messages, SUM(reaction_count) AS reactions,
+                   SUM(referral_count) AS referrals, SUM(xp) AS gained
+            FROM activity_rollups WHERE granularity = ? AND bucket_start < ?
+            GROUP BY guild_id, user_id, {bucket_expr}
+        ) WHERE true
+        ON CONFLICT(guild_id, user_id, granularity, bucket_start) DO UPDATE SET
+            username = COALESCE(excluded.username, activity_rollups.username),
+            message_count = activity_rollups.message_count + excluded.message_count,
+            reaction_count = activity_rollups.reaction_count + excluded.reaction_count,
+            referral_count = activity_rollups.referral_count + excluded.referral_count,
+            xp = activity_rollups.xp + excluded.xp
+    ''', (target, source, cutoff))
+    return conn.execute(
+        'DELETE FROM activity_rollups WHERE granularity = ? AND bucket_start < ?',
+        (source, cutoff)).rowcount
+
+def compact_activity_rollups(now=None):
+    """Fold old hour buckets into days and old day buckets into months.
+
+    Cutoffs fall on day/month boundaries and are older than any current
+    week or month, so period queries stay exact after compaction.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    hour_cutoff = activity_period_start("day", now - HOUR_BUCKET_RETENTION)
+    day_cutoff = activity_period_start("month", now - DAY_BUCKET_RETENTION)
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        hours = _compact_rollups(conn, "hour", "day", "substr(bucket_start, 1, 10) || ' 00:00:00'", hour_cutoff)
+        days = _compact_rollups(conn, "day", "month", "substr(bucket_start, 1, 7) || '-01 00:00:00'", day_cutoff)
+        conn.commit()
+    return hours, days
+
+def get_all_user_stats():
+    with connection() as conn:
+        rows = conn.execute('''
+            SELECT user_id, username, message_count, reaction_count, referral_count, xp
+            FROM user_stats
+        ''').fetchall()
     return [dict(row) for row in rows]
 
 def get_user_rank(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT COUNT(*) + 1 as rank FROM user_stats 
-        WHERE xp > (SELECT COALESCE(xp, 0) FROM user_stats WHERE user_id = ?)
-    ''', (user_id,))
-    rank = cursor.fetchone()['rank']
-    cursor.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        rank = conn.execute('''
+            SELECT COUNT(*) + 1 as rank FROM user_stats 
+            WHERE xp > (SELECT COALESCE(xp, 0) FROM user_stats WHERE user_id = ?)
+        ''', (user_id,)).fetchone()['rank']
+        user = conn.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,)).fetchone()
     return rank, dict(user) if user else None
 
 def bind_wallet(user_id, username, wallet_address):
     wallet_address = validate_wallet_address(wallet_address)
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO user_stats (user_id, username, wallet_address, last_active)
-        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-        ON CONFLICT(user_id) DO UPDATE SET
-            username = excluded.username,
-            wallet_address = excluded.wallet_address,
-            last_active = CURRENT_TIMESTAMP
-    ''', (user_id, username, wallet_address))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        conn.execute('''
+            INSERT INTO user_stats (user_id, username, wallet_address, last_active)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id) DO UPDATE SET
+                username = excluded.username,
+                wallet_address = excluded.wallet_address,
+                last_active = CURRENT_TIMESTAMP
+        ''', (user_id, username, wallet_address))
+        conn.commit()
 
 def get_wallet(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT wallet_address FROM user_stats WHERE user_id = ?', (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        row = conn.execute('SELECT wallet_address FROM user_stats WHERE user_id = ?', (user_id,)).fetchone()
     return row['wallet_address'] if row else None
 
-# Initialize on import
-init_db()
+# Bot message registry
+def get_bot_message(guild_id, channel_id, slot):
+    with connection() as conn:
+        row = conn.execute(
+            'SELECT message_id FROM bot_messages WHERE guild_id = ? AND channel_id = ? AND slot = ?',
+            (guild_id, channel_id, slot)).fetchone()
+    return row['message_id'] if row else None
+
+def set_bot_message(guild_id, channel_id, slot, message_id):
+    with connection() as conn:
+        conn.execute('''
+            INSERT INTO bot_messages (guild_id, channel_id, slot, message_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(guild_id, channel_id, slot) DO UPDATE SET
+                message_id = excluded.message_id,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (guild_id, channel_id, slot, message_id))
+        conn.commit()
+
+def delete_bot_message(guild_id, channel_id, slot):
+    with connection() as conn:
+        conn.execute(
+            'DELETE FROM bot_messages WHERE guild_id = ? AND channel_id = ? AND slot = ?',
+            (guild_id, channel_id, slot))
+        conn.commit()
+
+# EVM watcher cursor
+def get_evm_cursor(window):
+    """Return ``(last_block, last_created_at, recent_addresses)``, or ``None`` before the first save.
+
+    ``recent_addresses`` holds at most ``window`` addresses, oldest first.
+    """
+    with connection() as conn:
+        row = conn.execute('SELECT last_block, last_created_at FROM evm_watch_cursor WHERE id = 1').fetchone()
+        if row is None:
+            return None
+        recent = conn.execute(
+            'SELECT address FROM evm_seen_contracts ORDER BY seq DESC LIMIT ?', (window,)).fetchall()
+    return row['last_block'], row['last_created_at'], [r['address'] for r in reversed(recent)]
+
+def save_evm_cursor(last_block, last_created_at, addresses, window):
+    """Advance the watermark, record ``addresses`` and prune to the newest ``window``."""
+    with connection() as conn:
+        conn.execute('''
+            INSERT INTO evm_watch_cursor (id, last_block, last_created_at) VALUES (1, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                last_block = excluded.last_block,
+                last_created_at = excluded.last_created_at,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (last_block, last_created_at))
+        conn.executemany('INSERT OR IGNORE INTO evm_seen_contracts (address) VALUES (?)',
+                         [(address,) for address in addresses])
+        conn.execute('''
+            DELETE FROM evm_seen_contracts WHERE seq <= (
+                SELECT seq FROM evm_seen_contracts ORDER BY seq DESC LIMIT 1 OFFSET ?)
+        ''', (window,))
+        conn.commit()
+
+def save_metric_samples(rows, cutoffs):
+    """Upsert ``(metric, resolution, ts, close, low, high)`` rows, then prune
+    each resolution in ``cutoffs`` to timestamps at or after its cutoff."""
+    with connection() as conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO metric_samples (metric, resolution, ts, close, low, high) '
+            'VALUES (?, ?, ?, ?, ?, ?)', rows)
+        conn.executemany('DELETE FROM metric_samples WHERE resolution = ? AND ts < ?',
+                         list(cutoffs.items()))
+        conn.commit()
+
+def load_metric_samples(cutoffs):
+    """Return stored rows newer than each resolution's cutoff, oldest first."""
+    rows = []
+    with connection() as conn:
+        for resolution, cutoff in cutoffs.items():
+            rows.extend(tuple(row) for row in conn.execute(
+                'SELECT metric, resolution, ts, close, low, high FROM metric_samples '
+                'WHERE resolution = ? AND ts >= ? ORDER BY ts', (resolution, cutoff)))
+    return rows
@@ -13,6 +13,9 @@ from urllib.parse import urlparse
 
 import discord
 import database
+import outbox
+from async_database import adb
+from webhook_intake import PayloadTooLarge, read_signed_body, signature_matches
 
 EVENT_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
 TIMEFRAME_RE = re.compile(r"^[1-9][0-9]?[mhdw]$")
@@ -21,6 +24,7 @@ SIGNATURE_HEADER = "X-SigBalBot-Signature"
 MAX_BODY_BYTES = 4096
 MAX_PUBLICATION_ATTEMPTS = 6
 WEEKLY_WINDOW = timedelta(days=7)
+OUTBOX_KIND = "free_btc_signal"
 logger = logging.getLogger("thronos_bot.future_btc_signal")
 _publisher = None
 
@@ -92,8 +96,7 @@ def validate_payload(data, now=None):
 
 def store_event(data):
     """Return True for a new event and False for an idempotent duplicate."""
-    conn = database.get_connection()
-    try:
+    with database.connection() as conn:
         cur = conn.execute(
             "INSERT OR IGNORE INTO future_btc_signal_events "
             "(event_id,published_at,valid_until) VALUES (?,?,?)",
@@ -103,8 +106,6 @@ def store_event(data):
             "VALUES (?, 'received')", (data["event_id"],))
         conn.commit()
         return cur.rowcount == 1
-    finally:
-        conn.close()
 
 
 def _env_bool(name):
@@ -170,10 +171,13 @@ class SignalPublisher:
         self.config = config or PublicationConfig.from_env()
         self.sleep = sleep
 
-    def _reserve(self, event_id, now):
-        """Atomically choose one event for the rolling publication window."""
-        conn = database.get_connection()
-        try:
+    def _reserve(self, event_id, now, queue=None):
+        """Atomically choose one event for the rolling publication window.
+
+        With ``queue`` (the validated payload) a reserved event is also put in
+        the delivery outbox inside the same transaction.
+        """
+        with database.connection() as conn:
             conn.execute("BEGIN IMMEDIATE")
             row = conn.execute(
                 "SELECT * FROM future_btc_signal_publications WHERE event_id=?",
@@ -206,14 +210,13 @@ class SignalPublisher:
                 "first_publication_attempt=COALESCE(first_publication_attempt,?), "
                 "last_publication_attempt=?, safe_error_code=NULL WHERE event_id=?",
                 (stamp, stamp, event_id))
+            if queue is not None:
+                outbox.insert(conn, OUTBOX_KIND, OUTBOX_KIND, queue, event_id)
             conn.commit()
             return "reserved"
-        finally:
-            conn.close()
 
     def _record(self, event_id, state, now, message_id=None, error=None, increment=False):
-        conn = database.get_connection()
-        try:
+        with database.connection() as conn:
             conn.execute(
                 "UPDATE future_btc_signal_publications SET state=?, discord_message_id=?, "
                 "last_publication_attempt=?, published_at=CASE WHEN ?='published' THEN ? ELSE published_at END, "
@@ -221,57 +224,76 @@ class SignalPublisher:
                 (state, message_id, _utc_text(now), state, _utc_text(now), error,
                  1 if increment else 0, event_id))
             conn.commit()
-        finally:
-            conn.close()
 
-    async def publish(self, data, now=None):
+    def _send_progress(self, event_id):
+        with database.connection() as conn:
+            row = conn.execute(
+                "SELECT attempt_count, discord_message_id FROM future_btc_signal_publications "
+                "WHERE event_id=?", (event_id,)).fetchone()
+        return row["attempt_count"], row["discord_message_id"]
+
+    async def _save(self, *args, **kwargs):
+        await adb.run_write(self._record, *args, **kwargs)
+
+    async def reserve(self, data, now=None, queue=False):
+        """Claim the publication window for ``data``; ``"reserved"`` means it may be sent."""
         if not self.config.enabled:
             return "publication_disabled"
         now = now or datetime.now(timezone.utc)
-        reservation = self._reserve(data["event_id"], now)
+        return await adb.run_write(self._reserve, data["event_id"], now, data if queue else None)
+
+    async def publish(self, data, now=None):
+        reservation = await self.reserve(data, now)
         if reservation != "reserved":
             return reservation
+        return await self.send(data, now)
+
+    async def send(self, data, now=None, attempts=3):
+        """Post a reserved event, retrying transient Discord errors up to ``attempts`` times."""
+        now = now or datetime.now(timezone.utc)
         if not self.config.channel_id or not self.config.community_url:
-            self._record(data["event_id"], "permanent_failure", now,
-                         error="INVALID_PUBLICATION_CONFIG", increment=True)
+            await self._save(data["event_id"], "permanent_failure", now,
+                             error="INVALID_PUBLICATION_CONFIG", increment=True)
             return "permanent_failure"
         channel = self.bot.get_channel(self.config.channel_id)
         if channel is None:
-            self._record(data["event_id"], "permanent_failure", now,
-                         error="CHANNEL_NOT_FOUND", increment=True)
+            await self._save(data["event_id"], "permanent_failure", now,
+                             error="CHANNEL_NOT_FOUND", increment=True)
+            return "permanent_failure"
+        used, message_id = await adb.run_read(self._send_progress, data["event_id"])
+        if message_id:
+            # A stored message ID is conclusive success, e.g. for a redelivered outbox item
+            return "suppressed"
+        batch_attempts = min(attempts, MAX_PUBLICATION_ATTEMPTS - used)
+        if batch_attempts <= 0:
+            await self._save(data["event_id"], "permanent_failure", now, error="ATTEMPTS_EXHAUSTED")
             return "permanent_failure"
-        conn = database.get_connection()
-        used = conn.execute(
-            "SELECT attempt_count FROM future_btc_signal_publications WHERE event_id=?",
-            (data["event_id"],)).fetchone()["attempt_count"]
-        conn.close()
-        batch_attempts = min(3, MAX_PUBLICATION_ATTEMPTS - used)
         for attempt in range(batch_attempts):
             attempt_time = datetime.now(timezone.utc)
             try:
                 message = await channel.send(
                     build_publication_message(data, self.config.community_url),
                     allowed_mentions=discord.AllowedMentions.none())
-                self._record(data["event_id"], "published", attempt_time,
-                             message_id=str(message.id), increment=True)
+                await self._save(data["event_id"], "published", attempt_time,
+                                 message_id=str(message.id), increment=True)
                 return "published"
             except (discord.Forbidden, discord.NotFound):
-                self._record(data["event_id"], "permanent_failure", attempt_time,
-                             error="DISCORD_ACCESS_DENIED", increment=True)
+                await self._save(data["event_id"], "permanent_failure", attempt_time,
+                                 error="DISCORD_ACCESS_DENIED", increment=True)
                 return "permanent_failure"
             except discord.HTTPException as exc:
                 transient = exc.status == 429 or exc.status >= 500
                 if not transient:
-                    self._record(data["event_id"], "permanent_failure", attempt_time,
-                                 error="DISCORD_PERMANENT_FAILURE", increment=True)
+                    await self._save(data["event_id"], "permanent_failure", attempt_time,
+                                     error="DISCORD_PERMANENT_FAILURE", increment=True)
                     return "permanent_failure"
-                self._record(data["event_id"], "publication_pending", attempt_time, increment=True)
+                await self._save(data["event_id"], "publication_pending", attempt_time, increment=True)
             except OSError:
-                self._record(data["event_id"], "publication_pending", attempt_time, increment=True)
+                await self._save(data["event_id"], "publication_pending", attempt_time, increment=True)
             if attempt < batch_attempts - 1:
                 await self.sleep(2 ** attempt)
-        self._record(data["event_id"], "retryable_failure", datetime.now(timezone.utc),
-                     error="DISCORD_TEMPORARY_FAILURE")
+        await self._save(data["event_id"], "retryable_failure", datetime.now(timezone.utc),
+                         error="DISCORD_TEMPORARY_FAILURE")
         logger.warning("Signal publication failed with safe code DISCORD_TEMPORARY_FAILURE")
         return "retryable_failure"
 
@@ -295,17 +317,16 @@ class SignalPublisher:
 
     def diagnostics(self, now=None):
         now = now or datetime.now(timezone.utc)
-        conn = database.get_connection()
-        pending = conn.execute(
-            "SELECT COUNT(*) AS count FROM future_btc_signal_publications "
-            "WHERE state IN ('received','publication_pending','retryable_failure')").fetchone()["count"]
-        last = conn.execute(
-            "SELECT * FROM future_btc_signal_publications WHERE state='published' "
-            "ORDER BY published_at DESC LIMIT 1").fetchone()
-        error = conn.execute(
-            "SELECT safe_error_code FROM future_btc_signal_publications "
-            "WHERE safe_error_code IS NOT NULL ORDER BY last_publication_attempt DESC LIMIT 1").fetchone()
-        conn.close()
+        with database.connection() as conn:
+            pending = conn.execute(
+                "SELECT COUNT(*) AS count FROM future_btc_signal_publications "
+                "WHERE state IN ('received','publication_pending','retryable_failure')").fetchone()["count"]
+            last = conn.execute(
+                "SELECT * FROM future_btc_signal_publications WHERE state='published' "
+                "ORDER BY published_at DESC LIMIT 1").fetchone()
+            error = conn.execute(
+                "SELECT safe_error_code FROM future_btc_signal_publications "
+                "WHERE safe_error_code IS NOT NULL ORDER BY last_publication_attempt DESC LIMIT 1").fetchone()
         channel = str(self.config.channel_id or "")
         last_time = last["published_at"] if last else None
         eligible = (_timestamp(last_time, "published_at") + WEEKLY_WINDOW
@@ -344,22 +365,48 @@ async def handle_request(request):
     # Railway and similar proxies terminate TLS, then provide the original scheme.
     if not request.secure and request.headers.get("X-Forwarded-Proto", "").lower() != "https":
         return _json_response(web, {"error": "HTTPS_REQUIRED"}, status=400)
-    body = await request.read()
-    if len(body) > MAX_BODY_BYTES:
+    if request.content_length is not None and request.content_length > MAX_BODY_BYTES:
         return _json_response(web, {"error": "PAYLOAD_TOO_LARGE"}, status=413)
-    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER)):
+    secret = os.getenv("SIGBALBOT_RELAY_SECRET", "")
+    supplied = request.headers.get(SIGNATURE_HEADER)
+    if not secret or not supplied:
+        return _json_response(web, {"error": "INVALID_SIGNATURE"}, status=401)
+    try:
+        body, expected = await read_signed_body(request, secret, MAX_BODY_BYTES)
+    except PayloadTooLarge:
+        return _json_response(web, {"error": "PAYLOAD_TOO_LARGE"}, status=413)
+    if not signature_matches(expected, supplied):
         return _json_response(web, {"error": "INVALID_SIGNATURE"}, status=401)
     try:
         data = validate_payload(json.loads(body))
     except (json.JSONDecodeError, ContractError) as exc:
         code = str(exc) if isinstance(exc, ContractError) else "INVALID_JSON"
         return _json_response(web, {"error": code}, status=400)
-    created = store_event(data)
+    created = await adb.run_write(store_event, data)
     if _publisher is not None:
-        publication = await _publisher.publish(data)
+        # Reserve now so the weekly limit still answers 429; the send itself is
+        # queued in the same transaction and drained by the outbox dispatcher.
+        publication = await _publisher.reserve(data, queue=True)
         if publication == "weekly_limited":
             return _json_response(web, {"error": "WEEKLY_PUBLICATION_LIMIT"}, status=429)
-        if publication == "retryable_failure":
-            return _json_response(
-                web, {"error": "DISCORD_TEMPORARY_FAILURE", "stored": True}, status=503)
+        if publication == "reserved":
+            outbox.wake()
+            return _json_response(web, {"status": "accepted", "duplicate": not created}, status=202)
     return _json_response(web, {"status": "accepted", "duplicate": not created})
+
+
+async def deliver_queued(data):
+    """Outbox handler: send one reserved event, leaving retries to the dispatcher."""
+    if _publisher is None:
+        raise outbox.RetryDelivery("PUBLISHER_NOT_READY")
+    now = datetime.now(timezone.utc)
+    if _timestamp(data["valid_until"], "valid_until") <= now:
+        await _publisher._save(data["event_id"], "permanent_failure", now, error="STALE_EVENT")
+        raise outbox.DeliveryFailed("STALE_EVENT")
+    publication = await _publisher.send(data, now, attempts=1)
+    if publication == "retryable_failure":
+        raise outbox.RetryDelivery("DISCORD_TEMPORARY_FAILURE")
+    if publication == "permanent_failure":
+        # The specific safe code is already on the publication row
+        raise outbox.DeliveryFailed("PUBLICATION_FAILED")
+    return publication
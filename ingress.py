@@ -0,0 +1,46 @@
+"""Standalone webhook ingress: ``python -m ingress``.
+
+Serves the webhook and ``/health/*`` routes in their own process, so intake
+keeps answering while the bot reconnects or restarts and never competes with
+gateway heartbeats. Accepted events go into the shared SQLite delivery
+outbox; run the bot with ``WEBHOOK_SERVER_MODE=external`` and its dispatcher
+delivers them. Both processes must point ``THRONOS_DB_PATH`` at the same file.
+"""
+import logging
+import os
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+import database
+from async_database import adb
+from webhook_server import WebhookServer, listen_port
+
+logger = logging.getLogger("thronos_bot.ingress")
+
+
+def build_app():
+    database.configure(os.getenv("THRONOS_DB_PATH") or None)
+    if database.DB_PATH == database.MEMORY_DB_PATH:
+        raise SystemExit("The ingress needs a file database shared with the bot; set THRONOS_DB_PATH")
+    server = WebhookServer()
+
+    async def shutdown(app):
+        await adb.close()
+        database.close_pool()
+
+    server.app.on_cleanup.append(shutdown)
+    return server.app
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    port = listen_port()
+    logger.info("Starting webhook ingress on port %d", port)
+    web.run_app(build_app(), host='0.0.0.0', port=port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""In-memory leaderboard ranking kept in step with the batched XP write path."""
+import logging
+from bisect import bisect_left, insort
+
+logger = logging.getLogger("thronos_bot.leaderboard_rank")
+STAT_FIELDS = ("message_count", "reaction_count", "referral_count", "xp")
+
+
+class RankIndex:
+    """Users ordered by ``(-xp, user_id)`` for binary-search rank lookups.
+
+    Ties share a rank, matching ``database.get_user_rank``. Lookups are
+    O(log n); an update moves one key within a flat list, which stays cheap
+    for community-sized tables.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._users = {}
+        self.loaded = False
+        self.last_drift = 0
+
+    def __len__(self):
+        return len(self._users)
+
+    def reconcile(self, rows):
+        """Replace the index with rows read from SQLite; return how many users drifted."""
+        users = {row["user_id"]: {
+            "user_id": row["user_id"], "username": row["username"],
+            **{field: row[field] or 0 for field in STAT_FIELDS},
+        } for row in rows}
+        drift = 0
+        if self.loaded:
+            drift = sum(
+                1 for user_id, stats in users.items()
+                if self._users.get(user_id, {}).get("xp") != stats["xp"]
+            ) + sum(1 for user_id in self._users if user_id not in users)
+        self._users = users
+        self._keys = sorted((-stats["xp"], user_id) for user_id, stats in users.items())
+        self.loaded = True
+        self.last_drift = drift
+        if drift:
+            logger.warning("Leaderboard index reconciled %d drifted user(s)", drift)
+        return drift
+
+    def apply(self, rows):
+        """Apply flushed ``XPBuffer`` rows so memory matches what was committed."""
+        for user_id, username, messages, reactions, referrals, xp, _ in rows:
+            stats = self._users.get(user_id)
+            if stats is None:
+                stats = self._users[user_id] = {
+                    "user_id": user_id, "username": username,
+                    **{field: 0 for field in STAT_FIELDS},
+                }
+            else:
+                old_key = (-stats["xp"], user_id)
+                del self._keys[bisect_left(self._keys, old_key)]
+            stats["username"] = username
+            stats["message_count"] += messages
+            stats["reaction_count"] += reactions
+            stats["referral_count"] += referrals
+            stats["xp"] += xp
+            insort(self._keys, (-stats["xp"], user_id))
+
+    def top(self, limit=10):
+        return [dict(self._users[user_id]) for _, user_id in self._keys[:limit]]
+
+    def rank(self, user_id):
+        """Return ``(rank, stats)`` or ``(None, None)`` for users the index has not seen."""
+        stats = self._users.get(user_id)
+        if stats is None:
+            return None, None
+        return bisect_left(self._keys, (-stats["xp"],)) + 1, dict(stats)
+
+    def stats(self):
+        return {"loaded": self.loaded, "users": len(self._users), "last_drift": self.last_drift}
@@ -0,0 +1,32 @@
+CREATE TABLE IF NOT EXISTS proposals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    author_id INTEGER NOT NULL,
+    author_name TEXT,
+    votes_yes INTEGER DEFAULT 0,
+    votes_no INTEGER DEFAULT 0,
+    message_id INTEGER,
+    channel_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS votes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    proposal_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    vote_type TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (proposal_id) REFERENCES proposals(id),
+    UNIQUE(proposal_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    message_count INTEGER DEFAULT 0,
+    reaction_count INTEGER DEFAULT 0,
+    referral_count INTEGER DEFAULT 0,
+    xp INTEGER DEFAULT 0,
+    last_active TIMESTAMP
+);
@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS idx_user_stats_xp ON user_stats(xp DESC);
@@ -0,0 +1,15 @@
+CREATE TABLE IF NOT EXISTS activity_rollups (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    granularity TEXT NOT NULL CHECK(granularity IN ('hour', 'day', 'month')),
+    bucket_start TEXT NOT NULL,
+    username TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    reaction_count INTEGER NOT NULL DEFAULT 0,
+    referral_count INTEGER NOT NULL DEFAULT 0,
+    xp INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, user_id, granularity, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_activity_rollups_window
+    ON activity_rollups(guild_id, bucket_start);
@@ -0,0 +1,3 @@
+-- Databases created before migrations were versioned already have this column;
+-- the runner treats a duplicate ADD COLUMN as already applied.
+ALTER TABLE user_stats ADD COLUMN wallet_address TEXT;
@@ -0,0 +1,10 @@
+-- The bot's own long-lived message per channel slot, so periodic edits can
+-- target it directly instead of scanning channel history.
+CREATE TABLE IF NOT EXISTS bot_messages (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    slot TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (guild_id, channel_id, slot)
+);
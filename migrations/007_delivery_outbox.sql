@@ -0,0 +1,19 @@
+-- Webhook-triggered Discord deliveries, persisted before the sender gets its
+-- response and drained in id order per destination by the outbox dispatcher.
+CREATE TABLE IF NOT EXISTS delivery_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT UNIQUE,
+    state TEXT NOT NULL DEFAULT 'pending' CHECK(state IN ('pending', 'delivering', 'delivered', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    finished_at REAL,
+    safe_error_code TEXT,
+    result TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_delivery_outbox_queue
+    ON delivery_outbox(state, destination, id);
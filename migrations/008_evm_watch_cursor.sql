@@ -0,0 +1,14 @@
+-- EVMWatcher resumes from this watermark after a restart. The recent-address
+-- window de-duplicates contracts that share the watermark position and is
+-- pruned to a fixed size on every save.
+CREATE TABLE IF NOT EXISTS evm_watch_cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_block INTEGER,
+    last_created_at TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS evm_seen_contracts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    address TEXT NOT NULL UNIQUE
+);
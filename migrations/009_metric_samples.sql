@@ -0,0 +1,12 @@
+-- Downsampled price/network series snapshotted by the in-memory time-series
+-- store, so 24h change and 7d trends survive a restart. Raw samples are not
+-- persisted; each resolution is pruned to what the store keeps in memory.
+CREATE TABLE IF NOT EXISTS metric_samples (
+    metric TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    close REAL NOT NULL,
+    low REAL NOT NULL,
+    high REAL NOT NULL,
+    PRIMARY KEY (metric, resolution, ts)
+) WITHOUT ROWID;
@@ -0,0 +1,248 @@
+"""Durable SQLite outbox for Discord deliveries triggered by webhooks."""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+import database
+from async_database import adb
+
+logger = logging.getLogger("thronos_bot.outbox")
+DELIVERED_RETENTION_SECONDS = 7 * 24 * 3600
+_active = None
+
+
+class RetryDelivery(Exception):
+    """A transient failure; the item is retried with backoff. ``args[0]`` is a safe code."""
+
+
+class DeliveryFailed(Exception):
+    """A permanent failure; the item is parked as ``failed``. ``args[0]`` is a safe code."""
+
+
+@dataclass(frozen=True)
+class OutboxConfig:
+    poll_seconds: float = 1.0
+    batch_size: int = 16
+    max_attempts: int = 8
+    base_backoff_seconds: float = 2.0
+    max_backoff_seconds: float = 300.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            poll_seconds=max(0.05, float(os.getenv("OUTBOX_POLL_SECONDS", "1"))),
+            max_attempts=max(1, int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))),
+        )
+
+    def backoff(self, attempts):
+        return min(self.base_backoff_seconds * 2 ** max(attempts - 1, 0), self.max_backoff_seconds)
+
+
+def insert(conn, kind, destination, payload, dedupe_key=None, now=None):
+    """Queue one delivery on ``conn`` without committing, so callers can make it
+    part of their own transaction. Returns the new id, or ``None`` for a duplicate."""
+    now = now or time.time()
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO delivery_outbox "
+        "(kind,destination,payload,dedupe_key,created_at,next_attempt_at) VALUES (?,?,?,?,?,?)",
+        (kind, destination, json.dumps(payload, separators=(",", ":")), dedupe_key, now, now))
+    return cur.lastrowid if cur.rowcount == 1 else None
+
+
+def enqueue(items, now=None):
+    """Persist ``(kind, destination, payload, dedupe_key)`` tuples in one commit.
+
+    Returns the ids of the newly queued items; duplicates are skipped.
+    """
+    with database.connection() as conn:
+        ids = [item_id for item_id in (insert(conn, *item, now=now) for item in items)
+               if item_id is not None]
+        conn.commit()
+    return ids
+
+
+def claim_due(now=None, limit=16):
+    """Mark the due head item of each destination as ``delivering`` and return them.
+
+    Only the oldest unfinished item of a destination can be claimed, so a
+    destination never has two deliveries in flight and never reorders.
+    """
+    now = now or time.time()
+    with database.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT * FROM delivery_outbox AS o WHERE state='pending' AND next_attempt_at<=? "
+            "AND id=(SELECT MIN(id) FROM delivery_outbox WHERE destination=o.destination "
+            "AND state IN ('pending','delivering')) ORDER BY id LIMIT ?", (now, limit)).fetchall()
+        conn.executemany("UPDATE delivery_outbox SET state='delivering' WHERE id=?",
+                         [(row["id"],) for row in rows])
+        conn.commit()
+    return [dict(row) for row in rows]
+
+
+def finish(item_id, state, now=None, error=None, result=None, retry_at=None):
+    """Record a delivery attempt: ``delivered``, ``failed``, or back to ``pending``."""
+    now = now or time.time()
+    with database.connection() as conn:
+        conn.execute(
+            "UPDATE delivery_outbox SET state=?, attempts=attempts+1, safe_error_code=?, result=?, "
+            "next_attempt_at=COALESCE(?, next_attempt_at), "
+            "finished_at=CASE WHEN ? IN ('delivered','failed') THEN ? ELSE NULL END WHERE id=?",
+            (state, error, result, retry_at, state, now, item_id))
+        conn.commit()
+
+
+def recover_inflight():
+    """Return items left ``delivering`` by a crash to the queue (at-least-once delivery)."""
+    with database.connection() as conn:
+        cur = conn.execute("UPDATE delivery_outbox SET state='pending' WHERE state='delivering'")
+        conn.commit()
+        return cur.rowcount
+
+
+def purge_finished(before):
+    with database.connection() as conn:
+        cur = conn.execute(
+            "DELETE FROM delivery_outbox WHERE state IN ('delivered','failed') AND finished_at<?",
+            (before,))
+        conn.commit()
+        return cur.rowcount
+
+
+def stats(now=None):
+    now = now or time.time()
+    with database.connection() as conn:
+        queued = conn.execute(
+            "SELECT COUNT(*) AS depth, MIN(created_at) AS oldest FROM delivery_outbox "
+            "WHERE state IN ('pending','delivering')").fetchone()
+        states = dict(conn.execute(
+            "SELECT state, COUNT(*) FROM delivery_outbox GROUP BY state").fetchall())
+        recent = conn.execute(
+            "SELECT COUNT(*) FROM delivery_outbox WHERE state='delivered' AND finished_at>=?",
+            (now - 3600,)).fetchone()[0]
+    return {
+        "depth": queued["depth"],
+        "oldest_age_seconds": round(now - queued["oldest"], 3) if queued["oldest"] else 0.0,
+        "states": states,
+        "delivered_last_hour": recent,
+    }
+
+
+def wake():
+    """Nudge the running dispatcher after an in-process enqueue."""
+    if _active is not None:
+        _active.wake()
+
+
+class OutboxDispatcher:
+    """Drain the outbox with retries, backoff and per-destination ordering.
+
+    ``handlers`` maps an item's ``kind`` to ``async handler(payload)``. A
+    return value is stored as the item's result; ``RetryDelivery`` and
+    unexpected exceptions schedule a retry, ``DeliveryFailed`` parks the item.
+    """
+
+    def __init__(self, handlers, config=None):
+        self.handlers = dict(handlers)
+        self.config = config or OutboxConfig.from_env()
+        self._wakeup = None
+        self._task = None
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_drain_seconds = 0.0
+
+    def start(self):
+        global _active
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            _active = self
+
+    async def close(self):
+        global _active
+        task, self._task = self._task, None
+        if _active is self:
+            _active = None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        recovered = await adb.run_write(recover_inflight)
+        if recovered:
+            logger.warning("Requeued %d outbox item(s) interrupted mid-delivery", recovered)
+        last_purge = 0.0
+        while True:
+            try:
+                await self.drain()
+                if time.time() - last_purge > 3600:
+                    last_purge = time.time()
+                    await adb.run_write(purge_finished, last_purge - DELIVERED_RETENTION_SECONDS)
+            except Exception as error:
+                logger.error("Outbox dispatch failed [%s]", type(error).__name__)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.config.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def drain(self):
+        """Deliver everything currently due; returns the number of attempts made."""
+        started = time.perf_counter()
+        attempts = 0
+        while True:
+            items = await adb.run_write(claim_due, None, self.config.batch_size)
+            if not items:
+                break
+            attempts += len(items)
+            await asyncio.gather(*(self._deliver(item) for item in items))
+        self.last_drain_seconds = time.perf_counter() - started
+        return attempts
+
+    async def _deliver(self, item):
+        attempt = item["attempts"] + 1
+        handler = self.handlers.get(item["kind"])
+        try:
+            if handler is None:
+                raise DeliveryFailed("UNKNOWN_KIND")
+            result = await handler(json.loads(item["payload"]))
+        except DeliveryFailed as error:
+            await self._finish(item, "failed", error=str(error.args[0]) if error.args else "DELIVERY_FAILED")
+            return
+        except Exception as error:
+            code = (error.args[0] if isinstance(error, RetryDelivery) and error.args
+                    else type(error).__name__)
+            if attempt >= self.config.max_attempts:
+                await self._finish(item, "failed", error=str(code))
+                return
+            self.retried += 1
+            retry_at = time.time() + self.config.backoff(attempt)
+            await adb.run_write(finish, item["id"], "pending", error=str(code), retry_at=retry_at)
+            logger.warning("Outbox %s item %d retry %d [%s]", item["kind"], item["id"], attempt, code)
+            return
+        await self._finish(item, "delivered", result=None if result is None else str(result))
+
+    async def _finish(self, item, state, error=None, result=None):
+        await adb.run_write(finish, item["id"], state, error=error, result=result)
+        if state == "delivered":
+            self.delivered += 1
+        else:
+            self.failed += 1
+            logger.warning("Outbox %s item %d failed [%s]", item["kind"], item["id"], error)
+
+    def stats(self):
+        return {
+            "running": self._task is not None,
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed,
+            "last_drain_seconds": round(self.last_drain_seconds, 6),
+        }
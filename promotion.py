@@ -9,6 +9,7 @@ from urllib.parse import urlparse
 import discord
 
 import database
+from async_database import adb
 
 logger = logging.getLogger("thronos_bot.promotion")
 CAMPAIGN = "sigbalbot_ecosystem"
@@ -80,8 +81,7 @@ class PromotionService:
         self.bot, self.config, self.sleep = bot, config, sleep
 
     def reserve(self, today):
-        conn = database.get_connection()
-        try:
+        with database.connection() as conn:
             cur = conn.execute(
                 "INSERT INTO community_promotions "
                 "(campaign,destination,promotion_date,status,attempt_count) VALUES (?,?,?,?,1) "
@@ -91,12 +91,9 @@ class PromotionService:
                 (CAMPAIGN, str(self.config.channel_id), today.isoformat(), "reserved"))
             conn.commit()
             return cur.rowcount == 1
-        finally:
-            conn.close()
 
     def _update(self, today, status, message_id=None, error=None):
-        conn = database.get_connection()
-        try:
+        with database.connection() as conn:
             conn.execute(
                 "UPDATE community_promotions SET status=?, discord_message_id=?, "
                 "delivered_at=CASE WHEN ?='delivered' THEN CURRENT_TIMESTAMP ELSE delivered_at END, "
@@ -105,47 +102,47 @@ class PromotionService:
                 (status, message_id, status, error, CAMPAIGN,
                  str(self.config.channel_id), today.isoformat()))
             conn.commit()
-        finally:
-            conn.close()
+
+    async def _save(self, *args, **kwargs):
+        await adb.run_write(self._update, *args, **kwargs)
 
     async def run_once(self, now=None):
         if not self.config.enabled:
             return "disabled"
         today = (now or datetime.now(timezone.utc)).date()
-        if not self.reserve(today):
+        if not await adb.run_write(self.reserve, today):
             return "suppressed"
         channel = self.bot.get_channel(self.config.channel_id)
         if channel is None:
-            self._update(today, "permanent_failure", error="CHANNEL_NOT_FOUND")
+            await self._save(today, "permanent_failure", error="CHANNEL_NOT_FOUND")
             return "permanent_failure"
         for attempt in range(3):
             try:
                 message = await channel.send(
                     build_message(self.config),
                     allowed_mentions=discord.AllowedMentions.none())
-                self._update(today, "delivered", str(message.id))
+                await self._save(today, "delivered", str(message.id))
                 return "delivered"
             except (discord.Forbidden, discord.NotFound):
-                self._update(today, "permanent_failure", error="DISCORD_ACCESS_DENIED")
+                await self._save(today, "permanent_failure", error="DISCORD_ACCESS_DENIED")
                 return "permanent_failure"
             except (discord.HTTPException, OSError):
                 if attempt < 2:
                     await self.sleep(2 ** attempt)
-        self._update(today, "retryable", error="DISCORD_TRANSIENT")
+        await self._save(today, "retryable", error="DISCORD_TRANSIENT")
         logger.warning("Community promotion failed with safe code DISCORD_TRANSIENT")
         return "retryable"
 
     def diagnostics(self, now=None):
         today = (now or datetime.now(timezone.utc)).date()
-        conn = database.get_connection()
-        row = conn.execute(
-            "SELECT * FROM community_promotions WHERE campaign=? AND destination=? "
-            "ORDER BY promotion_date DESC LIMIT 1", (CAMPAIGN, str(self.config.channel_id))).fetchone()
-        success = conn.execute(
-            "SELECT promotion_date FROM community_promotions WHERE campaign=? AND destination=? "
-            "AND status='delivered' ORDER BY promotion_date DESC LIMIT 1",
-            (CAMPAIGN, str(self.config.channel_id))).fetchone()
-        conn.close()
+        with database.connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM community_promotions WHERE campaign=? AND destination=? "
+                "ORDER BY promotion_date DESC LIMIT 1", (CAMPAIGN, str(self.config.channel_id))).fetchone()
+            success = conn.execute(
+                "SELECT promotion_date FROM community_promotions WHERE campaign=? AND destination=? "
+                "AND status='delivered' ORDER BY promotion_date DESC LIMIT 1",
+                (CAMPAIGN, str(self.config.channel_id))).fetchone()
         cid = str(self.config.channel_id or "")
         return {
             "enabled": self.config.enabled,
@@ -162,7 +159,7 @@ async def health_handler(request):
     from aiohttp import web
     try:
         config = PromotionConfig.from_env()
-        data = PromotionService(bot=None, config=config).diagnostics()
+        data = await adb.run_read(PromotionService(bot=None, config=config).diagnostics)
     except (ValueError, TypeError):
         data = {"enabled": False, "last_safe_error_code": "INVALID_CONFIG"}
     return web.json_response(data)
@@ -0,0 +1,140 @@
+"""Per-route, per-client sliding-window rate limiting for the webhook server."""
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+from aiohttp import web
+
+logger = logging.getLogger("thronos_bot.rate_limiter")
+
+# Route -> (env var, default "max/window_seconds")
+ROUTE_LIMITS = {
+    "/pytheia/alert": ("PYTHEIA_ALERT_RATE_LIMIT", "10/60"),
+    "/sigbalbot/free-btc-signal": ("FREE_BTC_SIGNAL_RATE_LIMIT", "30/60"),
+}
+MAX_TRACKED_CLIENTS = 10_000
+
+
+def parse_limit(value):
+    """Parse ``"<max>/<window seconds>"``; ``None`` means the route is unlimited."""
+    value = (value or "").strip().lower()
+    if value in {"", "0", "off", "none"}:
+        return None
+    count, _, window = value.partition("/")
+    count, window = int(count), float(window or 60)
+    if count < 1 or window <= 0:
+        raise ValueError(value)
+    return count, window
+
+
+def limits_from_env():
+    limits = {}
+    for route, (name, default) in ROUTE_LIMITS.items():
+        try:
+            limits[route] = parse_limit(os.getenv(name, default))
+        except ValueError:
+            logger.warning("Ignoring invalid %s; using %s", name, default)
+            limits[route] = parse_limit(default)
+    return {route: limit for route, limit in limits.items() if limit is not None}
+
+
+def trusted_proxy_hops():
+    return max(0, int(os.getenv("WEBHOOK_TRUSTED_PROXY_HOPS", "0")))
+
+
+def client_address(request, proxy_hops=0):
+    """The caller's IP; with ``proxy_hops`` trusted proxies, read it from X-Forwarded-For.
+
+    Entries are taken from the right, because everything left of what our own
+    proxies appended is supplied by the client and can be forged.
+    """
+    if proxy_hops:
+        hops = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+        if len(hops) >= proxy_hops:
+            return hops[-proxy_hops]
+    return request.remote or "unknown"
+
+
+class SlidingWindowLimiter:
+    """Allow ``limit`` hits per ``window`` seconds for each key.
+
+    Each key keeps a deque of its recent hit times, so a check only pops the
+    expired entries from the left: O(1) amortised. Keys are held in LRU order
+    and the least recently seen is dropped past ``max_keys``, which bounds
+    memory under a flood of distinct addresses.
+    """
+
+    def __init__(self, limit, window, max_keys=MAX_TRACKED_CLIENTS, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self._hits = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def hit(self, key):
+        """Record a hit; return 0 if allowed, else the seconds until one is."""
+        now = self.clock()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+            if len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+        cutoff = now - self.window
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            self.rejected += 1
+            return hits[0] - cutoff
+        hits.append(now)
+        self.allowed += 1
+        return 0
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "window_seconds": self.window,
+            "clients": len(self._hits),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+class RateLimiter:
+    """One ``SlidingWindowLimiter`` per configured route, keyed by client address."""
+
+    def __init__(self, limits=None, proxy_hops=None, clock=time.monotonic):
+        limits = limits_from_env() if limits is None else limits
+        self.proxy_hops = trusted_proxy_hops() if proxy_hops is None else proxy_hops
+        self.routes = {route: SlidingWindowLimiter(count, window, clock=clock)
+                       for route, (count, window) in limits.items()}
+
+    def check(self, request):
+        """Return 0 for an allowed (or unlimited) request, else the Retry-After seconds."""
+        limiter = self.routes.get(request.path)
+        if limiter is None:
+            return 0
+        return limiter.hit(client_address(request, self.proxy_hops))
+
+    def middleware(self):
+        @web.middleware
+        async def rate_limit(request, handler):
+            retry_after = self.check(request)
+            if retry_after:
+                # Counted in stats(); a log line per rejection would feed a flood
+                logger.debug("Rate limit exceeded on %s", request.path)
+                return web.json_response(
+                    {"error": "RATE_LIMITED"}, status=429,
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                    dumps=lambda value: json.dumps(value, separators=(",", ":")))
+            return await handler(request)
+        return rate_limit
+
+    def stats(self):
+        return {route: limiter.stats() for route, limiter in self.routes.items()}
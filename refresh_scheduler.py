@@ -0,0 +1,64 @@
+"""Per-key refresh scheduler that coalesces bursts of updates into few edits."""
+import asyncio
+import logging
+
+logger = logging.getLogger("thronos_bot.refresh_scheduler")
+
+
+class RefreshScheduler:
+    """Run ``refresh(key)`` at most once per ``interval`` for each key.
+
+    The first request for an idle key refreshes immediately; requests arriving
+    while that refresh runs or during the following interval collapse into a
+    single trailing refresh. A key stays scheduled until a refresh starts after
+    its last request, so the final state is always rendered.
+    """
+
+    def __init__(self, refresh, interval=2.0):
+        self.refresh = refresh
+        self.interval = interval
+        self._dirty = set()
+        self._tasks = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def request(self, key):
+        self.requests += 1
+        if key in self._dirty:
+            self.coalesced += 1
+        self._dirty.add(key)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    async def _run(self, key):
+        try:
+            while key in self._dirty:
+                self._dirty.discard(key)
+                try:
+                    await self.refresh(key)
+                    self.refreshes += 1
+                except Exception:
+                    self.failures += 1
+                    logger.exception("Refresh failed for %s", key)
+                await asyncio.sleep(self.interval)
+        finally:
+            self._tasks.pop(key, None)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dirty.clear()
+
+    def stats(self):
+        return {
+            "interval_seconds": self.interval,
+            "requests": self.requests,
+            "refreshes": self.refreshes,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "scheduled": len(self._tasks),
+        }
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database
+from xp_buffer import BufferConfig, XPBuffer
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+def rollups():
+    with database.connection() as conn:
+        return [dict(r) for r in conn.execute(
+            "SELECT granularity, bucket_start, guild_id, user_id, xp FROM activity_rollups "
+            "ORDER BY granularity, bucket_start, guild_id, user_id")]
+
+
+def test_period_starts_are_calendar_aligned():
+    now = datetime(2026, 8, 14, 15, 30, tzinfo=timezone.utc)  # a Friday
+    assert database.activity_period_start("day", now) == "2026-08-14 00:00:00"
+    assert database.activity_period_start("week", now) == "2026-08-10 00:00:00"
+    assert database.activity_period_start("month", now) == "2026-08-01 00:00:00"
+    with pytest.raises(ValueError):
+        database.activity_period_start("year", now)
+
+
+def test_buffer_writes_hourly_rollups_per_guild():
+    buffer = XPBuffer(BufferConfig(10, 100))
+    at = datetime(2026, 8, 14, 12, 5, tzinfo=timezone.utc)
+    buffer.add(1, "alice", messages=1, guild_id=10, now=at)
+    buffer.add(1, "alice", messages=1, guild_id=10, now=at + timedelta(minutes=30))
+    buffer.add(1, "alice", reactions=1, guild_id=20, now=at)
+    buffer.add(2, "bob", messages=1, guild_id=10, now=at + timedelta(hours=1))
+    buffer.add(2, "bob", messages=1, now=at)  # direct message: global stats only
+    asyncio.run(buffer.flush())
+
+    assert rollups() == [
+        {"granularity": "hour", "bucket_start": "2026-08-14 12:00:00", "guild_id": 10, "user_id": 1, "xp": 20},
+        {"granularity": "hour", "bucket_start": "2026-08-14 12:00:00", "guild_id": 20, "user_id": 1, "xp": 5},
+        {"granularity": "hour", "bucket_start": "2026-08-14 13:00:00", "guild_id": 10, "user_id": 2, "xp": 10},
+    ]
+    assert database.get_user_rank(2)[1]["xp"] == 20
+    guild = database.get_activity_leaderboard("2026-08-14 00:00:00", guild_id=10)
+    assert [(u["user_id"], u["xp"]) for u in guild] == [(1, 20), (2, 10)]
+    everywhere = database.get_activity_leaderboard("2026-08-14 00:00:00")
+    assert [(u["user_id"], u["xp"]) for u in everywhere] == [(1, 25), (2, 10)]
+
+
+def test_compaction_preserves_totals_and_current_periods():
+    now = datetime(2026, 8, 14, 12, tzinfo=timezone.utc)
+    activity = []
+    for days_ago in (0, 1, 3, 5, 70, 75):
+        bucket = database.activity_hour_bucket(now - timedelta(days=days_ago))
+        activity.append((10, 1, bucket, "alice", 1, 0, 0, 10))
+    database.apply_user_stats_batch([], activity)
+    week_before = database.get_activity_leaderboard(database.activity_period_start("week", now))
+    month_before = database.get_activity_leaderboard(database.activity_period_start("month", now))
+
+    hours, days = database.compact_activity_rollups(now)
+    assert hours == 4 and days == 1
+    assert {r["granularity"] for r in rollups()} == {"hour", "day", "month"}
+    assert len(rollups()) == 6
+    assert database.get_activity_leaderboard(database.activity_period_start("week", now)) == week_before
+    assert database.get_activity_leaderboard(database.activity_period_start("month", now)) == month_before
+    assert database.get_activity_leaderboard("")[0]["xp"] == 60
+    assert database.compact_activity_rollups(now) == (0, 0)
+
+
+def test_renamed_users_keep_their_newest_name_through_compaction():
+    now = datetime(2026, 8, 14, 12, tzinfo=timezone.utc)
+    day = now - timedelta(days=5)
+    activity = [(10, 1, database.activity_hour_bucket(day + timedelta(hours=hours)), name, 1, 0, 0, 10)
+                for hours, name in ((-2, "zed"), (-1, "alice"))]
+    database.apply_user_stats_batch([], activity)
+
+    assert database.get_activity_leaderboard("")[0]["username"] == "alice"
+    database.compact_activity_rollups(now)
+    with database.connection() as conn:
+        names = {r[0] for r in conn.execute("SELECT username FROM activity_rollups")}
+    assert names == {"alice"}
+    assert database.get_activity_leaderboard("")[0]["username"] == "alice"
+
+    # Once user_stats knows the current name, that one wins
+    database.apply_user_stats_batch([(1, "zoe", 0, 0, 0, 0, now.isoformat())], [])
+    assert database.get_activity_leaderboard("")[0]["username"] == "zoe"
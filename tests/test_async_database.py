@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+import database
+from async_database import AsyncDatabase
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test.db"))
+    database.init_db()
+
+
+def test_helpers_run_off_the_event_loop_thread():
+    adb = AsyncDatabase(readers=2, queue_size=4)
+    loop_thread = threading.get_ident()
+    seen = []
+
+    def record_thread(user_id):
+        seen.append(threading.current_thread().name)
+        assert threading.get_ident() != loop_thread
+        return user_id
+
+    async def scenario():
+        await adb.update_user_stats(1, "alice", messages=2)
+        assert await adb.run_read(record_thread, 7) == 7
+        await adb.run_write(record_thread, 8)
+        rank, stats = await adb.get_user_rank(1)
+        await adb.close()
+        return rank, stats
+
+    rank, stats = asyncio.run(scenario())
+    assert rank == 1 and stats["xp"] == 20
+    assert seen[0].startswith("db-reader") and seen[1].startswith("db-writer")
+
+
+def test_writes_are_serialized_on_one_thread():
+    adb = AsyncDatabase(readers=2, queue_size=64)
+    writers = set()
+
+    def write(user_id):
+        writers.add(threading.current_thread().name)
+        database.update_user_stats(user_id, "bulk", reactions=1)
+
+    async def scenario():
+        await asyncio.gather(*[adb.run_write(write, i % 5) for i in range(50)])
+        await adb.close()
+
+    asyncio.run(scenario())
+    assert len(writers) == 1
+    assert [row["xp"] for row in database.get_leaderboard(5)] == [50] * 5
+
+
+def test_queue_is_bounded_and_errors_propagate():
+    adb = AsyncDatabase(readers=1, queue_size=2)
+    release = threading.Event()
+
+    def blocked():
+        release.wait(5)
+
+    def broken():
+        raise ValueError("boom")
+
+    async def scenario():
+        tasks = [asyncio.create_task(adb.run_write(blocked)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        assert adb.stats()["pending"] == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        with pytest.raises(ValueError):
+            await adb.run_read(broken)
+        await adb.close()
+
+    asyncio.run(scenario())
+    stats = adb.stats()
+    assert stats["queue_waits"] >= 2 and stats["failed"] == 1
+    # Failures are not counted as completed calls
+    assert stats["completed"] == 4
@@ -0,0 +1,25 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.broadcast import fan_out
+
+
+def test_fan_out_bounds_concurrency_and_records_failures():
+    active = {"now": 0, "peak": 0}
+
+    async def deliver(guild):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        if guild.id == 3:
+            raise PermissionError("missing access")
+        return guild.id % 4 != 0
+
+    guilds = [SimpleNamespace(id=i) for i in range(1, 13)]
+    result = asyncio.run(fan_out(guilds, deliver, concurrency=3))
+    assert active["peak"] == 3
+    assert (result.delivered, result.skipped) == (8, 3)
+    assert result.failures == {3: "PermissionError"}
+    summary = result.summary()
+    assert summary["failed"] == 1 and summary["deliver_seconds"] < 0.2
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from chain_events import ChainEvent, ChainEventStream, EventBus, StreamConfig
+from thronos_api import ClientConfig, ThronosAPIClient
+
+
+class FakeChainStream:
+    """SSE server that plays one scripted session per connection.
+
+    Each session is a list of ``(event, id, data)`` tuples, ``":"`` comment
+    lines, or ``"stall"`` to go silent without closing the connection.
+    """
+
+    def __init__(self, sessions):
+        self.sessions = list(sessions)
+        self.resume_ids = []
+
+    async def handle(self, request):
+        self.resume_ids.append(request.headers.get("Last-Event-ID"))
+        if not self.sessions:
+            return web.Response(status=503)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for item in self.sessions.pop(0):
+            if item == "stall":
+                await asyncio.sleep(3600)
+            elif isinstance(item, str):
+                await response.write(f"{item}\n".encode())
+            else:
+                event, event_id, data = item
+                await response.write(f"event: {event}\nid: {event_id}\ndata: {json.dumps(data)}\n\n".encode())
+        return response
+
+
+async def _stream(fake, until, **config):
+    app = web.Application()
+    app.router.add_get("/api/events/stream", fake.handle)
+    server = TestServer(app)
+    await server.start_server()
+    api = ThronosAPIClient(ClientConfig(base_url=str(server.make_url("/api"))))
+    await api.start()
+    stream = ChainEventStream(api, EventBus(), StreamConfig(min_backoff_seconds=0.01, **config))
+    received = []
+
+    async def record(event):
+        received.append((event.type, event.id, event.data))
+
+    for event_type in ("contract_deployed", "price", "network_stats"):
+        stream.bus.subscribe(event_type, record)
+    stream.start()
+    try:
+        for _ in range(200):
+            if until(stream, received):
+                break
+            await asyncio.sleep(0.01)
+        return stream.stats(), received
+    finally:
+        await stream.close()
+        await api.close()
+        await server.close()
+
+
+def test_events_are_published_and_resumed_after_reconnect():
+    fake = FakeChainStream([
+        [": keep-alive", ("contract_deployed", "1", {"address": "0xabc"}), ("price", "2", {"thr_usd_rate": 0.5})],
+        [("unknown", "3", {}), ("network_stats", "4", {"tx_count": 9}), "stall"],
+    ])
+
+    stats, received = asyncio.run(_stream(fake, lambda s, r: len(r) == 3 and s.live))
+
+    assert received == [("contract_deployed", "1", {"address": "0xabc"}),
+                        ("price", "2", {"thr_usd_rate": 0.5}),
+                        ("network_stats", "4", {"tx_count": 9})]
+    # The second connection resumed from the last event the first one delivered
+    assert fake.resume_ids[:2] == [None, "2"]
+    assert stats["live"] and stats["last_event_id"] == "4"
+    assert (stats["connects"], stats["disconnects"]) == (2, 1)
+
+
+def test_silent_stream_is_dropped_after_the_heartbeat_timeout():
+    fake = FakeChainStream([[("price", "7", {"thr_usd_rate": 1.0}), "stall"]])
+
+    stats, received = asyncio.run(_stream(
+        fake, lambda s, r: s.heartbeat_timeouts and len(fake.resume_ids) > 1, heartbeat_seconds=0.1))
+
+    assert received == [("price", "7", {"thr_usd_rate": 1.0})]
+    assert stats["heartbeat_timeouts"] == 1
+    # The reconnect got a 503, so the bot is back on polling
+    assert not stats["live"]
+    assert fake.resume_ids[1] == "7"
+
+
+def test_failing_handlers_do_not_affect_other_subscribers():
+    seen = []
+
+    async def broken(event):
+        raise RuntimeError("boom")
+
+    async def working(event):
+        seen.append(event.data)
+
+    async def scenario():
+        bus = EventBus()
+        bus.subscribe("price", broken)
+        bus.subscribe("price", working)
+        bus.publish(ChainEvent("price", {"thr_usd_rate": 2.0}))
+        await bus.drain()
+        return bus.stats()
+
+    stats = asyncio.run(scenario())
+    assert seen == [{"thr_usd_rate": 2.0}]
+    assert stats["failures"] == 1
@@ -0,0 +1,67 @@
+import asyncio
+import struct
+import zlib
+
+from charts import START_METHOD, ChartCache, bucket_end, render_line_chart, thin
+
+
+def test_rendered_chart_is_a_valid_png():
+    png = render_line_chart([(0, 1.0), (1, 3.0), (2, 2.0)], width=64, height=32)
+
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height, depth, color_type = struct.unpack(">IIBB", png[16:26])
+    assert (width, height, depth, color_type) == (64, 32, 8, 2)
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + idat_length])
+    assert len(raw) == 32 * (1 + 64 * 3)
+    # A flat series still renders instead of dividing by zero
+    assert render_line_chart([(0, 5.0), (1, 5.0)], width=16, height=16).startswith(b"\x89PNG")
+
+
+def test_buckets_and_thinning():
+    assert bucket_end("24h", 1000) == 1200
+    assert bucket_end("24h", 1200) == 1200
+    points = [(n, n) for n in range(1000)]
+    thinned = thin(points, 10)
+    assert len(thinned) == 10 and thinned[0] == (0, 0) and thinned[-1] == (999, 999)
+
+
+def test_concurrent_requests_share_one_render_and_one_upload():
+    points = [(n, float(n % 7)) for n in range(50)]
+
+    async def scenario():
+        cache = ChartCache(workers=1)
+        try:
+            results = await asyncio.gather(*(cache.get(("thr_usd", "24h", 1200), points, width=80, height=40)
+                                             for _ in range(5)))
+            entries = {id(entry) for entry, _ in results}
+            uploaders = [uploader for _, uploader in results]
+            cache.uploaded(results[0][0], "https://cdn.example/chart.png")
+            url = await results[1][0].url
+            # The next bucket is a new image
+            await cache.get(("thr_usd", "24h", 1500), points, width=80, height=40)
+            return entries, uploaders, url, cache.stats()
+        finally:
+            await cache.close()
+
+    entries, uploaders, url, stats = asyncio.run(scenario())
+    assert len(entries) == 1
+    assert uploaders.count(True) == 1
+    assert url == "https://cdn.example/chart.png"
+    assert stats["renders"] == 2 and stats["coalesced"] == 4
+
+
+def test_pool_workers_do_not_start_by_fork():
+    points = [(0, 1.0), (1, 2.0)]
+
+    async def scenario():
+        cache = ChartCache(workers=1)
+        try:
+            entry, _ = await cache.get(("tx_count", "1h", 60), points, width=16, height=16)
+            return entry.png, cache._executor._mp_context.get_start_method()
+        finally:
+            await cache.close()
+
+    png, method = asyncio.run(scenario())
+    assert png == render_line_chart(points, width=16, height=16)
+    assert method == START_METHOD == "forkserver"
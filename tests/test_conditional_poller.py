@@ -0,0 +1,64 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from thronos_api import ClientConfig, ThronosAPIClient
+
+
+async def _run(handler, polls, **kwargs):
+    app = web.Application()
+    app.router.add_get("/api/evm/latest_contracts", handler)
+    server = TestServer(app)
+    await server.start_server()
+    client = ThronosAPIClient(ClientConfig(base_url=str(server.make_url("/api"))))
+    try:
+        poller = client.poller("/evm/latest_contracts", **kwargs)
+        results, intervals = [], []
+        for _ in range(polls):
+            results.append((await poller.poll())[0])
+            intervals.append(poller.interval)
+        return results, intervals, client.stats()
+    finally:
+        await client.close()
+        await server.close()
+
+
+def test_etag_revalidation_skips_download_and_parse():
+    body = b'{"contracts": [{"address": "0x1"}]}'
+    seen = []
+
+    async def contracts(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(body=body, content_type="application/json", headers={"ETag": '"v1"'})
+
+    results, intervals, stats = asyncio.run(
+        _run(contracts, 4, min_interval=10, max_interval=60))
+
+    assert results == [True, False, False, False]
+    assert seen == [None, '"v1"', '"v1"', '"v1"']
+    assert intervals == [10, 20, 40, 60]
+    poller = stats["pollers"]["/evm/latest_contracts"]
+    assert poller["not_modified"] == poller["skipped_parses"] == 3
+    assert poller["bytes_received"] == len(body)
+    assert poller["bytes_saved"] == 3 * len(body)
+    assert stats["endpoints"]["/evm/latest_contracts"]["errors"] == 0
+
+
+def test_identical_bodies_are_not_reparsed_and_changes_speed_polling_up():
+    bodies = [b'{"n": 1}', b'{"n": 1}', b'{"n": 1}', b'{"n": 2}', b"not json"]
+
+    async def contracts(request):
+        return web.Response(body=bodies.pop(0), content_type="application/json")
+
+    results, intervals, stats = asyncio.run(
+        _run(contracts, 5, min_interval=10, max_interval=100))
+
+    assert results == [True, False, False, True, False]
+    assert intervals == [10, 20, 40, 20, 40]
+    poller = stats["pollers"]["/evm/latest_contracts"]
+    assert poller["unchanged_bodies"] == 2
+    assert poller["changes"] == 2
+    assert poller["failures"] == 1
@@ -0,0 +1,201 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test.db"))
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+def test_pragmas_are_applied_to_pooled_connections():
+    with database.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == database.BUSY_TIMEOUT_MS
+
+
+def test_connections_are_reused_and_counted():
+    before = database.pool_stats()["checkouts"]
+    for user_id in range(20):
+        database.update_user_stats(user_id, f"user{user_id}", messages=1)
+    assert database.get_leaderboard(3)[0]["xp"] == 10
+    stats = database.pool_stats()
+    assert stats["open"] == 1
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] - before == 21
+
+
+def test_open_transaction_is_rolled_back_on_return():
+    with pytest.raises(RuntimeError):
+        with database.connection() as conn:
+            conn.execute("INSERT INTO user_stats (user_id, username) VALUES (1, 'ghost')")
+            raise RuntimeError("borrower failed")
+    assert database.get_wallet(1) is None
+    assert database.get_user_rank(1)[1] is None
+
+
+def test_pool_is_bounded_and_times_out(tmp_path):
+    pool = database.ConnectionPool(str(tmp_path / "bounded.db"), size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(database.PoolTimeout):
+            with pool.connection():
+                pass
+    assert pool.stats()["open"] == 1
+    pool.close()
+
+
+def test_concurrent_threads_share_the_pool():
+    errors = []
+
+    def worker(user_id):
+        try:
+            for _ in range(10):
+                database.update_user_stats(user_id, "worker", reactions=1)
+        except sqlite3.Error as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert database.pool_stats()["open"] <= database.POOL_SIZE
+    assert all(row["xp"] == 50 for row in database.get_leaderboard(8))
+
+
+def versions():
+    with database.connection() as conn:
+        return [row["version"] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+
+
+def test_fresh_database_applies_every_migration_once():
+    assert versions() == [version for version, _, _ in database.migration_files()]
+    with database.connection() as conn:
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(user_stats)")}
+    assert "wallet_address" in columns
+
+
+def test_opening_a_fresh_database_logs_the_applied_migrations(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "fresh.db"))
+    with caplog.at_level("INFO", logger="thronos_bot.database"):
+        database.init_db()
+    applied = [m for m in caplog.messages if m.startswith("Database migrations applied")]
+    assert len(applied) == 1 and "000_core_schema" in applied[0]
+
+
+def test_warm_boot_does_not_write():
+    conn = database.get_connection()
+    try:
+        assert database.apply_migrations(conn) == []
+        assert conn.total_changes == 0
+        assert not conn.in_transaction
+    finally:
+        conn.close()
+
+
+def test_legacy_database_is_adopted_without_data_loss(tmp_path, monkeypatch):
+    legacy = tmp_path / "legacy.db"
+    conn = sqlite3.connect(legacy)
+    conn.executescript("""
+        CREATE TABLE user_stats (user_id INTEGER PRIMARY KEY, username TEXT,
+            message_count INTEGER DEFAULT 0, reaction_count INTEGER DEFAULT 0,
+            referral_count INTEGER DEFAULT 0, xp INTEGER DEFAULT 0,
+            last_active TIMESTAMP, wallet_address TEXT);
+        INSERT INTO user_stats (user_id, username, xp, wallet_address)
+            VALUES (1, 'early', 500, '0x0000000000000000000000000000000000000001');
+    """)
+    conn.close()
+    monkeypatch.setattr(database, "DB_PATH", str(legacy))
+    database.init_db()
+    assert versions()[-1] == database.migration_files()[-1][0]
+    assert database.get_wallet(1).endswith("01")
+    assert database.get_leaderboard(1)[0]["xp"] == 500
+
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    migrations = tmp_path / "migrations"
+    migrations.mkdir()
+    (migrations / "001_first.sql").write_text("CREATE TABLE first (id INTEGER);\n")
+    (migrations / "002_broken.sql").write_text(
+        "CREATE TABLE half (id INTEGER);\nINSERT INTO missing VALUES (1);\n")
+    monkeypatch.setattr(database, "MIGRATIONS_DIR", str(migrations))
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "broken.db"))
+    with pytest.raises(sqlite3.OperationalError):
+        database.init_db()
+    conn = database.get_connection()
+    try:
+        assert [r[0] for r in conn.execute("SELECT version FROM schema_migrations")] == [1]
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert "first" in tables and "half" not in tables
+    finally:
+        conn.close()
+
+
+def test_importing_modules_does_not_touch_disk(tmp_path):
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = ("import sqlite3\n"
+            "def refuse(*args, **kwargs): raise AssertionError('connected on import')\n"
+            "sqlite3.connect = refuse\n"
+            "import database, async_database, future_btc_signal, promotion, xp_buffer, bot, ingress\n")
+    root = Path(__file__).resolve().parents[1]
+    workdir = tmp_path / "cwd"
+    workdir.mkdir()
+    env = {**os.environ, "PYTHONPATH": str(root)}
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=workdir, env=env)
+    assert list(workdir.iterdir()) == []
+
+
+def test_memory_mode_shares_one_migrated_connection(monkeypatch):
+    database.close_pool()
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    try:
+        database.configure()
+        assert database.pool_stats()["size"] == 1
+        proposal_id = database.create_proposal("In memory", "desc", 1, "alice", 2, 3)
+        assert database.get_proposal(proposal_id)["title"] == "In memory"
+    finally:
+        database.close_pool()
+
+
+def test_configure_switches_database_path(tmp_path, monkeypatch):
+    target = tmp_path / "configured" / "bot.db"
+    monkeypatch.setattr(database, "DB_PATH", database.DB_PATH)
+    database.configure(str(target))
+    assert database.DB_PATH == str(target)
+    assert target.exists()
+    assert database.get_all_proposals() == []
+
+
+def test_cast_vote_returns_fresh_tally_and_rejects_duplicates():
+    proposal_id = database.create_proposal("Tally", "desc", 1, "alice", 2, 3)
+    status, proposal = database.cast_vote(proposal_id, 10, "yes")
+    assert status == "recorded" and (proposal["votes_yes"], proposal["votes_no"]) == (1, 0)
+    status, proposal = database.cast_vote(proposal_id, 10, "no")
+    assert status == "duplicate" and (proposal["votes_yes"], proposal["votes_no"]) == (1, 0)
+    assert database.cast_vote(proposal_id + 1, 10, "yes") == ("missing", None)
+    with pytest.raises(ValueError):
+        database.cast_vote(proposal_id, 11, "maybe")
+
+
+def test_concurrent_votes_are_not_lost():
+    from concurrent.futures import ThreadPoolExecutor
+
+    proposal_id = database.create_proposal("Burst", "desc", 1, "alice", 2, 3)
+    voters = [(user_id, "yes" if user_id % 3 else "no") for user_id in range(60)]
+    with ThreadPoolExecutor(8) as pool:
+        statuses = list(pool.map(lambda v: database.cast_vote(proposal_id, *v)[0], voters + voters[:10]))
+    assert statuses.count("recorded") == 60 and statuses.count("duplicate") == 10
+    proposal = database.get_proposal(proposal_id)
+    assert (proposal["votes_yes"], proposal["votes_no"]) == (40, 20)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+import database
+from cogs import evm_watcher
+from chain_events import ChainEvent
+from conditional_poller import ConditionalPoller
+from cogs.evm_watcher import EVMWatcher
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+class Channel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embed):
+        self.sent.append(embed.description)
+
+
+def contract(n, block):
+    return {"address": f"0x{n:040x}", "deployer": "0xdead", "block_number": block}
+
+
+def make_cog(contracts, channel):
+    async def get_conditional(endpoint, etag, last_modified):
+        return 200, json.dumps({"contracts": list(contracts)}).encode(), None, None
+
+    api = SimpleNamespace(get_conditional=get_conditional)
+    cog = EVMWatcher.__new__(EVMWatcher)
+    cog.events = SimpleNamespace(live=False)
+    cog.lock = asyncio.Lock()
+    cog.bot = SimpleNamespace(api=api, guilds=[SimpleNamespace(id=1)],
+                              guild_index=SimpleNamespace(text_channel=lambda guild, name: channel))
+    cog.poller = ConditionalPoller(api, "/evm/latest_contracts")
+    cog.watermark, cog.cursor_loaded = None, False
+    cog.recent, cog._recent_set = deque(maxlen=evm_watcher.RECENT_WINDOW), set()
+    return cog
+
+
+def poll(contracts, channel):
+    """Run one tick of a freshly constructed watcher, as after a restart."""
+    cog = make_cog(contracts, channel)
+    asyncio.run(cog.watch_evm.coro(cog))
+    return cog
+
+
+def test_cursor_survives_restarts_and_caps_missed_announcements(monkeypatch):
+    monkeypatch.setattr(evm_watcher, "MAX_ANNOUNCEMENTS", 2)
+    channel = Channel()
+    known = [contract(1, 10), contract(2, 11)]
+
+    poll(known, channel)
+    assert channel.sent == []
+
+    # Three deployments while the bot was down: only the newest two are announced
+    missed = known + [contract(3, 12), contract(4, 13), contract(5, 14)]
+    poll(missed, channel)
+    assert channel.sent == [f"Address: `{c['address']}`" for c in missed[3:]]
+
+    # The next restart has nothing new to say, and the watermark moved on
+    cog = poll(missed, channel)
+    assert len(channel.sent) == 2
+    assert cog.watermark == (14, "")
+
+
+def test_recent_window_is_bounded(monkeypatch):
+    monkeypatch.setattr(evm_watcher, "RECENT_WINDOW", 3)
+    channel = Channel()
+    poll([contract(n, n) for n in range(10)], channel)
+    cog = poll([contract(n, n) for n in range(12)], channel)
+
+    assert len(cog.recent) == 3
+    assert len(channel.sent) == 2
+    with database.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM evm_seen_contracts").fetchone()[0] == 3
+
+
+def test_pushed_contracts_are_announced_straight_away():
+    channel = Channel()
+    poll([contract(1, 10)], channel)
+
+    cog = make_cog([contract(1, 10)], channel)
+    cog.events.live = True
+    asyncio.run(cog.on_contract_deployed(ChainEvent("contract_deployed", contract(3, 12), "e1")))
+    assert channel.sent == [f"Address: `{contract(3, 12)['address']}`"]
+    assert cog.watermark == (12, "")
+
+
+def test_live_but_silent_stream_still_polls_at_the_slowest_interval():
+    channel = Channel()
+    poll([contract(1, 10)], channel)
+
+    cog = make_cog([contract(1, 10), contract(2, 11)], channel)
+    cog.events.live = True
+    asyncio.run(cog.watch_evm.coro(cog))
+
+    assert cog.poller.polls == 1
+    assert channel.sent == [f"Address: `{contract(2, 11)['address']}`"]
+    assert cog.watch_evm.seconds == cog.poller.max_interval
+
+
+def test_first_push_on_a_fresh_install_is_announced():
+    channel = Channel()
+    # The snapshot already lists the pushed contract; only the others are seeded
+    cog = make_cog([contract(1, 10), contract(2, 11)], channel)
+    cog.events.live = True
+    asyncio.run(cog.on_contract_deployed(ChainEvent("contract_deployed", contract(2, 11), "e1")))
+
+    assert channel.sent == [f"Address: `{contract(2, 11)['address']}`"]
+    assert list(cog.recent)[0] == contract(1, 10)["address"]
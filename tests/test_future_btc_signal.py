@@ -89,9 +89,12 @@ def test_sender_contract_fixture_end_to_end(monkeypatch):
     class Request:
         secure = True
         headers = {fixture["signature_header"]: fixture["signature_value"]}
+        content_length = len(body)
 
-        async def read(self):
-            return body
+        class content:
+            @staticmethod
+            async def iter_chunked(size):
+                yield body
 
     real_validate = relay.validate_payload
     monkeypatch.setenv("FREE_BTC_SIGNAL_RELAY_ENABLED", "true")
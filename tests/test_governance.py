@@ -0,0 +1,55 @@
+import asyncio
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from cogs import governance
+from cogs.governance import Governance, PersistentVotingView
+
+
+class Message:
+    def __init__(self, proposal_id):
+        self.embeds = [SimpleNamespace(title=f"🏛️ Proposal #{proposal_id}: Title",
+                                       set_field_at=lambda *args, **kwargs: None)]
+        self.edits = 0
+
+    async def edit(self, embed):
+        self.edits += 1
+        return self
+
+
+class Interaction:
+    def __init__(self, message, user_id):
+        self.message = message
+        self.user = SimpleNamespace(id=user_id)
+        self.response = SimpleNamespace(send_message=self.send_message)
+
+    async def send_message(self, text, ephemeral=False):
+        pass
+
+
+def test_shared_view_routes_votes_by_message_and_drops_rendered_tallies(monkeypatch):
+    cast = []
+
+    async def cast_vote(proposal_id, user_id, vote_type):
+        cast.append(proposal_id)
+        return "recorded", {"id": proposal_id, "votes_yes": 1, "votes_no": 0}
+
+    monkeypatch.setattr(governance.adb, "cast_vote", cast_vote, raising=False)
+    cog = Governance.__new__(Governance)
+    cog._messages, cog._tallies = OrderedDict(), {}
+    requested = []
+    cog.refresher = SimpleNamespace(request=requested.append)
+    view = PersistentVotingView(cog)
+    first, second = Message(1), Message(2)
+
+    async def scenario():
+        await view.register_vote(Interaction(first, 10), "yes")
+        await view.register_vote(Interaction(second, 10), "yes")
+        for proposal_id in requested:
+            await cog.update_proposal_embed(proposal_id)
+
+    asyncio.run(scenario())
+    assert cast == [1, 2]
+    assert cog._messages == {1: first, 2: second}
+    assert (first.edits, second.edits) == (1, 1)
+    assert cog._tallies == {}
@@ -0,0 +1,98 @@
+import asyncio
+
+import discord
+
+from utils.guild_index import GuildIndex, load_overrides
+
+
+def fake(cls):
+    class Fake(cls):
+        def __init__(self, guild, id, name, position=0):
+            self.guild, self.id, self.name, self.position = guild, id, name, position
+    return Fake
+
+
+Text, Category, Role = fake(discord.TextChannel), fake(discord.CategoryChannel), fake(discord.Role)
+
+
+class FakeGuild:
+    def __init__(self, id=1):
+        self.id = id
+        self.objects = {}
+
+    def create(self, cls, id, name, position=0):
+        self.objects[id] = cls(self, id, name, position)
+        return self.objects[id]
+
+    def _of(self, cls):
+        return sorted((o for o in self.objects.values() if isinstance(o, cls)), key=lambda o: (o.position, o.id))
+
+    @property
+    def text_channels(self):
+        return self._of(Text)
+
+    @property
+    def categories(self):
+        return self._of(Category)
+
+    @property
+    def roles(self):
+        return self._of(Role)
+
+    def get_channel(self, id):
+        obj = self.objects.get(id)
+        return obj if not isinstance(obj, Role) else None
+
+    def get_role(self, id):
+        obj = self.objects.get(id)
+        return obj if isinstance(obj, Role) else None
+
+
+def test_lookups_match_name_scans_and_follow_events():
+    guild = FakeGuild()
+    general = guild.create(Text, 10, "general", position=2)
+    guild.create(Text, 11, "general", position=5)
+    guild.create(Category, 12, "general", position=0)
+    thronidian = guild.create(Role, 13, "Thronidian", position=1)
+    index = GuildIndex(overrides={})
+
+    assert index.text_channel(guild, "general") is general
+    assert index.text_channel(guild, "general") is discord.utils.get(guild.text_channels, name="general")
+    assert index.role(guild, "Thronidian") is thronidian
+    assert index.category(guild, "general").id == 12
+    assert index.text_channel(guild, "missing") is None
+
+    async def events():
+        created = guild.create(Text, 20, "smart-contracts")
+        await index.add(created)
+        renamed = Text(guild, 10, "lobby", position=2)
+        guild.objects[10] = renamed
+        await index.update(general, renamed)
+        await index.remove(guild.objects.pop(13))
+
+    asyncio.run(events())
+    assert index.text_channel(guild, "smart-contracts").id == 20
+    assert index.text_channel(guild, "general").id == 11
+    assert index.text_channel(guild, "lobby").id == 10
+    assert index.role(guild, "Thronidian") is None
+    assert index.stats()["rebuilds"] == 1
+
+
+def test_missed_rename_triggers_rebuild_instead_of_wrong_answer():
+    guild = FakeGuild()
+    guild.create(Text, 10, "roadmap")
+    index = GuildIndex(overrides={})
+    assert index.text_channel(guild, "roadmap").id == 10
+    guild.objects[10].name = "old-roadmap"  # no update event delivered
+    assert index.text_channel(guild, "roadmap") is None
+    assert index.text_channel(guild, "old-roadmap").id == 10
+
+
+def test_overrides_pin_renamed_channels():
+    guild = FakeGuild(id=7)
+    guild.create(Text, 30, "📊-network-stats")
+    overrides = load_overrides('{"7": {"text": {"network-stats": "30"}}, "8": {"bogus": {}}}')
+    assert overrides == {7: {"text": {"network-stats": 30}}, 8: {}}
+    index = GuildIndex(overrides=overrides)
+    assert index.text_channel(guild, "network-stats").id == 30
+    assert load_overrides("not json") == {}
@@ -0,0 +1,56 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import database
+import future_btc_signal
+import ingress
+import outbox
+from cogs.pytheia_webhook import PytheiaWebhook
+
+SECRET = "ingress-secret"
+ALERT = {"signal_type": "trade", "symbol": "THR", "action": "buy", "tx_hash": "0x" + "b" * 64}
+
+
+class Channel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embed):
+        self.sent.append(embed)
+
+
+def test_ingress_queues_alerts_for_the_bot_process(tmp_path, monkeypatch):
+    monkeypatch.setenv("THRONOS_DB_PATH", str(tmp_path / "shared.db"))
+    monkeypatch.setenv("WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(database, "DB_PATH", database.DB_PATH)
+    monkeypatch.setattr(future_btc_signal, "_publisher", None)
+    body = json.dumps(ALERT).encode()
+    signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+    async def intake():
+        async with TestClient(TestServer(ingress.build_app())) as client:
+            queued = await client.post("/pytheia/alert", data=body, headers={"X-Signature": signature})
+            webhooks = await client.get("/health/webhooks")
+            api = await client.get("/health/thronos-api")
+            return queued.status, await queued.json(), (await webhooks.json())["mode"], api.status
+
+    # The ingress has no Discord connection; it only fills the shared outbox
+    assert asyncio.run(intake()) == (202, {"status": "queued", "duplicate": False}, "ingress", 404)
+
+    channel = Channel()
+    cog = PytheiaWebhook.__new__(PytheiaWebhook)
+    cog.bot = SimpleNamespace(guilds=[SimpleNamespace(id=1)], get_guild=lambda _: SimpleNamespace(id=1),
+                              guild_index=SimpleNamespace(text_channel=lambda guild, name: channel))
+    cog.dispatcher = outbox.OutboxDispatcher(
+        {"pytheia_alert_batch": cog.expand_alert, "pytheia_alert": cog.deliver_queued_alert})
+    try:
+        asyncio.run(cog.dispatcher.drain())
+        assert len(channel.sent) == 1
+        assert outbox.stats()["depth"] == 0
+    finally:
+        database.close_pool()
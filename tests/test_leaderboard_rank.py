@@ -0,0 +1,97 @@
+import asyncio
+import random
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import database
+from leaderboard_rank import RankIndex
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+def row(user_id, messages=0, reactions=0, referrals=0, username=None):
+    xp = database.calculate_xp(messages, reactions, referrals)
+    return (user_id, username or f"user{user_id}", messages, reactions, referrals, xp,
+            "2026-08-14 12:00:00")
+
+
+def test_memory_rank_matches_sqlite_after_random_writes():
+    index = RankIndex()
+    index.reconcile(database.get_all_user_stats())
+    rng = random.Random(7)
+    for _ in range(40):
+        batch = [row(rng.randrange(15), messages=rng.randrange(4), reactions=rng.randrange(3))
+                 for _ in range(rng.randrange(1, 6))]
+        # One flush never carries the same user twice.
+        batch = list({r[0]: r for r in batch}.values())
+        database.apply_user_stats_batch(batch)
+        index.apply(batch)
+
+    assert [u["user_id"] for u in index.top(10)] == [
+        u["user_id"] for u in sorted(database.get_all_user_stats(),
+                                      key=lambda u: (-u["xp"], u["user_id"]))[:10]]
+    for user in database.get_all_user_stats():
+        assert index.rank(user["user_id"]) == (
+            database.get_user_rank(user["user_id"])[0],
+            {key: user[key] for key in user},
+        )
+
+
+def test_ties_share_a_rank_and_unknown_users_are_reported():
+    index = RankIndex()
+    index.apply([row(1, messages=1), row(2, messages=1), row(3, reactions=1)])
+    assert index.rank(1)[0] == index.rank(2)[0] == 1
+    assert index.rank(3)[0] == 3
+    assert index.rank(99) == (None, None)
+
+
+def test_reconcile_reports_drift_against_sqlite():
+    index = RankIndex()
+    database.apply_user_stats_batch([row(1, messages=2)])
+    assert index.reconcile(database.get_all_user_stats()) == 0
+    database.update_user_stats(1, "user1", messages=1)
+    assert index.reconcile(database.get_all_user_stats()) == 1
+    assert index.top(1)[0]["xp"] == 30
+
+
+def test_xp_index_is_used_for_ordering():
+    with database.connection() as conn:
+        plan = " ".join(r["detail"] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM user_stats ORDER BY xp DESC LIMIT 10"))
+    assert "idx_user_stats_xp" in plan
+
+
+def test_commands_answer_when_the_flush_fails():
+    from cogs.leaderboard import Leaderboard
+
+    class LockedBuffer:
+        async def flush(self):
+            raise sqlite3.OperationalError("database is locked")
+
+    replies = []
+
+    async def reply(*args, **kwargs):
+        replies.append(kwargs.get("embed"))
+
+    cog = Leaderboard.__new__(Leaderboard)
+    cog.buffer, cog.ranking = LockedBuffer(), RankIndex()
+    cog.ranking.apply([row(1, messages=3)])
+    cog.ranking.loaded = True
+    ctx = SimpleNamespace(guild=None, reply=reply, author=SimpleNamespace(
+        id=1, display_avatar=SimpleNamespace(url="https://cdn.example/a.png")))
+
+    async def scenario():
+        await cog.leaderboard_command.callback(cog, ctx)
+        await cog.rank_command.callback(cog, ctx)
+
+    asyncio.run(scenario())
+    assert [embed.fields[0].value if embed.fields else embed.description for embed in replies] == [
+        "🥇 **user1**\n   XP: `30` | 💬 3 | 👍 0\n", "#1"]
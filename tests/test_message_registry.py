@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import database
+from utils.message_registry import upsert_message
+
+BOT_USER = object()
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id, author=BOT_USER, embeds=("embed",)):
+        self.channel = channel
+        self.id = message_id
+        self.author = author
+        self.embeds = list(embeds)
+
+    async def edit(self, **fields):
+        if self.id not in self.channel.messages:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        self.channel.edits.append((self.id, fields))
+        return self
+
+
+class FakeChannel:
+    def __init__(self, messages=()):
+        self.id = 20
+        self.guild = SimpleNamespace(id=10)
+        self.messages = {m: FakeMessage(self, m) for m in messages}
+        self.history_scans = 0
+        self.edits = []
+        self.sent = []
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id)
+
+    async def history(self, limit):
+        self.history_scans += 1
+        for message_id in sorted(self.messages, reverse=True)[:limit]:
+            yield self.messages[message_id]
+
+    async def send(self, **fields):
+        message = FakeMessage(self, 100 + len(self.sent))
+        self.messages[message.id] = message
+        self.sent.append(fields)
+        return message
+
+
+BOT = SimpleNamespace(user=BOT_USER)
+
+
+def test_registered_message_is_edited_without_history_scan():
+    channel = FakeChannel(messages=[5])
+
+    async def scenario():
+        await upsert_message(BOT, channel, embed="first")  # adopts message 5 via one scan
+        await upsert_message(BOT, channel, embed="second")
+        await upsert_message(BOT, channel, embed="third")
+
+    asyncio.run(scenario())
+    assert channel.history_scans == 1
+    assert channel.edits == [(5, {"embed": "first"}), (5, {"embed": "second"}),
+                             (5, {"embed": "third"})]
+    assert database.get_bot_message(10, 20, "content") == 5
+
+
+def test_deleted_message_falls_back_to_scan_and_repairs_the_registry():
+    channel = FakeChannel()
+    database.set_bot_message(10, 20, "content", 7)  # deleted by a moderator
+
+    async def scenario():
+        created = await upsert_message(BOT, channel, embed="fresh")
+        skipped = await upsert_message(BOT, FakeChannel(), "other", create=False, embed="x")
+        return created, skipped
+
+    created, skipped = asyncio.run(scenario())
+    assert channel.history_scans == 1 and channel.sent == [{"embed": "fresh"}]
+    assert database.get_bot_message(10, 20, "content") == created.id
+    assert skipped is None and database.get_bot_message(10, 20, "other") is None
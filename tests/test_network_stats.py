@@ -0,0 +1,183 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from chain_events import ChainEventStream, StreamConfig
+from cogs.network_stats import NetworkStats
+from thronos_api import ResponseCache
+from timeseries import TimeSeriesStore
+
+
+class FakeAPI:
+    def __init__(self, bodies, delays):
+        self.bodies = bodies
+        self.delays = delays
+        self.cache = ResponseCache()
+
+    async def get_cached(self, endpoint):
+        async def fetch():
+            await asyncio.sleep(self.delays.get(endpoint, 0))
+            return self.bodies.get(endpoint)
+        return await self.cache.get(endpoint, fetch, 60)
+
+
+class FakeBot:
+    def __init__(self, api):
+        self.api = api
+        self.guilds = []
+        self.chain_events = ChainEventStream(api, config=StreamConfig(enabled=False))
+        self.timeseries = TimeSeriesStore()
+
+    async def wait_until_ready(self):
+        await asyncio.Event().wait()
+
+
+BODIES = {
+    "/network_stats": {"tx_count": 1200, "block_count": 50},
+    "/token/prices": {"thr_usd_rate": 0.25},
+    "/health": {"ok": True, "version": "3.6"},
+    "/dashboard": {"tps": 1.5},
+    "/tokens/stats": {"tokens": [{"symbol": "THR", "holders_count": 42}]},
+}
+
+
+def run_with_cog(api, scenario):
+    async def main():
+        cog = NetworkStats(FakeBot(api))
+        try:
+            return await scenario(cog)
+        finally:
+            await cog.cog_unload()
+    return asyncio.run(main())
+
+
+def test_endpoints_are_fetched_concurrently():
+    api = FakeAPI(BODIES, {endpoint: 0.1 for endpoint in BODIES})
+
+    async def scenario(cog):
+        started = time.perf_counter()
+        embed = await cog.generate_stats_embed()
+        return embed, time.perf_counter() - started
+
+    embed, elapsed = run_with_cog(api, scenario)
+    assert elapsed < 0.3
+    assert {field.name for field in embed.fields} >= {"🔢 Transaction Count", "💰 THR Price", "👥 Active Wallets"}
+    assert embed.footer.text == "Updates every 5 minutes"
+
+
+def test_slow_endpoints_render_from_cache_and_are_marked_stale():
+    api = FakeAPI(BODIES, {"/health": 5})
+
+    async def scenario(cog):
+        # Expired beyond the stale window, so the slow refetch is awaited
+        api.cache._entries["/health"] = ({"ok": False, "version": "old"}, time.monotonic() - 3600)
+        data, stale = await cog.fetch_stats_data(deadline=0.05)
+        partial = cog.build_stats_embed({**data, "/tokens/stats": None}, stale)
+        return data, stale, partial
+
+    data, stale, embed = run_with_cog(api, scenario)
+    assert stale == ["/health"]
+    assert data["/health"] == {"ok": False, "version": "old"}
+    assert embed.footer.text == "Updates every 5 minutes • Stale: health • Unavailable: holders"
+    assert "👥 Active Wallets" not in {field.name for field in embed.fields}
+
+
+def test_no_data_at_all_returns_none():
+    api = FakeAPI({}, {})
+    assert run_with_cog(api, lambda cog: cog.generate_stats_embed()) is None
+
+
+def test_tick_renders_once_and_delivers_to_every_guild():
+    api = FakeAPI(BODIES, {})
+    rendered = []
+
+    async def scenario(cog):
+        build = cog.build_stats_embed
+        cog.build_stats_embed = lambda *args: rendered.append(1) or build(*args)
+        delivered = []
+
+        async def deliver(guild, embed):
+            if guild == 2:
+                raise RuntimeError("rate limited")
+            delivered.append((guild, embed))
+            return True
+
+        cog.deliver_stats = deliver
+        cog.bot.guilds = [1, 2, 3]
+        await cog.update_stats.coro(cog)
+        return delivered, cog.last_tick
+
+    delivered, tick = run_with_cog(api, scenario)
+    assert rendered == [1]
+    assert [guild for guild, _ in delivered] == [1, 3] and delivered[0][1] is delivered[1][1]
+    assert tick["delivered"] == 2 and tick["failures"] == {2: "RuntimeError"}
+    assert {"fetch_seconds", "render_seconds", "deliver_seconds"} <= set(tick)
+
+
+def test_stats_embed_shows_trends_from_stored_samples():
+    api = FakeAPI(BODIES, {})
+
+    async def scenario(cog):
+        now = time.time()
+        for hours_ago, price, tx_count in ((23, 0.20, 50), (12, 0.30, 600)):
+            ts = now - hours_ago * 3600
+            cog.bot.timeseries.observe("/token/prices", {"thr_usd_rate": price}, ts)
+            cog.bot.timeseries.observe("/network_stats", {"tx_count": tx_count}, ts)
+        return await cog.generate_stats_embed()
+
+    embed = run_with_cog(api, scenario)
+    trends = {field.name: field.value for field in embed.fields}["📈 Trends"]
+    assert "THR (24h): `▲ +25.00%`" in trends
+    assert "Transactions (24h): `+1,150` (50.0/h)" in trends
+
+
+def test_back_to_back_stats_calls_record_one_sample():
+    api = FakeAPI(BODIES, {})
+
+    async def scenario(cog):
+        # Far enough apart that the store would keep a repeated value
+        ticks = iter(range(0, 1000, 10))
+        cog.bot.timeseries.clock = lambda: float(next(ticks))
+        await cog.generate_stats_embed()
+        await cog.generate_stats_embed()
+        return cog.bot.timeseries.series
+
+    series = run_with_cog(api, scenario)
+    # The second call is served from the fresh cache and adds nothing
+    assert {metric: len(series[metric].levels[0].ring) for metric in ("tx_count", "thr_usd", "tps")} == \
+        {"tx_count": 1, "thr_usd": 1, "tps": 1}
+
+
+class ChartContext:
+    author = "tester"
+
+    def __init__(self, replies):
+        self.replies = replies
+
+    async def defer(self):
+        pass
+
+    async def reply(self, embed=None, file=None):
+        await asyncio.sleep(0.01)
+        self.replies.append((embed.image.url, file))
+        url = f"https://cdn.example/{len(self.replies)}.png" if file else None
+        return SimpleNamespace(attachments=[SimpleNamespace(url=url)] if file else [])
+
+
+def test_price_charts_in_one_bucket_render_and_upload_once():
+    api = FakeAPI(BODIES, {})
+    replies = []
+
+    async def scenario(cog):
+        now = time.time()
+        for minutes_ago, price in ((600, 0.2), (300, 0.22), (60, 0.21)):
+            cog.bot.timeseries.record("thr_usd", price, now - minutes_ago * 60)
+        requests = [cog.price_command.callback(cog, ChartContext(replies), chart="24h") for _ in range(3)]
+        await asyncio.gather(*requests)
+        return cog.charts.stats()
+
+    stats = run_with_cog(api, scenario)
+    uploads = [file for _, file in replies if file is not None]
+    assert len(uploads) == 1 and uploads[0].filename == "chart.png"
+    assert sorted(url for url, _ in replies) == ["attachment://chart.png"] + ["https://cdn.example/1.png"] * 2
+    assert stats["renders"] == 1
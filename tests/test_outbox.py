@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+import database
+import outbox
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+def test_only_the_head_of_each_destination_is_claimed():
+    ids = outbox.enqueue([("k", "a", {"n": 1}, "a1"), ("k", "a", {"n": 2}, "a2"),
+                          ("k", "b", {"n": 3}, "b1"), ("k", "a", {"n": 9}, "a1")], now=100)
+    assert len(ids) == 3
+
+    claimed = outbox.claim_due(now=100)
+    assert [(item["destination"], item["payload"]) for item in claimed] == [
+        ("a", '{"n":1}'), ("b", '{"n":3}')]
+    # Nothing else is due until the in-flight head of "a" finishes
+    assert outbox.claim_due(now=100) == []
+    outbox.finish(claimed[0]["id"], "delivered", now=101)
+    assert [item["payload"] for item in outbox.claim_due(now=101)] == ['{"n":2}']
+
+
+def test_stats_report_depth_age_and_throughput():
+    outbox.enqueue([("k", "a", {}, None), ("k", "b", {}, None)], now=1000)
+    item = outbox.claim_due(now=1000)[0]
+    outbox.finish(item["id"], "delivered", now=1010)
+    stats = outbox.stats(now=1030)
+    assert stats["depth"] == 1
+    assert stats["oldest_age_seconds"] == 30
+    assert stats["states"] == {"delivered": 1, "delivering": 1}
+    assert stats["delivered_last_hour"] == 1
+
+
+def test_interrupted_deliveries_are_requeued():
+    outbox.enqueue([("k", "a", {}, None)], now=1)
+    outbox.claim_due(now=1)
+    assert outbox.recover_inflight() == 1
+    assert len(outbox.claim_due(now=1)) == 1
+
+
+def test_dispatcher_retries_then_parks_and_keeps_destination_order():
+    calls = []
+
+    async def flaky(payload):
+        calls.append(payload["n"])
+        if payload["n"] == 1 and calls.count(1) < 2:
+            raise outbox.RetryDelivery("TEMPORARY")
+        return "ok"
+
+    async def broken(payload):
+        calls.append(payload["n"])
+        raise outbox.DeliveryFailed("DENIED")
+
+    outbox.enqueue([("flaky", "a", {"n": 1}, None), ("flaky", "a", {"n": 2}, None),
+                    ("broken", "b", {"n": 3}, None)])
+    dispatcher = outbox.OutboxDispatcher(
+        {"flaky": flaky, "broken": broken}, outbox.OutboxConfig(base_backoff_seconds=0.05))
+
+    async def scenario():
+        await dispatcher.drain()
+        await asyncio.sleep(0.08)
+        await dispatcher.drain()
+
+    asyncio.run(scenario())
+    # Item 2 waited behind the retried item 1 instead of overtaking it
+    assert calls == [1, 3, 1, 2]
+    assert dispatcher.stats() | {"last_drain_seconds": 0} == {
+        "running": False, "delivered": 2, "retried": 1, "failed": 1, "last_drain_seconds": 0}
+    with database.connection() as conn:
+        rows = conn.execute("SELECT state, attempts, safe_error_code, result FROM delivery_outbox "
+                            "ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [
+        ("delivered", 2, None, "ok"), ("delivered", 1, None, "ok"), ("failed", 1, "DENIED", None)]
+
+
+def test_backoff_is_capped():
+    config = outbox.OutboxConfig(base_backoff_seconds=2, max_backoff_seconds=300)
+    assert [config.backoff(n) for n in (1, 2, 3, 9, 20)] == [2, 4, 8, 300, 300]
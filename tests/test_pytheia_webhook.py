@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import database
+import future_btc_signal
+import outbox
+from cogs.pytheia_webhook import PytheiaWebhook
+from webhook_server import WebhookServer
+
+SECRET = "hook-secret"
+PAYLOAD = {"signal_type": "trade", "symbol": "THR", "action": "buy", "tx_hash": "0x" + "a" * 64,
+           "amount": 5, "token": "<b>THR</b>"}
+
+
+class FakeStream:
+    def __init__(self, body):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+
+class FakeRequest:
+    def __init__(self, body, declared=True):
+        self.content = FakeStream(body)
+        self.content_length = len(body) if declared else None
+        self.headers = {"X-Signature": "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()}
+
+
+class FakeChannel:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    async def send(self, embed):
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("discord unavailable")
+        self.sent.append(embed)
+
+
+class FakeIndex:
+    def __init__(self, channels):
+        self.channels = channels
+
+    def text_channel(self, guild, name):
+        return self.channels.get(guild.id)
+
+    def category(self, guild, name):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    monkeypatch.setenv("WEBHOOK_SECRET", SECRET)
+    # WebhookServer installs the module-level signal publisher
+    monkeypatch.setattr(future_btc_signal, "_publisher", None)
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+def make_cog(channels, guild_count):
+    """The intake server and, separately, the cog that drains what it queued."""
+    cog = PytheiaWebhook.__new__(PytheiaWebhook)
+    guilds = {i: SimpleNamespace(id=i) for i in range(guild_count)}
+    cog.bot = SimpleNamespace(guilds=list(guilds.values()), get_guild=guilds.get,
+                              guild_index=FakeIndex(channels))
+    cog.dispatcher = outbox.OutboxDispatcher(
+        {"pytheia_alert_batch": cog.expand_alert, "pytheia_alert": cog.deliver_queued_alert},
+        outbox.OutboxConfig(base_backoff_seconds=0.2))
+    return WebhookServer(), cog
+
+
+def test_alert_is_queued_then_delivered_per_guild():
+    channels = {i: FakeChannel(fail=(i == 3)) for i in range(6)}
+    server, cog = make_cog(channels, guild_count=8)
+    body = json.dumps(PAYLOAD).encode()
+
+    async def scenario():
+        first = await server.handle_alert(FakeRequest(body))
+        repeat = await server.handle_alert(FakeRequest(body))
+        assert not any(channel.sent for channel in channels.values())
+        started = time.perf_counter()
+        await cog.dispatcher.drain()
+        elapsed = time.perf_counter() - started
+        channels[3].fail = False
+        await asyncio.sleep(0.25)
+        await cog.dispatcher.drain()
+        return first, repeat, elapsed
+
+    first, repeat, elapsed = asyncio.run(scenario())
+    assert first.status == 202
+    assert json.loads(first.body) == {"status": "queued", "duplicate": False}
+    assert json.loads(repeat.body) == {"status": "queued", "duplicate": True}
+    # Guilds are separate destinations, so their sends overlap
+    assert elapsed < 0.2
+    assert all(len(channel.sent) == 1 for channel in channels.values())
+    assert channels[0].sent[0].fields[3].value == "5 THR"
+    assert cog.dispatcher.stats()["retried"] == 1
+    stats = outbox.stats()
+    # The accepted batch plus one item per guild
+    assert stats["depth"] == 0 and stats["states"] == {"delivered": 9}
+
+
+def test_oversized_alert_is_rejected_while_streaming():
+    server, _ = make_cog({}, guild_count=1)
+    padded = json.dumps({**PAYLOAD, "pad": "x" * 10_000}).encode()
+
+    async def scenario():
+        declared = await server.handle_alert(FakeRequest(padded))
+        chunked = await server.handle_alert(FakeRequest(padded, declared=False))
+        forged = FakeRequest(json.dumps(PAYLOAD).encode())
+        forged.headers["X-Signature"] = "sha256=" + "0" * 64
+        return declared, chunked, await server.handle_alert(forged)
+
+    declared, chunked, forged = asyncio.run(scenario())
+    assert (declared.status, chunked.status, forged.status) == (413, 413, 403)
+    assert outbox.stats()["depth"] == 0
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from rate_limiter import RateLimiter, SlidingWindowLimiter, client_address, parse_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_slides_per_key():
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(2, 10, clock=clock)
+    assert limiter.hit("a") == 0
+    clock.now += 4
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") == pytest.approx(6)
+    # Another client has its own window
+    assert limiter.hit("b") == 0
+    clock.now += 6
+    assert limiter.hit("a") == 0
+    assert limiter.stats() == {"limit": 2, "window_seconds": 10, "clients": 2,
+                               "allowed": 4, "rejected": 1}
+
+
+def test_idle_clients_are_evicted_past_the_cap():
+    limiter = SlidingWindowLimiter(1, 60, max_keys=2, clock=FakeClock())
+    for key in ("a", "b", "a", "c"):
+        limiter.hit(key)
+    assert list(limiter._hits) == ["a", "c"]
+
+
+def test_parse_limit():
+    assert parse_limit("5/30") == (5, 30.0)
+    assert parse_limit("off") is None
+    with pytest.raises(ValueError):
+        parse_limit("0/10")
+
+
+def test_forwarded_address_is_read_from_the_trusted_end():
+    request = SimpleNamespace(remote="10.0.0.1",
+                              headers={"X-Forwarded-For": "6.6.6.6, 203.0.113.9"})
+    assert client_address(request) == "10.0.0.1"
+    assert client_address(request, proxy_hops=1) == "203.0.113.9"
+    assert client_address(request, proxy_hops=3) == "10.0.0.1"
+
+
+def test_middleware_limits_each_route_and_client_separately():
+    limiter = RateLimiter({"/hook": (2, 60)}, proxy_hops=1)
+
+    async def ok(request):
+        return web.json_response({"ok": True})
+
+    async def scenario():
+        app = web.Application(middlewares=[limiter.middleware()])
+        app.router.add_post("/hook", ok)
+        app.router.add_get("/health", ok)
+        async with TestClient(TestServer(app)) as client:
+            first = [await client.post("/hook", headers={"X-Forwarded-For": "1.1.1.1"})
+                     for _ in range(3)]
+            other = await client.post("/hook", headers={"X-Forwarded-For": "2.2.2.2"})
+            unlimited = [await client.get("/health") for _ in range(5)]
+            rejected = first[-1]
+            return ([r.status for r in first], other.status, [r.status for r in unlimited],
+                    await rejected.text(), rejected.headers["Retry-After"])
+
+    statuses, other, unlimited, body, retry_after = asyncio.run(scenario())
+    assert statuses == [200, 200, 429]
+    assert other == 200
+    assert unlimited == [200] * 5
+    assert body == '{"error":"RATE_LIMITED"}'
+    assert retry_after == "60"
+    assert limiter.stats()["/hook"]["rejected"] == 1
@@ -0,0 +1,63 @@
+import asyncio
+
+from refresh_scheduler import RefreshScheduler
+
+
+def test_burst_collapses_into_leading_and_trailing_refresh():
+    state = {"votes": 0}
+    rendered = []
+
+    async def refresh(key):
+        rendered.append((key, state["votes"]))
+
+    async def scenario():
+        scheduler = RefreshScheduler(refresh, interval=0.05)
+        for _ in range(200):
+            state["votes"] += 1
+            scheduler.request(7)
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.2)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert len(rendered) == 2
+    assert rendered[0] == (7, 1)
+    assert rendered[-1] == (7, 200)
+    stats = scheduler.stats()
+    assert stats["requests"] == 200 and stats["refreshes"] == 2 and stats["scheduled"] == 0
+    assert stats["coalesced"] == 198
+
+
+def test_request_during_refresh_schedules_another_pass():
+    calls = []
+
+    async def scenario():
+        async def refresh(key):
+            calls.append(key)
+            if len(calls) == 1:
+                scheduler.request(key)
+                await asyncio.sleep(0)
+
+        scheduler = RefreshScheduler(refresh, interval=0.01)
+        scheduler.request("a")
+        scheduler.request("b")
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert sorted(calls) == ["a", "a", "b"]
+
+
+def test_failures_are_counted_and_close_cancels_pending_work():
+    async def refresh(key):
+        raise RuntimeError("edit failed")
+
+    async def scenario():
+        scheduler = RefreshScheduler(refresh, interval=10)
+        scheduler.request(1)
+        await asyncio.sleep(0)
+        scheduler.request(1)
+        await scheduler.close()
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["failures"] == 1 and stats["scheduled"] == 0
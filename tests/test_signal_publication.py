@@ -10,6 +10,7 @@ import pytest
 
 import database
 import future_btc_signal as relay
+import outbox
 from future_btc_signal import PublicationConfig, SignalPublisher, store_event
 
 
@@ -104,7 +105,7 @@ def test_enabled_duplicate_restart_and_message_id():
 
 
 def test_duplicate_posts_do_not_republish(monkeypatch):
-    now = datetime(2026, 8, 14, 12, tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
     data, channel = signal("post-once-1", now), Channel()
     body = json.dumps(data, separators=(",", ":")).encode()
     secret = "endpoint-test-secret"
@@ -113,20 +114,61 @@ def test_duplicate_posts_do_not_republish(monkeypatch):
     class Request:
         secure = True
         headers = {relay.SIGNATURE_HEADER: signature}
+        content_length = len(body)
 
-        async def read(self):
-            return body
+        class content:
+            @staticmethod
+            async def iter_chunked(size):
+                yield body
 
     real_validate = relay.validate_payload
     monkeypatch.setenv("FREE_BTC_SIGNAL_RELAY_ENABLED", "true")
     monkeypatch.setenv("SIGBALBOT_RELAY_SECRET", secret)
     monkeypatch.setattr(relay, "_publisher", SignalPublisher(Bot(channel), config()))
     monkeypatch.setattr(relay, "validate_payload", lambda value: real_validate(value, now))
-    first = asyncio.run(relay.handle_request(Request()))
-    second = asyncio.run(relay.handle_request(Request()))
+    dispatcher = outbox.OutboxDispatcher({relay.OUTBOX_KIND: relay.deliver_queued})
+
+    async def scenario():
+        first = await relay.handle_request(Request())
+        assert not channel.calls
+        second = await relay.handle_request(Request())
+        await dispatcher.drain()
+        third = await relay.handle_request(Request())
+        await dispatcher.drain()
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first.status == 202
     assert json.loads(first.body) == {"status": "accepted", "duplicate": False}
+    assert (second.status, third.status) == (200, 200)
     assert json.loads(second.body) == {"status": "accepted", "duplicate": True}
+    assert json.loads(third.body) == {"status": "accepted", "duplicate": True}
     assert len(channel.calls) == 1
+    assert row("post-once-1")["state"] == "published"
+
+
+def test_queued_publication_retries_through_the_outbox(monkeypatch):
+    now = datetime.now(timezone.utc)
+    data = signal("queued-retry-1", now)
+    channel = Channel([discord.HTTPException(Response(503), "unavailable")])
+    publisher = SignalPublisher(Bot(channel), config())
+    monkeypatch.setattr(relay, "_publisher", publisher)
+    store_event(data)
+
+    async def scenario():
+        assert await publisher.reserve(data, queue=True) == "reserved"
+        dispatcher = outbox.OutboxDispatcher(
+            {relay.OUTBOX_KIND: relay.deliver_queued}, outbox.OutboxConfig(base_backoff_seconds=0.05))
+        await dispatcher.drain()
+        assert row("queued-retry-1")["state"] == "retryable_failure"
+        await asyncio.sleep(0.1)
+        await dispatcher.drain()
+        return dispatcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["retried"] == 1 and stats["delivered"] == 1
+    assert len(channel.calls) == 2
+    assert row("queued-retry-1")["state"] == "published"
 
 
 def test_concurrent_reservation_posts_once():
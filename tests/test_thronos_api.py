@@ -0,0 +1,173 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from thronos_api import ClientConfig, ResponseCache, ThronosAPIClient, api_base_url
+
+
+def test_base_url_is_normalised():
+    assert api_base_url("https://api.example.org/") == "https://api.example.org/api"
+    assert api_base_url("https://api.example.org/api") == "https://api.example.org/api"
+
+
+async def _serve(handlers):
+    app = web.Application()
+    for path, handler in handlers.items():
+        app.router.add_route("*", path, handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def test_requests_reuse_one_connection_and_record_metrics():
+    peers = set()
+
+    async def prices(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.json_response({"thr_usd_rate": 0.5})
+
+    async def broken(request):
+        return web.Response(status=503)
+
+    async def chat(request):
+        return web.json_response({"echo": (await request.json())["message"]})
+
+    async def scenario():
+        server = await _serve({"/api/token/prices": prices, "/api/health": broken, "/api/ai/chat": chat})
+        client = ThronosAPIClient(ClientConfig(base_url=str(server.make_url("/api"))))
+        try:
+            for _ in range(3):
+                assert await client.get_json("/token/prices") == {"thr_usd_rate": 0.5}
+            assert await client.get_json("/health") is None
+            assert await client.post_json("/ai/chat", {"message": "hi"}) == (200, {"echo": "hi"})
+            return client.stats()
+        finally:
+            await client.close()
+            await server.close()
+
+    stats = asyncio.run(scenario())
+    assert len(peers) == 1
+    assert stats["endpoints"]["/token/prices"]["requests"] == 3
+    assert stats["endpoints"]["/token/prices"]["errors"] == 0
+    assert stats["endpoints"]["/health"]["errors"] == 1
+    assert stats["endpoints"]["/health"]["last_status"] == 503
+    assert stats["endpoints"]["/ai/chat"]["requests"] == 1
+
+
+def test_timeouts_and_transport_errors_return_none(caplog):
+    async def slow(request):
+        await asyncio.sleep(1)
+        return web.json_response({})
+
+    async def scenario():
+        server = await _serve({"/api/slow": slow})
+        client = ThronosAPIClient(ClientConfig(base_url=str(server.make_url("/api"))))
+        try:
+            slow_result = await client.get_json("/slow", timeout=0.05)
+            await server.close()
+            return slow_result, await client.request("GET", "/slow"), client.stats()
+        finally:
+            await client.close()
+
+    slow_result, refused, stats = asyncio.run(scenario())
+    assert slow_result is None
+    assert refused == (0, None)
+    assert stats["endpoints"]["/slow"]["errors"] == 2
+    assert "TimeoutError" in caplog.text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_coalesces_misses_and_serves_fresh_hits():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"n": len(calls)}
+
+    async def scenario():
+        cache = ResponseCache(clock=FakeClock())
+        results = await asyncio.gather(*(cache.get("/token/prices", fetch, 60) for _ in range(20)))
+        results.append(await cache.get("/token/prices", fetch, 60))
+        return results, cache.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert len(calls) == 1 and all(r == {"n": 1} for r in results)
+    assert stats["misses"] == 20 and stats["coalesced"] == 19 and stats["hits"] == 1
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    clock = FakeClock()
+    responses = iter([{"v": 1}, None, {"v": 3}])
+
+    async def fetch():
+        return next(responses)
+
+    async def scenario():
+        cache = ResponseCache(stale_seconds=100, clock=clock)
+        assert await cache.get("k", fetch, 10) == {"v": 1}
+        clock.now += 20
+        assert await cache.get("k", fetch, 10) == {"v": 1}  # stale; refresh fails
+        await asyncio.sleep(0)
+        assert cache.peek("k") == ({"v": 1}, 20)
+        assert await cache.get("k", fetch, 10) == {"v": 1}  # still stale; refresh succeeds
+        await asyncio.sleep(0)
+        fresh = await cache.get("k", fetch, 10)
+        clock.now += 500
+        return fresh, cache.stats()
+
+    fresh, stats = asyncio.run(scenario())
+    assert fresh == {"v": 3}
+    assert stats["stale_hits"] == 2 and stats["refreshes"] == 3 and stats["hits"] == 1
+
+
+def test_entries_past_the_stale_window_are_refetched_and_lru_is_bounded():
+    clock = FakeClock()
+    fetched = []
+
+    def fetcher(key):
+        async def fetch():
+            fetched.append(key)
+            return key
+        return fetch
+
+    async def scenario():
+        cache = ResponseCache(max_entries=2, stale_seconds=5, clock=clock)
+        for key in ("a", "b", "a", "c"):
+            await cache.get(key, fetcher(key), 10)
+        clock.now += 60
+        await cache.get("a", fetcher("a"), 10)
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert fetched == ["a", "b", "c", "a"]
+    assert stats["evictions"] == 1 and set(stats["age_seconds"]) == {"a", "c"}
+
+
+def test_stale_hits_count_as_use_for_lru_eviction():
+    clock = FakeClock()
+
+    async def scenario():
+        cache = ResponseCache(max_entries=2, stale_seconds=30, clock=clock)
+        for key in ("a", "b"):
+            await cache.get(key, lambda key=key: asyncio.sleep(0, key), 10)
+        clock.now += 15
+
+        async def failing():
+            return None
+
+        # Served stale while its refresh fails; still the most recently used
+        assert await cache.get("a", failing, 10) == "a"
+        await asyncio.sleep(0)
+        await cache.get("c", lambda: asyncio.sleep(0, "c"), 10)
+        return set(cache.stats()["age_seconds"])
+
+    assert asyncio.run(scenario()) == {"a", "c"}
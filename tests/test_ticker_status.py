@@ -0,0 +1,39 @@
+import asyncio
+from types import SimpleNamespace
+
+from cogs.ticker_status import TickerStatus
+from thronos_api import ResponseCache
+from timeseries import TimeSeriesStore
+
+
+class Poller:
+    def __init__(self, endpoint, *bodies):
+        self.endpoint = endpoint
+        self.interval = self.max_interval = 60.0
+        self.bodies = list(bodies)
+
+    async def poll(self):
+        return self.bodies.pop(0)
+
+
+def test_changed_polls_are_shared_through_the_response_cache():
+    price = {"thr_usd_rate": 0.5}
+    cog = TickerStatus.__new__(TickerStatus)
+    cog.bot = SimpleNamespace(api=SimpleNamespace(cache=ResponseCache()))
+    cog.prices = Poller("/token/prices", (True, price), (False, price))
+    cog.stats = Poller("/network_stats", (False, None), (False, None))
+    cog.latest, cog.status_text = {}, "unchanged"
+    cog.events = SimpleNamespace(live=False)
+    cog.series = TimeSeriesStore()
+
+    async def fetch():
+        raise AssertionError("cache miss")
+
+    async def scenario():
+        for _ in range(2):
+            await cog.update_status.coro(cog)
+        return await cog.bot.api.cache.get("/token/prices", fetch, ttl=60)
+
+    assert asyncio.run(scenario()) == price
+    assert cog.bot.api.cache.peek("/network_stats") == (None, None)
+    assert cog.series.latest("thr_usd") == 0.5
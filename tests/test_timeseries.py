@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+import database
+from timeseries import HOUR, MINUTE, RAW, Ring, TimeSeriesStore
+
+T0 = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", database.MEMORY_DB_PATH)
+    database.init_db()
+    yield
+    database.close_pool()
+
+
+def test_ring_overwrites_oldest_and_searches_by_time():
+    ring = Ring(4)
+    for n in range(6):
+        ring.append(float(n), n * 10.0, n * 10.0, n * 10.0)
+
+    assert len(ring) == 4
+    assert [row[0] for row in ring.rows()] == [2.0, 3.0, 4.0, 5.0]
+    assert [row[1] for row in ring.rows(since=3.5)] == [40.0, 50.0]
+
+
+def test_samples_roll_up_into_minute_and_hour_buckets():
+    store = TimeSeriesStore(clock=lambda: T0 + 7200)
+    for offset, price in ((0, 1.0), (20, 3.0), (40, 2.0), (70, 4.0), (3700, 5.0)):
+        store.record("thr_usd", price, T0 + offset)
+    levels = store.series["thr_usd"].levels
+
+    assert levels[MINUTE].rows() == [(T0, 2.0, 1.0, 3.0), (T0 + 60, 4.0, 4.0, 4.0),
+                                     (T0 + 3660, 5.0, 5.0, 5.0)]
+    assert levels[HOUR].rows() == [(T0, 4.0, 1.0, 4.0), (T0 + 3600, 5.0, 5.0, 5.0)]
+    assert len(levels[RAW].ring) == 5
+
+    summary = store.summary("thr_usd", 7200)
+    assert (summary["first"], summary["last"], summary["low"], summary["high"]) == (1.0, 5.0, 1.0, 5.0)
+    assert summary["percent"] == 400.0
+    assert summary["per_hour"] == pytest.approx(4.0 / 3700 * 3600)
+    # A repeated value within the minimum gap is not stored twice
+    assert not store.record("thr_usd", 5.0, T0 + 3700.5)
+
+
+def test_snapshots_restore_downsampled_history_after_restart():
+    now = T0 + 2 * 86400
+
+    async def scenario():
+        store = TimeSeriesStore(clock=lambda: now)
+        for hour in range(48):
+            store.observe("/network_stats", {"tx_count": hour * 100, "block_count": hour}, T0 + hour * 3600)
+        written = await store.snapshot()
+        # Nothing new: only the still-filling buckets are rewritten
+        rewritten = await store.snapshot()
+
+        restored = TimeSeriesStore(clock=lambda: now)
+        await restored.load()
+        return written, rewritten, restored
+
+    written, rewritten, restored = asyncio.run(scenario())
+
+    # 48 hourly buckets plus the minute buckets within the last 24h, for two metrics
+    assert written == 2 * (48 + 24)
+    assert rewritten == 2 * 2
+    summary = restored.summary("tx_count", 86400 * 7)
+    assert (summary["first"], summary["last"]) == (0.0, 4700.0)
+    assert restored.latest("block_height") == 47.0
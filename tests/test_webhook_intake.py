@@ -0,0 +1,54 @@
+import asyncio
+import hashlib
+import hmac
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from rate_limiter import RateLimiter
+from webhook_intake import (
+    PayloadTooLarge,
+    body_limit_middleware,
+    read_signed_body,
+    signature_matches,
+)
+
+SECRET = "intake-secret"
+
+
+def sign(body):
+    return "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_rejections_happen_in_cost_order():
+    reads = []
+    limiter = RateLimiter({"/hook": (2, 60)})
+
+    async def hook(request):
+        try:
+            body, expected = await read_signed_body(request, SECRET, 64)
+        except PayloadTooLarge:
+            return web.json_response({"error": "PAYLOAD_TOO_LARGE"}, status=413)
+        reads.append(body)
+        if not signature_matches(expected, request.headers.get("X-Signature")):
+            return web.json_response({"error": "INVALID_SIGNATURE"}, status=401)
+        return web.json_response({"ok": True})
+
+    async def chunks(body):
+        for start in range(0, len(body), 16):
+            yield body[start:start + 16]
+
+    async def scenario():
+        app = web.Application(middlewares=[body_limit_middleware({"/hook": 64}), limiter.middleware()])
+        app.router.add_post("/hook", hook)
+        async with TestClient(TestServer(app)) as client:
+            declared = await client.post("/hook", data=b"x" * 65)
+            streamed = await client.post("/hook", data=chunks(b"y" * 200))
+            good = await client.post("/hook", data=b"{}", headers={"X-Signature": sign(b"{}")})
+            limited = await client.post("/hook", data=b"{}", headers={"X-Signature": sign(b"{}")})
+            return declared.status, streamed.status, good.status, limited.status
+
+    assert asyncio.run(scenario()) == (413, 413, 200, 429)
+    # The declared oversize body never reached the limiter or the handler
+    assert limiter.stats()["/hook"]["allowed"] == 2
+    assert reads == [b"{}"]
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import database
+from xp_buffer import BufferConfig, XPBuffer
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test.db"))
+    database.init_db()
+
+
+def test_deltas_coalesce_into_one_row_per_user():
+    buffer = XPBuffer(BufferConfig(10, 100))
+    for _ in range(5):
+        buffer.add(1, "alice#1", messages=1)
+    buffer.add(1, "alice#2", reactions=2, now=datetime(2026, 8, 14, 12, tzinfo=timezone.utc))
+    buffer.add(2, "bob", referrals=1)
+
+    rows = asyncio.run(buffer.flush())
+    assert len(rows) == 2
+    rank, alice = database.get_user_rank(1)
+    assert rank == 1
+    assert alice["username"] == "alice#2"
+    assert (alice["message_count"], alice["reaction_count"], alice["xp"]) == (5, 2, 60)
+    assert alice["last_active"] == "2026-08-14 12:00:00"
+    assert database.get_leaderboard(2)[1]["xp"] == 50
+
+    stats = buffer.stats()
+    assert stats["events_buffered"] == 7 and stats["pending_events"] == 0
+    assert stats["flushes"] == 1 and stats["last_flush_size"] == 2
+
+
+def test_flush_is_signalled_after_max_events():
+    buffer = XPBuffer(BufferConfig(10, 3))
+    assert buffer.add(1, "a", messages=1) is False
+    assert buffer.add(2, "b", messages=1) is False
+    assert buffer.add(1, "a", messages=1) is True
+
+
+def test_failed_flush_keeps_events(monkeypatch):
+    buffer = XPBuffer(BufferConfig(10, 100))
+    buffer.add(1, "alice", messages=1)
+
+    def broken(rows, rollups):
+        raise database.sqlite3.OperationalError("disk I/O error")
+
+    working = database.apply_user_stats_batch
+    monkeypatch.setattr(database, "apply_user_stats_batch", broken)
+    with pytest.raises(database.sqlite3.OperationalError):
+        asyncio.run(buffer.flush())
+    monkeypatch.setattr(database, "apply_user_stats_batch", working)
+    buffer.add(1, "alice", messages=1)
+
+    assert buffer.stats()["flush_failures"] == 1
+    asyncio.run(buffer.flush())
+    assert database.get_user_rank(1)[1]["xp"] == 20
+
+
+def test_interval_is_clamped(monkeypatch):
+    monkeypatch.setenv("LEADERBOARD_FLUSH_INTERVAL_SECONDS", "3600")
+    monkeypatch.setenv("LEADERBOARD_FLUSH_MAX_EVENTS", "0")
+    config = BufferConfig.from_env()
+    assert config.flush_interval_seconds == 300
+    assert config.max_events == 1
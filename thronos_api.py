@@ -0,0 +1,327 @@
+"""Bot-owned HTTP client for the Thronos API with pooled connections and metrics."""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from conditional_poller import ConditionalPoller
+
+logger = logging.getLogger("thronos_bot.thronos_api")
+DEFAULT_API_URL = "https://api.thronoschain.org/api"
+
+# Fresh lifetime in seconds for endpoints several cogs poll; others are never cached.
+CACHE_TTLS = {
+    "/token/prices": 60,
+    "/network_stats": 60,
+    "/dashboard": 60,
+    "/health": 30,
+    "/pools": 120,
+    "/tokens/list": 300,
+    "/tokens/stats": 300,
+}
+# How long past its TTL an entry may still be served while a refresh runs.
+STALE_WHILE_REVALIDATE_SECONDS = 600
+
+
+def api_base_url(raw_url=None):
+    """Normalise ``THRONOS_API_URL`` so it always ends in ``/api``."""
+    raw_url = (raw_url or os.getenv("THRONOS_API_URL") or DEFAULT_API_URL).strip().rstrip("/")
+    return raw_url if raw_url.endswith("/api") else f"{raw_url}/api"
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    base_url: str
+    timeout_seconds: float = 10
+    connect_timeout_seconds: float = 5
+    max_connections: int = 32
+    max_connections_per_host: int = 8
+    dns_cache_seconds: int = 300
+    keepalive_seconds: float = 30
+    cache_entries: int = 128
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            base_url=api_base_url(),
+            timeout_seconds=float(os.getenv("THRONOS_API_TIMEOUT_SECONDS", "10")),
+            max_connections_per_host=max(1, int(os.getenv("THRONOS_API_CONNECTIONS_PER_HOST", "8"))),
+            cache_entries=max(1, int(os.getenv("THRONOS_API_CACHE_ENTRIES", "128"))),
+        )
+
+
+@dataclass
+class EndpointMetrics:
+    requests: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_status: int = 0
+
+    def record(self, elapsed, status, failed):
+        self.requests += 1
+        self.errors += int(failed)
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        self.last_status = status
+
+    def snapshot(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_seconds": round(self.total_seconds / self.requests, 6) if self.requests else 0.0,
+            "max_seconds": round(self.max_seconds, 6),
+            "last_status": self.last_status,
+        }
+
+
+class ResponseCache:
+    """Bounded LRU of decoded responses with stale-while-revalidate.
+
+    Fresh entries are returned directly. Entries past their TTL but within the
+    stale window are returned immediately while one background task refreshes
+    them. Misses wait on a single shared fetch however many callers arrive.
+    Failed fetches (``None``) are never stored, so the last good body survives.
+    """
+
+    def __init__(self, max_entries=128, stale_seconds=STALE_WHILE_REVALIDATE_SECONDS,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def peek(self, key):
+        """Return ``(value, age_seconds)`` without fetching, or ``(None, None)``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        return entry[0], self.clock() - entry[1]
+
+    def put(self, key, value):
+        """Store a body that arrived some other way, e.g. pushed by the chain event stream."""
+        if value is not None:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self._entries[key] = (value, self.clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _refresh(self, key, fetch):
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._fetch(key, fetch))
+        return task
+
+    async def _fetch(self, key, fetch):
+        try:
+            self.refreshes += 1
+            value = await fetch()
+            if value is not None:
+                self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, key, fetch, ttl):
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self.clock() - entry[1]
+            if age < ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+            if age < ttl + self.stale_seconds:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh(key, fetch)
+                return entry[0]
+        self.misses += 1
+        if key in self._inflight:
+            self.coalesced += 1
+        # Shielded so one cancelled caller does not abort the shared fetch.
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    async def close(self):
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        now = self.clock()
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+            "age_seconds": {key: round(now - fetched, 3)
+                            for key, (_, fetched) in self._entries.items()},
+        }
+
+
+class ThronosAPIClient:
+    """One keep-alive ``ClientSession`` shared by every cog.
+
+    Requests never raise: transport failures and timeouts are logged with the
+    exception type only and reported as status ``0``, matching how the cogs
+    already treated a missing response.
+    """
+
+    def __init__(self, config=None, cache=None):
+        self.config = config or ClientConfig.from_env()
+        self.cache = cache or ResponseCache(self.config.cache_entries)
+        self._session = None
+        self.metrics = {}
+        self.pollers = {}
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.max_connections,
+                limit_per_host=self.config.max_connections_per_host,
+                ttl_dns_cache=self.config.dns_cache_seconds,
+                keepalive_timeout=self.config.keepalive_seconds,
+            )
+            timeout = aiohttp.ClientTimeout(total=self.config.timeout_seconds,
+                                            connect=self.config.connect_timeout_seconds)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self):
+        await self.cache.close()
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def _url(self, endpoint):
+        if endpoint.startswith(("http://", "https://")):
+            return endpoint
+        return f"{self.config.base_url}{endpoint}"
+
+    @staticmethod
+    def _metric_key(endpoint):
+        if endpoint.startswith(("http://", "https://")):
+            parts = urlsplit(endpoint)
+            return f"{parts.netloc}{parts.path}"
+        return endpoint
+
+    async def request(self, method, endpoint, *, json=None, timeout=None, text=False):
+        """Return ``(status, body)``; body is parsed only for 200 responses."""
+        await self.start()
+        metrics = self.metrics.setdefault(self._metric_key(endpoint), EndpointMetrics())
+        kwargs = {"json": json} if json is not None else {}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout,
+                                                      connect=self.config.connect_timeout_seconds)
+        started = time.perf_counter()
+        status, body = 0, None
+        try:
+            async with self._session.request(method, self._url(endpoint), **kwargs) as response:
+                status = response.status
+                if status == 200:
+                    body = await (response.text() if text else response.json(content_type=None))
+        except Exception as error:
+            status, body = 0, None
+            logger.warning("Thronos API %s %s failed [%s]", method, endpoint, type(error).__name__)
+        metrics.record(time.perf_counter() - started, status, status != 200)
+        if status not in (0, 200):
+            logger.warning("Thronos API %s %s returned status %d", method, endpoint, status)
+        return status, body
+
+    async def get_conditional(self, endpoint, etag=None, last_modified=None, timeout=None):
+        """Conditional GET returning ``(status, raw body, etag, last_modified)``.
+
+        The body is left undecoded so callers can skip parsing it; ``304`` is a
+        success here, not an error.
+        """
+        await self.start()
+        metrics = self.metrics.setdefault(self._metric_key(endpoint), EndpointMetrics())
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        kwargs = {"headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout,
+                                                      connect=self.config.connect_timeout_seconds)
+        started = time.perf_counter()
+        status, body, etag, last_modified = 0, None, None, None
+        try:
+            async with self._session.get(self._url(endpoint), **kwargs) as response:
+                status = response.status
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if status == 200:
+                    body = await response.read()
+        except Exception as error:
+            status, body = 0, None
+            logger.warning("Thronos API GET %s failed [%s]", endpoint, type(error).__name__)
+        metrics.record(time.perf_counter() - started, status, status not in (200, 304))
+        if status not in (0, 200, 304):
+            logger.warning("Thronos API GET %s returned status %d", endpoint, status)
+        return status, body, etag, last_modified
+
+    def open_stream(self, endpoint, headers=None):
+        """Open a long-lived GET (e.g. server-sent events) on the shared session.
+
+        Returns the response context manager; only the connect timeout applies,
+        since the caller enforces its own read deadline per line.
+        """
+        if self._session is None or self._session.closed:
+            raise RuntimeError("ThronosAPIClient.start() has not been awaited")
+        timeout = aiohttp.ClientTimeout(total=None, connect=self.config.connect_timeout_seconds)
+        return self._session.get(self._url(endpoint), headers=headers or {}, timeout=timeout)
+
+    def poller(self, endpoint, **kwargs):
+        """A ``ConditionalPoller`` for ``endpoint``, reported under ``stats()["pollers"]``."""
+        poller = self.pollers[endpoint] = ConditionalPoller(self, endpoint, **kwargs)
+        return poller
+
+    async def get_json(self, endpoint, timeout=None):
+        """Return the decoded body of a successful GET, or ``None``."""
+        _, body = await self.request("GET", endpoint, timeout=timeout)
+        return body
+
+    async def get_cached(self, endpoint, ttl=None):
+        """Like ``get_json`` but served from the shared cache for ``CACHE_TTLS`` endpoints."""
+        ttl = CACHE_TTLS.get(endpoint) if ttl is None else ttl
+        if not ttl:
+            return await self.get_json(endpoint)
+        return await self.cache.get(endpoint, lambda: self.get_json(endpoint), ttl)
+
+    async def get_text(self, url, timeout=None):
+        _, body = await self.request("GET", url, timeout=timeout, text=True)
+        return body
+
+    async def post_json(self, endpoint, payload, timeout=None):
+        return await self.request("POST", endpoint, json=payload, timeout=timeout)
+
+    def stats(self):
+        return {
+            "base_url": self.config.base_url,
+            "open": self._session is not None and not self._session.closed,
+            "endpoints": {key: m.snapshot() for key, m in sorted(self.metrics.items())},
+            "cache": self.cache.stats(),
+            "pollers": {key: poller.stats() for key, poller in sorted(self.pollers.items())},
+        }
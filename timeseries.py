@@ -0,0 +1,294 @@
+"""Compact in-memory time series for prices and network counters.
+
+Samples the pollers already fetch are kept in ``array('d')`` ring buffers at
+three resolutions: raw, 1-minute and 1-hour buckets (close, low and high per
+bucket). ``/price`` and ``/stats`` read deltas, highs/lows and rates from here
+without another API call, and the downsampled levels are snapshotted to SQLite
+so 24h/7d history survives a restart.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from array import array
+
+from async_database import adb
+
+logger = logging.getLogger("thronos_bot.timeseries")
+
+METRICS = ("thr_usd", "wbtc_usd", "tx_count", "block_height", "tps")
+# (bucket seconds, capacity): raw samples, 24h of minutes, 30 days of hours
+RAW, MINUTE, HOUR = 0, 60, 3600
+LEVELS = ((RAW, 2048), (MINUTE, 1440), (HOUR, 720))
+# Levels written to SQLite; raw samples are rebuilt by polling
+SNAPSHOT_LEVELS = (MINUTE, HOUR)
+# A repeated value closer than this to the last sample is not stored again
+MIN_SAMPLE_GAP_SECONDS = 1.0
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def endpoint_samples(endpoint, body):
+    """Map an API body to ``{metric: value}`` for the endpoints the bot polls."""
+    if not isinstance(body, dict):
+        return {}
+    if endpoint == "/token/prices":
+        prices = body.get("prices") if isinstance(body.get("prices"), dict) else {}
+        values = {"thr_usd": body.get("thr_usd_rate", prices.get("THR")), "wbtc_usd": prices.get("WBTC")}
+    elif endpoint == "/network_stats":
+        values = {"tx_count": body.get("tx_count"), "block_height": body.get("block_count")}
+    elif endpoint == "/dashboard":
+        values = {"tps": body.get("tps"), "block_height": body.get("chain_height"),
+                  "tx_count": body.get("tx_count")}
+    else:
+        return {}
+    return {metric: value for metric, value in
+            ((metric, _number(value)) for metric, value in values.items()) if value is not None}
+
+
+class Ring:
+    """Fixed-capacity ring of ``(ts, close, low, high)`` rows, oldest overwritten first."""
+
+    __slots__ = ("capacity", "ts", "close", "low", "high", "start", "count")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.close = array("d", bytes(8 * capacity))
+        self.low = array("d", bytes(8 * capacity))
+        self.high = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _slot(self, k):
+        return (self.start + k) % self.capacity
+
+    def append(self, ts, close, low, high):
+        slot = self._slot(self.count)
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.count += 1
+        self.ts[slot], self.close[slot], self.low[slot], self.high[slot] = ts, close, low, high
+
+    def row(self, k):
+        slot = self._slot(k)
+        return self.ts[slot], self.close[slot], self.low[slot], self.high[slot]
+
+    def rows(self, since=-math.inf):
+        """Rows with ``ts >= since``, oldest first (binary search on time)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts[self._slot(mid)] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return [self.row(k) for k in range(lo, self.count)]
+
+
+class Level:
+    """One resolution: completed buckets in a ring plus the bucket still filling."""
+
+    def __init__(self, step, capacity):
+        self.step = step
+        self.ring = Ring(capacity)
+        self.pending = None
+
+    def add(self, ts, close, low, high):
+        if not self.step:
+            self.ring.append(ts, close, low, high)
+            return
+        bucket = ts - ts % self.step
+        pending = self.pending
+        if pending is not None and bucket < pending[0]:
+            return
+        if pending is None or bucket > pending[0]:
+            if pending is not None:
+                self.ring.append(*pending)
+            self.pending = [bucket, close, low, high]
+        else:
+            pending[1], pending[2], pending[3] = close, min(pending[2], low), max(pending[3], high)
+
+    def oldest(self):
+        if self.ring.count:
+            return self.ring.ts[self.ring.start]
+        return self.pending[0] if self.pending else None
+
+    def last(self):
+        if self.pending is not None:
+            return tuple(self.pending)
+        return self.ring.row(self.ring.count - 1) if self.ring.count else None
+
+    def rows(self, since=-math.inf):
+        rows = self.ring.rows(since)
+        if self.pending is not None and self.pending[0] >= since:
+            rows.append(tuple(self.pending))
+        return rows
+
+
+class MetricSeries:
+    def __init__(self):
+        self.levels = {step: Level(step, capacity) for step, capacity in LEVELS}
+
+    def add(self, ts, value):
+        # Every level aggregates the raw sample directly, which is equivalent
+        # to cascading raw -> 1m -> 1h for close/low/high.
+        for level in self.levels.values():
+            level.add(ts, value, value, value)
+
+    def latest(self):
+        for level in self.levels.values():
+            row = level.last()
+            if row is not None:
+                return row
+        return None
+
+    def rows(self, since):
+        """Rows from the finest level that reaches back to ``since``, else the longest history."""
+        candidates = []
+        for step, level in self.levels.items():
+            oldest = level.oldest()
+            if oldest is None:
+                continue
+            if oldest <= since + step:
+                return level.rows(since)
+            candidates.append((oldest, step, level))
+        return min(candidates)[2].rows(since) if candidates else []
+
+
+class TimeSeriesStore:
+    """Per-metric series fed by the pollers and chain events, snapshotted to SQLite."""
+
+    def __init__(self, snapshot_seconds=None, clock=time.time):
+        self.snapshot_seconds = snapshot_seconds or max(
+            10.0, float(os.getenv("TIMESERIES_SNAPSHOT_SECONDS", "300")))
+        self.clock = clock
+        self.series = {metric: MetricSeries() for metric in METRICS}
+        self._saved_until = {}
+        self._task = None
+        self.samples = 0
+        self.snapshots = 0
+        self.snapshot_failures = 0
+
+    def record(self, metric, value, ts=None):
+        value = _number(value)
+        series = self.series.get(metric)
+        if series is None or value is None:
+            return False
+        ts = self.clock() if ts is None else ts
+        last = series.levels[RAW].last()
+        if last is not None and last[1] == value and ts - last[0] < MIN_SAMPLE_GAP_SECONDS:
+            return False
+        series.add(ts, value)
+        self.samples += 1
+        return True
+
+    def observe(self, endpoint, body, ts=None):
+        """Record every metric ``body`` carries for ``endpoint``."""
+        for metric, value in endpoint_samples(endpoint, body).items():
+            self.record(metric, value, ts)
+
+    def latest(self, metric):
+        row = self.series[metric].latest()
+        return row[1] if row else None
+
+    def summary(self, metric, window, now=None):
+        """Change, low/high and hourly rate over the last ``window`` seconds, or ``None``."""
+        now = self.clock() if now is None else now
+        rows = self.series[metric].rows(now - window)
+        if len(rows) < 2:
+            return None
+        (first_ts, first, _, _), (last_ts, last, _, _) = rows[0], rows[-1]
+        elapsed = last_ts - first_ts
+        return {
+            "first": first,
+            "last": last,
+            "change": last - first,
+            "percent": (last - first) / first * 100 if first else None,
+            "low": min(row[2] for row in rows),
+            "high": max(row[3] for row in rows),
+            "per_hour": (last - first) / elapsed * 3600 if elapsed > 0 else None,
+            "span_seconds": elapsed,
+        }
+
+    def _cutoffs(self, now):
+        return {step: now - step * capacity for step, capacity in LEVELS if step in SNAPSHOT_LEVELS}
+
+    async def load(self):
+        rows = await adb.load_metric_samples(self._cutoffs(self.clock()))
+        last = {}
+        for metric, resolution, ts, close, low, high in rows:
+            series = self.series.get(metric)
+            if series is None or resolution not in series.levels:
+                continue
+            level = series.levels[resolution]
+            if level.pending is not None:
+                level.ring.append(*level.pending)
+            # The newest stored bucket may still be filling, so it resumes as pending
+            level.pending = [ts, close, low, high]
+            last[(metric, resolution)] = ts
+        self._saved_until.update(last)
+        logger.info("Restored %d stored samples", len(rows))
+
+    async def snapshot(self):
+        """Write buckets changed since the previous snapshot and prune old ones."""
+        rows, marks = [], {}
+        cutoffs = self._cutoffs(self.clock())
+        for metric, series in self.series.items():
+            for step in SNAPSHOT_LEVELS:
+                level = series.levels[step]
+                since = max(cutoffs[step], self._saved_until.get((metric, step), -math.inf))
+                changed = level.rows(since)
+                rows.extend((metric, step, *row) for row in changed)
+                if changed:
+                    # The last bucket is rewritten next time in case it was still filling
+                    marks[(metric, step)] = changed[-1][0]
+        try:
+            await adb.save_metric_samples(rows, cutoffs)
+        except Exception as error:
+            self.snapshot_failures += 1
+            logger.error("Time-series snapshot failed [%s]", type(error).__name__)
+            return 0
+        self._saved_until.update(marks)
+        self.snapshots += 1
+        return len(rows)
+
+    async def start(self):
+        try:
+            await self.load()
+        except Exception as error:
+            logger.error("Time-series restore failed [%s]", type(error).__name__)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.snapshot_seconds)
+            await self.snapshot()
+
+    async def close(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await self.snapshot()
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "snapshots": self.snapshots,
+            "snapshot_failures": self.snapshot_failures,
+            "points": {metric: {str(step): len(level.ring) + (level.pending is not None)
+                                for step, level in series.levels.items()}
+                       for metric, series in self.series.items()},
+        }
@@ -0,0 +1,57 @@
+"""Deliver one prepared payload to many guilds concurrently."""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("thronos_bot.broadcast")
+
+# Each guild posts to its own channel, so deliveries land in separate Discord
+# rate-limit buckets; the cap keeps the bot well inside the global limit.
+BROADCAST_CONCURRENCY = max(1, int(os.getenv("BROADCAST_CONCURRENCY", "5")))
+
+
+@dataclass
+class FanOutResult:
+    delivered: int = 0
+    skipped: int = 0
+    failures: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self):
+        return {
+            "delivered": self.delivered,
+            "skipped": self.skipped,
+            "failed": len(self.failures),
+            "failures": dict(self.failures),
+            "deliver_seconds": round(self.seconds, 4),
+        }
+
+
+async def fan_out(targets, deliver, concurrency=BROADCAST_CONCURRENCY):
+    """Await ``deliver(target)`` for every target, at most ``concurrency`` at a time.
+
+    ``deliver`` returns a falsy value when a target has nowhere to post. A
+    failure is recorded against the target's ``id`` by exception type and never
+    stops the other deliveries.
+    """
+    result = FanOutResult()
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    async def run(target):
+        async with slots:
+            try:
+                if await deliver(target):
+                    result.delivered += 1
+                else:
+                    result.skipped += 1
+            except Exception as error:
+                key = getattr(target, "id", target)
+                result.failures[key] = type(error).__name__
+                logger.warning("Broadcast to %s failed [%s]", key, type(error).__name__)
+
+    await asyncio.gather(*(run(target) for target in targets))
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,146 @@
+"""Per-guild name -> ID index for channels and roles, kept current from gateway events."""
+import json
+import logging
+import os
+
+import discord
+
+logger = logging.getLogger("thronos_bot.guild_index")
+
+KINDS = ("text", "category", "role")
+
+
+def load_overrides(raw=None):
+    """Parse ``GUILD_RESOLVER_OVERRIDES``.
+
+    The shape is ``{"<guild_id>": {"text": {"network-stats": <id>}, "role": {...}}}``.
+    An override pins a name to an ID, so a renamed channel or role still resolves.
+    """
+    raw = os.getenv("GUILD_RESOLVER_OVERRIDES", "") if raw is None else raw
+    if not raw.strip():
+        return {}
+    try:
+        parsed = json.loads(raw)
+        return {
+            int(guild_id): {kind: {name: int(target) for name, target in names.items()}
+                            for kind, names in kinds.items() if kind in KINDS}
+            for guild_id, kinds in parsed.items()
+        }
+    except (ValueError, TypeError, AttributeError) as error:
+        logger.warning("Ignoring GUILD_RESOLVER_OVERRIDES [%s]", type(error).__name__)
+        return {}
+
+
+def _kind(obj):
+    if isinstance(obj, discord.Role):
+        return "role"
+    if isinstance(obj, discord.CategoryChannel):
+        return "category"
+    if isinstance(obj, discord.TextChannel):
+        return "text"
+    return None
+
+
+class GuildIndex:
+    """Resolve channels and roles by name without scanning ``guild.text_channels``.
+
+    Each guild maps ``(kind, name)`` to the IDs carrying that name; lookups go
+    through ``guild.get_channel``/``get_role``, which are dict reads. Guilds are
+    indexed lazily on first lookup and updated from create/update/delete
+    events. When a name is shared, the result matches ``discord.utils.get``:
+    the first by position.
+    """
+
+    def __init__(self, overrides=None):
+        self.overrides = load_overrides() if overrides is None else overrides
+        self._guilds = {}
+        self.lookups = 0
+        self.rebuilds = 0
+
+    def attach(self, bot):
+        for event, handler in (
+            ("on_guild_join", self.rebuild),
+            ("on_guild_available", self.rebuild),
+            ("on_guild_remove", self.drop),
+            ("on_guild_channel_create", self.add),
+            ("on_guild_channel_delete", self.remove),
+            ("on_guild_channel_update", self.update),
+            ("on_guild_role_create", self.add),
+            ("on_guild_role_delete", self.remove),
+            ("on_guild_role_update", self.update),
+        ):
+            bot.add_listener(handler, event)
+
+    async def rebuild(self, guild):
+        self._build(guild)
+
+    async def drop(self, guild):
+        self._guilds.pop(guild.id, None)
+
+    async def add(self, obj):
+        self._add(self._guilds.get(obj.guild.id), obj)
+
+    async def remove(self, obj):
+        self._remove(self._guilds.get(obj.guild.id), obj, obj.name)
+
+    async def update(self, before, after):
+        names = self._guilds.get(after.guild.id)
+        self._remove(names, after, before.name)
+        self._add(names, after)
+
+    def _build(self, guild):
+        names = {}
+        for obj in (*guild.text_channels, *guild.categories, *guild.roles):
+            self._add(names, obj)
+        self._guilds[guild.id] = names
+        self.rebuilds += 1
+        return names
+
+    @staticmethod
+    def _add(names, obj):
+        kind = _kind(obj)
+        if names is not None and kind:
+            names.setdefault((kind, obj.name), set()).add(obj.id)
+
+    @staticmethod
+    def _remove(names, obj, name):
+        kind = _kind(obj)
+        if names is None or not kind:
+            return
+        ids = names.get((kind, name))
+        if ids is not None:
+            ids.discard(obj.id)
+            if not ids:
+                del names[(kind, name)]
+
+    def _resolve(self, guild, kind, name):
+        self.lookups += 1
+        get = guild.get_role if kind == "role" else guild.get_channel
+        pinned = self.overrides.get(guild.id, {}).get(kind, {}).get(name)
+        if pinned is not None:
+            found = get(pinned)
+            if found is not None:
+                return found
+        names = self._guilds.get(guild.id)
+        if names is None:
+            names = self._build(guild)
+        candidates = [obj for obj in map(get, names.get((kind, name), ())) if obj is not None]
+        # A missed event leaves a stale entry; rebuild rather than return the wrong object
+        if any(obj.name != name or _kind(obj) != kind for obj in candidates):
+            names = self._build(guild)
+            candidates = [obj for obj in map(get, names.get((kind, name), ())) if obj is not None]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda obj: (obj.position, obj.id))
+
+    def text_channel(self, guild, name):
+        return self._resolve(guild, "text", name)
+
+    def category(self, guild, name):
+        return self._resolve(guild, "category", name)
+
+    def role(self, guild, name):
+        return self._resolve(guild, "role", name)
+
+    def stats(self):
+        return {"guilds": len(self._guilds), "lookups": self.lookups, "rebuilds": self.rebuilds}
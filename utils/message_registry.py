@@ -0,0 +1,59 @@
+"""Edit the bot's known message in a channel without scanning its history."""
+import logging
+
+import discord
+
+from async_database import adb
+
+logger = logging.getLogger("thronos_bot.message_registry")
+
+# The one long-lived message the bot keeps in a content channel
+CONTENT_SLOT = "content"
+
+
+def registered_message(channel, message_id):
+    """A ``PartialMessage`` for a registered ID; editing it costs one request."""
+    return channel.get_partial_message(message_id) if message_id else None
+
+
+async def remember(channel, slot, message):
+    await adb.set_bot_message(channel.guild.id, channel.id, slot, message.id)
+
+
+async def forget(channel, slot):
+    await adb.delete_bot_message(channel.guild.id, channel.id, slot)
+
+
+async def find_own_message(bot, channel, scan_limit):
+    """Scan recent history for the bot's latest embed message (the pre-registry lookup)."""
+    async for message in channel.history(limit=scan_limit):
+        if message.author == bot.user and message.embeds:
+            return message
+    return None
+
+
+async def upsert_message(bot, channel, slot=CONTENT_SLOT, *, create=True, scan_limit=10, **fields):
+    """Edit the message registered for ``slot``, repairing the registry if needed.
+
+    Only a missing entry or a 404 on the registered message triggers a history
+    scan; whatever it finds (or the new message posted when ``create`` is set)
+    is registered for next time. Returns the edited message, or ``None`` when
+    nothing was found and ``create`` is false.
+    """
+    message_id = await adb.get_bot_message(channel.guild.id, channel.id, slot)
+    if message_id:
+        try:
+            return await registered_message(channel, message_id).edit(**fields)
+        except discord.NotFound:
+            logger.info("Registered %s message in channel %s is gone; rescanning", slot, channel.id)
+            await forget(channel, slot)
+
+    message = await find_own_message(bot, channel, scan_limit)
+    if message is not None:
+        message = await message.edit(**fields)
+    elif create:
+        message = await channel.send(**fields)
+    else:
+        return None
+    await remember(channel, slot, message)
+    return message
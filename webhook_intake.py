@@ -0,0 +1,77 @@
+"""Cheap-first rejection for signed webhook requests.
+
+Requests are turned away in order of cost: a declared ``Content-Length``
+over the route's cap (no read), then the rate limiter (no read), and only
+then is the body streamed through the HMAC, chunk by chunk, stopping as
+soon as it exceeds the cap.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+
+from aiohttp import web
+
+logger = logging.getLogger("thronos_bot.webhook_intake")
+
+CHUNK_BYTES = 1024
+# Route -> (env var, default cap in bytes); the SigBalBot cap is part of its contract
+BODY_LIMITS = {
+    "/pytheia/alert": ("PYTHEIA_ALERT_MAX_BODY_BYTES", 8192),
+    "/sigbalbot/free-btc-signal": (None, 4096),
+}
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+def body_limits_from_env():
+    limits = {}
+    for route, (name, default) in BODY_LIMITS.items():
+        limits[route] = max(1, int(os.getenv(name, default))) if name else default
+    return limits
+
+
+def client_max_size(limits):
+    """aiohttp's own ``client_max_size`` backstop for any route without a cap."""
+    return max(limits.values(), default=1024 ** 2)
+
+
+def body_limit_middleware(limits, too_large=None):
+    """Reject a declared oversize body with 413 before anything is read."""
+    too_large = too_large or {"error": "PAYLOAD_TOO_LARGE"}
+
+    @web.middleware
+    async def body_limit(request, handler):
+        cap = limits.get(request.path)
+        if cap is not None and request.content_length is not None and request.content_length > cap:
+            return web.json_response(
+                too_large, status=413,
+                dumps=lambda value: json.dumps(value, separators=(",", ":")))
+        return await handler(request)
+    return body_limit
+
+
+async def read_signed_body(request, secret, max_bytes):
+    """Stream at most ``max_bytes`` of the body through HMAC-SHA256.
+
+    Returns ``(body, "sha256=<hexdigest>")``. Raises ``PayloadTooLarge`` as
+    soon as the stream passes the cap, which also covers chunked bodies that
+    declare no length.
+    """
+    if request.content_length is not None and request.content_length > max_bytes:
+        raise PayloadTooLarge()
+    mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+    body = bytearray()
+    async for chunk in request.content.iter_chunked(CHUNK_BYTES):
+        if len(body) + len(chunk) > max_bytes:
+            raise PayloadTooLarge()
+        mac.update(chunk)
+        body += chunk
+    return bytes(body), "sha256=" + mac.hexdigest()
+
+
+def signature_matches(expected, supplied):
+    return bool(supplied) and hmac.compare_digest(expected, supplied)
@@ -0,0 +1,199 @@
+"""Webhook intake and health routes, served by the bot or by the standalone ingress.
+
+Intake only validates and writes to the delivery outbox, so it needs no
+Discord connection; whichever process owns the gateway drains the outbox.
+"""
+import json
+import logging
+import os
+import re
+
+from aiohttp import web
+
+import database
+import outbox
+from async_database import adb
+from future_btc_signal import configure_publisher, handle_request as handle_future_btc_signal
+from promotion import health_handler as promotion_health_handler
+from rate_limiter import RateLimiter
+from webhook_intake import (
+    PayloadTooLarge,
+    body_limit_middleware,
+    body_limits_from_env,
+    client_max_size,
+    read_signed_body,
+    signature_matches,
+)
+
+logger = logging.getLogger("thronos_bot.webhook_server")
+
+# Allowed values for input validation
+VALID_SIGNAL_TYPES = {"trade", "alert", "rebalance", "liquidation"}
+VALID_ACTIONS = {"buy", "sell", "swap", "stake", "unstake"}
+
+# One accepted alert is queued as ALERT_BATCH_KIND; the bot expands it into
+# one ALERT_KIND item per guild it is in at delivery time.
+ALERT_BATCH_KIND = "pytheia_alert_batch"
+ALERT_KIND = "pytheia_alert"
+# Only these payload fields are rendered, so only these are persisted
+ALERT_FIELDS = ("signal_type", "symbol", "action", "tx_hash", "amount", "token", "profit_estimate")
+
+
+def is_valid_tx_hash(tx_hash):
+    """Validate that a tx_hash looks like a valid hex transaction hash."""
+    return bool(re.match(r'^0x[0-9a-fA-F]{64}$', tx_hash))
+
+
+def server_mode():
+    """``embedded`` (default) serves webhooks from the bot; ``external`` leaves them to ``python -m ingress``."""
+    mode = os.getenv("WEBHOOK_SERVER_MODE", "embedded").strip().lower()
+    return mode if mode in {"embedded", "external"} else "embedded"
+
+
+def listen_port():
+    # Bind to PORT from environment (fallback to 5005) for external Vercel/Railway hosting
+    return int(os.getenv("PORT", 5005))
+
+
+class WebhookServer:
+    """The aiohttp application for ``/pytheia/alert``, ``/sigbalbot/free-btc-signal`` and ``/health/*``.
+
+    ``bot`` and ``dispatcher`` are ``None`` in the ingress process; routes that
+    report on them are then omitted or reduced to what the database knows.
+    """
+
+    def __init__(self, bot=None, dispatcher=None):
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.webhook_secret = os.getenv("WEBHOOK_SECRET")
+        self.signal_publisher = configure_publisher(bot)
+        if not self.webhook_secret:
+            logger.warning("WEBHOOK_SECRET not set - webhook endpoint will reject all requests")
+
+        # Cheapest rejection first: declared size, then rate limit, then the
+        # handler streams the body through the HMAC
+        self.body_limits = body_limits_from_env()
+        self.rate_limiter = RateLimiter()
+        self.app = web.Application(
+            client_max_size=client_max_size(self.body_limits),
+            middlewares=[body_limit_middleware(self.body_limits), self.rate_limiter.middleware()],
+        )
+        self.app.router.add_post('/pytheia/alert', self.handle_alert)
+        self.app.router.add_post('/sigbalbot/free-btc-signal', handle_future_btc_signal)
+        self.app.router.add_get('/health/community-promotion', promotion_health_handler)
+        self.app.router.add_get('/health/sigbalbot-relay', self.handle_signal_health)
+        self.app.router.add_get('/health/database', self.handle_database_health)
+        self.app.router.add_get('/health/webhooks', self.handle_webhook_health)
+        if bot is not None:
+            self.app.router.add_get('/health/thronos-api', self.handle_api_health)
+        self.runner = None
+
+    async def start(self, host='0.0.0.0', port=None):
+        port = port or listen_port()
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        logger.info("Webhook server listening on %s:%d", host, port)
+
+    async def close(self):
+        runner, self.runner = self.runner, None
+        if runner is not None:
+            await runner.cleanup()
+
+    async def outbox_health(self):
+        data = await adb.run_read(outbox.stats)
+        if self.dispatcher is not None:
+            data["dispatcher"] = self.dispatcher.stats()
+        return data
+
+    async def handle_signal_health(self, request):
+        data = await adb.run_read(self.signal_publisher.diagnostics)
+        data["outbox"] = await self.outbox_health()
+        return web.json_response(data)
+
+    async def handle_database_health(self, request):
+        data = {"pool": database.pool_stats(), "executor": adb.stats(),
+                "outbox": await self.outbox_health()}
+        leaderboard = self.bot.get_cog("Leaderboard") if self.bot else None
+        if leaderboard:
+            data["leaderboard_buffer"] = leaderboard.buffer.stats()
+            data["leaderboard_ranking"] = leaderboard.ranking.stats()
+        return web.json_response(data)
+
+    async def handle_api_health(self, request):
+        data = self.bot.api.stats()
+        network_stats = self.bot.get_cog("NetworkStats")
+        if network_stats:
+            data["network_stats_tick"] = network_stats.last_tick
+            data["charts"] = network_stats.charts.stats()
+        data["chain_events"] = self.bot.chain_events.stats()
+        data["timeseries"] = self.bot.timeseries.stats()
+        return web.json_response(data)
+
+    async def handle_webhook_health(self, request):
+        return web.json_response({"mode": "embedded" if self.bot else "ingress",
+                                  "rate_limits": self.rate_limiter.stats()})
+
+    async def handle_alert(self, request):
+        try:
+            # --- HMAC signature verification ---
+            signature = request.headers.get("X-Signature")
+            if not signature:
+                logger.warning("Webhook request missing X-Signature header")
+                return web.json_response({"error": "Missing signature"}, status=401)
+
+            if not self.webhook_secret:
+                logger.warning("Webhook request rejected: WEBHOOK_SECRET not set")
+                return web.json_response({"error": "Invalid signature"}, status=403)
+            try:
+                body, expected = await read_signed_body(
+                    request, self.webhook_secret, self.body_limits["/pytheia/alert"])
+            except PayloadTooLarge:
+                return web.json_response({"error": "PAYLOAD_TOO_LARGE"}, status=413)
+            if not signature_matches(expected, signature):
+                logger.warning("Webhook request with invalid signature")
+                return web.json_response({"error": "Invalid signature"}, status=403)
+
+            # --- Parse and validate payload ---
+            try:
+                data = json.loads(body)
+            except (json.JSONDecodeError, ValueError):
+                return web.json_response({"error": "Invalid JSON"}, status=400)
+
+            # Validate required fields
+            required_fields = ["signal_type", "symbol", "action", "tx_hash"]
+            missing = [f for f in required_fields if f not in data or not data[f]]
+            if missing:
+                return web.json_response(
+                    {"error": f"Missing required fields: {', '.join(missing)}"},
+                    status=400
+                )
+
+            # Validate field values
+            if data["signal_type"] not in VALID_SIGNAL_TYPES:
+                return web.json_response(
+                    {"error": f"Invalid signal_type. Must be one of: {', '.join(sorted(VALID_SIGNAL_TYPES))}"},
+                    status=400
+                )
+
+            if data["action"] not in VALID_ACTIONS:
+                return web.json_response(
+                    {"error": f"Invalid action. Must be one of: {', '.join(sorted(VALID_ACTIONS))}"},
+                    status=400
+                )
+
+            if not is_valid_tx_hash(data["tx_hash"]):
+                return web.json_response(
+                    {"error": "Invalid tx_hash format. Expected 0x-prefixed 64 hex characters."},
+                    status=400
+                )
+
+            alert = {key: data[key] for key in ALERT_FIELDS if key in data}
+            dedupe = f"{data['tx_hash']}:{data['signal_type']}:{data['action']}"
+            queued = await adb.run_write(outbox.enqueue, [
+                (ALERT_BATCH_KIND, ALERT_KIND, alert, f"{ALERT_KIND}:{dedupe}")])
+            outbox.wake()
+            return web.json_response({"status": "queued", "duplicate": not queued}, status=202)
+        except Exception as error:
+            logger.error("Error handling pytheia webhook [%s]", type(error).__name__)
+            return web.json_response({"error": "Internal server error"}, status=500)
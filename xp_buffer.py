@@ -0,0 +1,154 @@
+"""Write-behind accumulator that batches leaderboard XP into one transaction."""
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import database
+from async_database import adb
+
+logger = logging.getLogger("thronos_bot.xp_buffer")
+MAX_FLUSH_INTERVAL_SECONDS = 300
+
+
+@dataclass
+class XPDelta:
+    username: str
+    messages: int = 0
+    reactions: int = 0
+    referrals: int = 0
+    xp: int = 0
+    last_active: str = ""
+
+    def row(self, user_id):
+        return (user_id, self.username, self.messages, self.reactions,
+                self.referrals, self.xp, self.last_active)
+
+    def rollup_row(self, guild_id, user_id, bucket_start):
+        return (guild_id, user_id, bucket_start, self.username, self.messages,
+                self.reactions, self.referrals, self.xp)
+
+    def add(self, username, messages, reactions, referrals, last_active):
+        self.username = username
+        self.messages += messages
+        self.reactions += reactions
+        self.referrals += referrals
+        self.xp += database.calculate_xp(messages, reactions, referrals)
+        self.last_active = last_active
+
+    def merge_older(self, older):
+        """Fold an older delta in while keeping this delta's latest username."""
+        self.messages += older.messages
+        self.reactions += older.reactions
+        self.referrals += older.referrals
+        self.xp += older.xp
+
+
+@dataclass(frozen=True)
+class BufferConfig:
+    flush_interval_seconds: int
+    max_events: int
+
+    @classmethod
+    def from_env(cls):
+        # The interval is the worst-case loss window on a hard crash, so it is capped.
+        interval = int(os.getenv("LEADERBOARD_FLUSH_INTERVAL_SECONDS", "10"))
+        max_events = int(os.getenv("LEADERBOARD_FLUSH_MAX_EVENTS", "500"))
+        return cls(min(max(interval, 1), MAX_FLUSH_INTERVAL_SECONDS), max(max_events, 1))
+
+
+def _sqlite_timestamp(now=None):
+    """Match the ``CURRENT_TIMESTAMP`` text format used elsewhere in ``user_stats``."""
+    return (now or datetime.now(timezone.utc)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class XPBuffer:
+    """Coalesce per-user XP deltas in memory and flush them with ``executemany``.
+
+    Events carrying a guild are also coalesced per ``(guild, user, hour)`` for
+    the ``activity_rollups`` table, written in the same transaction.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or BufferConfig.from_env()
+        self._pending = {}
+        self._activity = {}
+        self._pending_events = 0
+        self.events_buffered = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rows_flushed = 0
+        self.last_flush_size = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def add(self, user_id, username, messages=0, reactions=0, referrals=0,
+            guild_id=None, now=None):
+        """Buffer one event; return True once enough events are waiting to flush."""
+        stamp = _sqlite_timestamp(now)
+        delta = self._pending.get(user_id)
+        if delta is None:
+            delta = self._pending[user_id] = XPDelta(username)
+        delta.add(username, messages, reactions, referrals, stamp)
+        if guild_id is not None:
+            key = (guild_id, user_id, database.activity_hour_bucket(now))
+            rollup = self._activity.get(key)
+            if rollup is None:
+                rollup = self._activity[key] = XPDelta(username)
+            rollup.add(username, messages, reactions, referrals, stamp)
+        self._pending_events += 1
+        self.events_buffered += 1
+        return self._pending_events >= self.config.max_events
+
+    @staticmethod
+    def _merge_back(pending, batch):
+        """Return a failed batch to the buffer without losing newer events."""
+        for key, old in batch.items():
+            current = pending.get(key)
+            if current is None:
+                pending[key] = old
+            else:
+                current.merge_older(old)
+
+    async def flush(self):
+        """Write every buffered delta; returns the list of flushed rows."""
+        if not self._pending:
+            return []
+        batch, activity, events = self._pending, self._activity, self._pending_events
+        self._pending, self._activity, self._pending_events = {}, {}, 0
+        rows = [delta.row(user_id) for user_id, delta in batch.items()]
+        rollups = [delta.rollup_row(*key) for key, delta in activity.items()]
+        started = time.perf_counter()
+        try:
+            await adb.run_write(database.apply_user_stats_batch, rows, rollups)
+        except Exception:
+            self.flush_failures += 1
+            self._merge_back(self._pending, batch)
+            self._merge_back(self._activity, activity)
+            self._pending_events += events
+            raise
+        elapsed = time.perf_counter() - started
+        self.flushes += 1
+        self.rows_flushed += len(rows)
+        self.last_flush_size = len(rows)
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        logger.debug("Flushed %d leaderboard rows (%d events) in %.4fs", len(rows), events, elapsed)
+        return rows
+
+    def stats(self):
+        return {
+            "flush_interval_seconds": self.config.flush_interval_seconds,
+            "max_events": self.config.max_events,
+            "events_buffered": self.events_buffered,
+            "pending_events": self._pending_events,
+            "pending_users": len(self._pending),
+            "pending_rollups": len(self._activity),
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "rows_flushed": self.rows_flushed,
+            "last_flush_size": self.last_flush_size,
+            "last_flush_seconds": round(self.last_flush_seconds, 6),
+            "max_flush_seconds": round(self.max_flush_seconds, 6),
+        }